@@ -143,7 +143,7 @@ int thumb_min = 60;
 int thumb_max = 170;
 
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(115200); // Pipelined frames need more than 9600 baud
   pwm.begin();
   pwm.setPWMFreq(330); 
 
@@ -201,111 +201,137 @@ void setup() {
   pwm.setPWM(Rothead, 0, angleToPulse(90));
 }
 
-void loop() {
-  if (Serial.available()) {
-    int servoNum = Serial.parseInt(); // Read servo number
-    int angle = Serial.parseInt();    // Read angle
-
-    // Clear any extra characters from the buffer
-    while (Serial.available()) Serial.read();
-
-    // Clamp angle to [0, 180]
-    angle = constrain(angle, 0, 180);
-
-    switch (servoNum) {
-      case 0:
-        pwm.setPWM(Eye_Left_LR, 0, angleToPulse(constrain(angle, Eye_Left_LR_min, Eye_Left_LR_max)));
-        break;
-      case 1:
-        pwm.setPWM(Eye_Right_LR, 0, angleToPulse(constrain(angle, Eye_Right_LR_min, Eye_Right_LR_max)));
-        break;
-      case 2:
-        pwm.setPWM(Eye_Right_UD, 0, angleToPulse(constrain(angle, Eye_Right_UD_min, Eye_Right_UD_max)));
-        break;
-      case 3:
-        pwm.setPWM(Check_L, 0, angleToPulse(constrain(angle, Check_L_min, Check_L_max)));
-        break;
-      case 4:
-        pwm.setPWM(Check_R, 0, angleToPulse(constrain(angle, Check_R_min, Check_R_max)));
-        break;
-      case 5:
-        pwm.setPWM(Upper_Lip, 0, angleToPulse(constrain(angle, Upper_Lip_min, Upper_Lip_max)));
-        break;
-      case 6:
-        pwm.setPWM(Eye_Left_UD, 0, angleToPulse(constrain(angle, Eye_Left_UD_min, Eye_Left_UD_max)));
-        break;
-      case 7:
-        pwm.setPWM(Eyelid_Right_Lower, 0, angleToPulse(constrain(angle, Eyelid_Right_Lower_min, Eyelid_Right_Lower_max)));
-        break;
-      case 8:
-        pwm.setPWM(Eyebrow_R, 0, angleToPulse(constrain(angle, Eyebrow_R_min, Eyebrow_R_max)));
-        break;
-      case 9:
-        pwm.setPWM(Eyelid_Right_Upper, 0, angleToPulse(constrain(angle, Eyelid_Right_Upper_min, Eyelid_Right_Upper_max)));
-        break;
-      case 10:
-        pwm.setPWM(Forhead_R, 0, angleToPulse(constrain(angle, Forhead_R_min, Forhead_R_max)));
-        break;
-      case 11:
-        pwm.setPWM(Forhead_L, 0, angleToPulse(constrain(angle, Forhead_L_min, Forhead_L_max)));
-        break;
-      case 12:
-        pwm.setPWM(Eyebrow_L, 0, angleToPulse(constrain(angle, Eyebrow_L_min, Eyebrow_L_max)));
-        break;
-      case 13:
-        pwm.setPWM(Eyelid_Left_Down, 0, angleToPulse(constrain(angle, Eyelid_Left_Down_min, Eyelid_Left_Down_max)));
-        break;
-      case 14:
-        pwm.setPWM(Eyelid_Left_Up, 0, angleToPulse(constrain(angle, Eyelid_Left_Up_min, Eyelid_Left_Up_max)));
-        break;
-      case 15:
-        pwm.setPWM(Rothead, 0, angleToPulse(constrain(angle, Rothead_min, Rothead_max)));
-        break;
-
-      // Shoulder and body servos
-      case 16:
-        bicep.write(constrain(angle, bicep_min, bicep_max));
-        break;
-      case 17:
-        rotate.write(constrain(angle, rotate_min, rotate_max));
-        break;
-      case 18:
-        shoulder.write(constrain(angle, shoulder_min, shoulder_max));
-        break;
-      case 19:
-        omoplate.write(constrain(angle, omoplate_min, omoplate_max));
-        break;
-      case 20:
-        Neck.write(constrain(angle, Neck_min, Neck_max));
-        break;
-      case 21:
-        Jaw.write(constrain(angle, Jaw_min, Jaw_max));
-        break;
-      case 22:
-        RollNeck.write(constrain(angle, RollNeck_min, RollNeck_max));
-        break;
-      case 23:
-        wrist.write(constrain(angle, wrist_min, wrist_max));
-        break;
-      case 24:
-        ringfinger.write(constrain(angle, ringfinger_min, ringfinger_max));
-        break;
-      case 25:
-        midfinger.write(constrain(angle, midfinger_min, midfinger_max));
-        break;
-      case 26:
-        pinky.write(constrain(angle, pinky_min, pinky_max));
-        break;
-      case 27:
-        index.write(constrain(angle, index_min, index_max));
-        break;
-      case 28:
-        thumb.write(constrain(angle, thumb_min, thumb_max));
-        break;
-
-      default:
-        Serial.println("Invalid servo number");
-        break;
+// Sets one servo (angle clamped to [0, 180] and to the servo limits).
+// Returns false for an unknown servo number.
+bool setServo(int servoNum, int angle) {
+  angle = constrain(angle, 0, 180);
+
+  switch (servoNum) {
+    case 0:
+      pwm.setPWM(Eye_Left_LR, 0, angleToPulse(constrain(angle, Eye_Left_LR_min, Eye_Left_LR_max)));
+      break;
+    case 1:
+      pwm.setPWM(Eye_Right_LR, 0, angleToPulse(constrain(angle, Eye_Right_LR_min, Eye_Right_LR_max)));
+      break;
+    case 2:
+      pwm.setPWM(Eye_Right_UD, 0, angleToPulse(constrain(angle, Eye_Right_UD_min, Eye_Right_UD_max)));
+      break;
+    case 3:
+      pwm.setPWM(Check_L, 0, angleToPulse(constrain(angle, Check_L_min, Check_L_max)));
+      break;
+    case 4:
+      pwm.setPWM(Check_R, 0, angleToPulse(constrain(angle, Check_R_min, Check_R_max)));
+      break;
+    case 5:
+      pwm.setPWM(Upper_Lip, 0, angleToPulse(constrain(angle, Upper_Lip_min, Upper_Lip_max)));
+      break;
+    case 6:
+      pwm.setPWM(Eye_Left_UD, 0, angleToPulse(constrain(angle, Eye_Left_UD_min, Eye_Left_UD_max)));
+      break;
+    case 7:
+      pwm.setPWM(Eyelid_Right_Lower, 0, angleToPulse(constrain(angle, Eyelid_Right_Lower_min, Eyelid_Right_Lower_max)));
+      break;
+    case 8:
+      pwm.setPWM(Eyebrow_R, 0, angleToPulse(constrain(angle, Eyebrow_R_min, Eyebrow_R_max)));
+      break;
+    case 9:
+      pwm.setPWM(Eyelid_Right_Upper, 0, angleToPulse(constrain(angle, Eyelid_Right_Upper_min, Eyelid_Right_Upper_max)));
+      break;
+    case 10:
+      pwm.setPWM(Forhead_R, 0, angleToPulse(constrain(angle, Forhead_R_min, Forhead_R_max)));
+      break;
+    case 11:
+      pwm.setPWM(Forhead_L, 0, angleToPulse(constrain(angle, Forhead_L_min, Forhead_L_max)));
+      break;
+    case 12:
+      pwm.setPWM(Eyebrow_L, 0, angleToPulse(constrain(angle, Eyebrow_L_min, Eyebrow_L_max)));
+      break;
+    case 13:
+      pwm.setPWM(Eyelid_Left_Down, 0, angleToPulse(constrain(angle, Eyelid_Left_Down_min, Eyelid_Left_Down_max)));
+      break;
+    case 14:
+      pwm.setPWM(Eyelid_Left_Up, 0, angleToPulse(constrain(angle, Eyelid_Left_Up_min, Eyelid_Left_Up_max)));
+      break;
+    case 15:
+      pwm.setPWM(Rothead, 0, angleToPulse(constrain(angle, Rothead_min, Rothead_max)));
+      break;
+
+    // Shoulder and body servos
+    case 16:
+      bicep.write(constrain(angle, bicep_min, bicep_max));
+      break;
+    case 17:
+      rotate.write(constrain(angle, rotate_min, rotate_max));
+      break;
+    case 18:
+      shoulder.write(constrain(angle, shoulder_min, shoulder_max));
+      break;
+    case 19:
+      omoplate.write(constrain(angle, omoplate_min, omoplate_max));
+      break;
+    case 20:
+      Neck.write(constrain(angle, Neck_min, Neck_max));
+      break;
+    case 21:
+      Jaw.write(constrain(angle, Jaw_min, Jaw_max));
+      break;
+    case 22:
+      RollNeck.write(constrain(angle, RollNeck_min, RollNeck_max));
+      break;
+    case 23:
+      wrist.write(constrain(angle, wrist_min, wrist_max));
+      break;
+    case 24:
+      ringfinger.write(constrain(angle, ringfinger_min, ringfinger_max));
+      break;
+    case 25:
+      midfinger.write(constrain(angle, midfinger_min, midfinger_max));
+      break;
+    case 26:
+      pinky.write(constrain(angle, pinky_min, pinky_max));
+      break;
+    case 27:
+      index.write(constrain(angle, index_min, index_max));
+      break;
+    case 28:
+      thumb.write(constrain(angle, thumb_min, thumb_max));
+      break;
+
+    default:
+      return false;
+  }
+  return true;
+}
+
+// One command per line, read without blocking:
+//   "idx angle"                      -> one servo,  answered "OK idx angle" (legacy)
+//   "S<seq> idx angle idx angle ..." -> many servos in one frame, answered "K <seq>"
+// The host keeps a few frames in flight and matches the acks by sequence number.
+const int LINE_SIZE = 256;
+char line[LINE_SIZE];
+int lineLength = 0;
+
+void handleLine(char *text) {
+  char *cursor = text;
+  if (*cursor == 'S') {
+    long seq = strtol(cursor + 1, &cursor, 10);
+    while (true) {
+      char *start = cursor;
+      long servoNum = strtol(cursor, &cursor, 10);
+      if (cursor == start) break;
+      start = cursor;
+      long angle = strtol(cursor, &cursor, 10);
+      if (cursor == start) break;
+      setServo(servoNum, angle);
+    }
+    Serial.print("K ");
+    Serial.println(seq);
+  } else {
+    int servoNum = strtol(cursor, &cursor, 10);
+    int angle = constrain(strtol(cursor, &cursor, 10), 0, 180);
+
+    if (!setServo(servoNum, angle)) {
+      Serial.println("Invalid servo number");
     }
 
     // Confirm back to Jetson
@@ -315,3 +341,18 @@ void loop() {
     Serial.println(angle);
   }
 }
+
+void loop() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      if (lineLength > 0) {
+        line[lineLength] = '\0';
+        handleLine(line);
+        lineLength = 0;
+      }
+    } else if (lineLength < LINE_SIZE - 1) {
+      line[lineLength++] = c;
+    }
+  }
+}
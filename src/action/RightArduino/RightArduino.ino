@@ -48,7 +48,7 @@ int thumb_min = 90;
 int thumb_max = 170;
 
 void setup() {
-  Serial.begin(9600); // Updated baud rate
+  Serial.begin(115200); // Pipelined frames need more than 9600 baud
 
   // Attach servos
   bicep.attach(8);
@@ -76,58 +76,98 @@ void setup() {
   thumb.write(170);
 }
 
-void loop() {
-  if (Serial.available()) {
-    int servoNum = Serial.parseInt(); // Get servo number
-    int angle = Serial.parseInt();    // Get angle
-
-    // Clear remaining input to avoid leftover characters (optional)
-    while (Serial.available()) Serial.read();
-
-    // Clamp the angle to [0,180]
-    angle = constrain(angle, 0, 180);
-
-    switch (servoNum) {
-      case 1:
-        bicep.write(constrain(angle, bicep_min, bicep_max));
-        break;
-      case 2:
-        rotate.write(constrain(angle, rotate_min, rotate_max));
-        break;
-      case 3:
-        shoulder.write(constrain(angle, shoulder_min, shoulder_max));
-        break;
-      case 4:
-        omoplate.write(constrain(angle, omoplate_min, omoplate_max));
-        break;
-      case 5:
-        wrist.write(constrain(angle, wrist_min, wrist_max));
-        break;
-      case 6:
-        ringfinger.write(constrain(angle, ringfinger_min, ringfinger_max));
-        break;
-      case 7:
-        midfinger.write(constrain(angle, midfinger_min, midfinger_max));
-        break;
-      case 8:
-        pinky.write(constrain(angle, pinky_min, pinky_max));
-        break;
-      case 9:
-        index.write(constrain(angle, index_min, index_max));
-        break;
-      case 10:
-        thumb.write(constrain(angle, thumb_min, thumb_max));
-        break;
-      default:
-        // Optional: send an error message
-        Serial.println("Invalid servo number");
-        break;
+// Sets one servo (angle clamped to [0, 180] and to the servo limits).
+// Returns false for an unknown servo number.
+bool setServo(int servoNum, int angle) {
+  angle = constrain(angle, 0, 180);
+
+  switch (servoNum) {
+    case 1:
+      bicep.write(constrain(angle, bicep_min, bicep_max));
+      break;
+    case 2:
+      rotate.write(constrain(angle, rotate_min, rotate_max));
+      break;
+    case 3:
+      shoulder.write(constrain(angle, shoulder_min, shoulder_max));
+      break;
+    case 4:
+      omoplate.write(constrain(angle, omoplate_min, omoplate_max));
+      break;
+    case 5:
+      wrist.write(constrain(angle, wrist_min, wrist_max));
+      break;
+    case 6:
+      ringfinger.write(constrain(angle, ringfinger_min, ringfinger_max));
+      break;
+    case 7:
+      midfinger.write(constrain(angle, midfinger_min, midfinger_max));
+      break;
+    case 8:
+      pinky.write(constrain(angle, pinky_min, pinky_max));
+      break;
+    case 9:
+      index.write(constrain(angle, index_min, index_max));
+      break;
+    case 10:
+      thumb.write(constrain(angle, thumb_min, thumb_max));
+      break;
+    default:
+      return false;
+  }
+  return true;
+}
+
+// One command per line, read without blocking:
+//   "idx angle"                      -> one servo,  answered "OK idx angle" (legacy)
+//   "S<seq> idx angle idx angle ..." -> many servos in one frame, answered "K <seq>"
+// The host keeps a few frames in flight and matches the acks by sequence number.
+const int LINE_SIZE = 256;
+char line[LINE_SIZE];
+int lineLength = 0;
+
+void handleLine(char *text) {
+  char *cursor = text;
+  if (*cursor == 'S') {
+    long seq = strtol(cursor + 1, &cursor, 10);
+    while (true) {
+      char *start = cursor;
+      long servoNum = strtol(cursor, &cursor, 10);
+      if (cursor == start) break;
+      start = cursor;
+      long angle = strtol(cursor, &cursor, 10);
+      if (cursor == start) break;
+      setServo(servoNum, angle);
+    }
+    Serial.print("K ");
+    Serial.println(seq);
+  } else {
+    int servoNum = strtol(cursor, &cursor, 10);
+    int angle = constrain(strtol(cursor, &cursor, 10), 0, 180);
+
+    if (!setServo(servoNum, angle)) {
+      Serial.println("Invalid servo number");
     }
 
-    // Optional: confirm the action (for Jetson to sync)
+    // Confirm back to Jetson
     Serial.print("OK ");
     Serial.print(servoNum);
     Serial.print(" ");
     Serial.println(angle);
   }
 }
+
+void loop() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      if (lineLength > 0) {
+        line[lineLength] = '\0';
+        handleLine(line);
+        lineLength = 0;
+      }
+    } else if (lineLength < LINE_SIZE - 1) {
+      line[lineLength++] = c;
+    }
+  }
+}
@@ -0,0 +1,152 @@
+import threading
+import select
+import random
+import time
+import tty
+import pty
+import os
+
+import pandas as pd
+
+
+class ArduinoEmulator:
+    """
+    Emulates one of Akira's Arduinos on a pseudo-terminal, so MotionController
+    can run without the robot: open `emulator.port` instead of /dev/ttyACM0.
+
+    Speaks the same protocol as LeftArduino.ino / RightArduino.ino:
+
+        "idx angle"                      -> "OK idx angle"
+        "S<seq> idx angle idx angle ..." -> "K <seq>"
+
+    The serial line is simulated at `baud_rate` (10 bits per byte, both ways),
+    and every line costs `processing_delay` plus a random `ack_jitter` before
+    it is answered. Servos are loaded from a servos_data_*.csv file (the row
+    number is the servo index) and clamped to their limits, like the sketches do.
+
+    Every applied position is kept in `history` as (time.monotonic(), index, angle).
+    """
+    def __init__(
+        self,
+        servos_file,
+        baud_rate=115200,
+        processing_delay=0.0005,
+        ack_jitter=0.002,
+        drop_rate=0.0,
+        name="arduino"
+        ):
+        self.name = name
+        self.baud_rate = baud_rate
+        self.processing_delay = processing_delay
+        self.ack_jitter = ack_jitter
+        self.drop_rate = drop_rate
+
+        servos = pd.read_csv(servos_file)
+        self.names = list(servos["name"])
+        self.limits = list(zip(servos["min_pos"], servos["max_pos"]))
+        self.positions = list(servos["rest_pos"])
+
+        self.history = []
+        self.lines = 0
+        self.frames = 0
+
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+        self.wire_free_at = 0.0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"emulator_{name}", daemon=True)
+        self.thread.start()
+
+    def _wire(self, n_bytes):
+        """Waits for `n_bytes` to go through the serial line (shared by both directions, like a half-busy UART)."""
+        now = time.monotonic()
+        self.wire_free_at = max(now, self.wire_free_at) + n_bytes * 10.0 / self.baud_rate
+        delay = self.wire_free_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def set_servo(self, index, angle):
+        if not 0 <= index < len(self.positions):
+            return False
+        min_pos, max_pos = self.limits[index]
+        angle = max(0, min(angle, 180))
+        self.positions[index] = max(min_pos, min(angle, max_pos))
+        self.history.append((time.monotonic(), index, self.positions[index]))
+        return True
+
+    def handle_line(self, line):
+        """Applies one line and returns the reply (or None to stay silent)."""
+        fields = line.split()
+        if not fields:
+            return None
+        self.lines += 1
+
+        if fields[0].startswith("S"):
+            self.frames += 1
+            values = [int(value) for value in fields[1:]]
+            for index, angle in zip(values[0::2], values[1::2]):
+                self.set_servo(index, angle)
+            return f"K {int(fields[0][1:])}"
+
+        index = int(fields[0])
+        angle = max(0, min(int(fields[1]) if len(fields) > 1 else 0, 180))
+        reply = f"OK {index} {angle}"
+        if not self.set_servo(index, angle):
+            reply = "Invalid servo number\r\nOK " + f"{index} {angle}"
+        return reply
+
+    def _run(self):
+        buffer = b""
+        while self.running:
+            try:
+                ready, _, _ = select.select([self.master], [], [], 0.1)
+                if not ready:
+                    continue
+                data = os.read(self.master, 1024)
+            except (OSError, ValueError):
+                break
+            buffer += data
+            while b"\n" in buffer:
+                raw, buffer = buffer.split(b"\n", 1)
+                self._wire(len(raw) + 1)
+
+                try:
+                    reply = self.handle_line(raw.decode(errors="replace").strip())
+                except ValueError:
+                    reply = None
+                if reply is None or random.random() < self.drop_rate:
+                    continue
+
+                time.sleep(self.processing_delay + random.uniform(0, self.ack_jitter))
+                out = (reply + "\r\n").encode()
+                self._wire(len(out))
+                os.write(self.master, out)
+
+    def position(self, servo_name):
+        return self.positions[self.names.index(servo_name)]
+
+    def close(self):
+        self.running = False
+        self.thread.join(timeout=1)
+        for fd in (self.slave, self.master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    import serial
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    emulator = ArduinoEmulator(os.path.join(current_dir, "servos_data_left.csv"), name="left")
+    print(f"Left Arduino emulated on {emulator.port}")
+
+    port = serial.Serial(emulator.port, 115200, timeout=1)
+    for command in ("20 70", "S1 20 60 15 100 21 90", "99 10"):
+        port.write((command + "\n").encode())
+        print(command, "->", port.readline().decode().strip())
+    port.close()
+    emulator.close()
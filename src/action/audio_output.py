@@ -0,0 +1,426 @@
+import collections
+import threading
+import logging
+import time
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+import sounddevice as sd
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+logger = logging.getLogger(__name__)
+
+
+def to_frames(y, sr, sample_rate, channels):
+    """
+    Converts a buffer (samples, or (samples, channels)) into the float32
+    (frames, channels) layout of the output stream, resampled to `sample_rate`.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    if y.ndim == 1:
+        y = y[:, None]
+    if y.shape[1] != channels:
+        y = y.mean(axis=1, keepdims=True)
+        if channels > 1:
+            y = np.repeat(y, channels, axis=1)
+
+    if sr != sample_rate and len(y) > 0:
+        if resample_poly is not None:
+            divisor = gcd(int(sr), int(sample_rate))
+            y = resample_poly(y, sample_rate // divisor, sr // divisor, axis=0)
+        else:
+            target_times = np.arange(int(len(y) * sample_rate / sr)) / sample_rate
+            times = np.arange(len(y)) / sr
+            y = np.stack([np.interp(target_times, times, y[:, c]) for c in range(y.shape[1])], axis=1)
+    return np.ascontiguousarray(y, dtype=np.float32)
+
+
+class Fader:
+    """Gain moving linearly towards a target, at most `rate` per second (sample-accurate ramps)."""
+    def __init__(self, value=1.0):
+        self.value = value
+        self.target = value
+        self.step = 1.0  # per frame
+
+    def set(self, target, seconds, sample_rate):
+        self.target = target
+        self.step = 1.0 if seconds <= 0 else abs(target - self.value) / (seconds * sample_rate) or 1.0
+
+    def ramp(self, frames):
+        """Gain of each of the next `frames` frames."""
+        if self.value == self.target:
+            return np.full(frames, self.value, dtype=np.float32)
+        change = self.target - self.value
+        change = max(-self.step * frames, min(change, self.step * frames))
+        gains = self.value + change * np.arange(1, frames + 1, dtype=np.float32) / frames
+        reached = np.abs(gains - self.value) >= abs(self.target - self.value)
+        gains[reached] = self.target
+        self.value = self.target if reached[-1] else float(gains[-1])
+        return gains
+
+
+class Clip:
+    """
+    A buffer queued on the voice channel. Its position is measured on the
+    output clock (the sample heard by the speaker right now), not guessed
+    from when it was queued.
+    """
+    def __init__(self, engine, frames, source_rate):
+        self.engine = engine
+        self.frames = frames
+        self.source_rate = source_rate
+        self.offset = 0          # frames already mixed
+        self.start_frame = None  # stream frame of the first sample
+        self.cancelled = False
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    @property
+    def duration(self):
+        return len(self.frames) / self.engine.sample_rate
+
+    @property
+    def end_frame(self):
+        return None if self.start_frame is None else self.start_frame + len(self.frames)
+
+    def position(self):
+        """Seconds of this clip already heard (0 until it starts)."""
+        if self.start_frame is None:
+            return 0.0
+        heard = (self.engine.playhead_frame() - self.start_frame) / self.engine.sample_rate
+        return max(0.0, min(heard, self.duration))
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def wait_until(self, t):
+        """
+        Blocks until the playhead is `t` seconds into the clip. Returns False
+        if the clip ended (or was cancelled) before reaching it.
+        """
+        while not self.started.is_set():
+            if self.finished.wait(0.01):
+                return False
+        while True:
+            remaining = t - self.position()
+            if remaining <= 0:
+                return True
+            # Sleep most of the way, then re-read the clock
+            if self.finished.wait(min(remaining, 0.02)):
+                return self.position() >= t and not self.cancelled
+
+
+class MusicTrack:
+    """
+    The track playing on the music channel, and where it is in it. Its audio
+    is a queue of blocks, fed ahead of the playhead (see AudioOutput.stream_music)
+    so that only a few seconds of a track are in memory at a time.
+    """
+    def __init__(self, start_frame=0, max_blocks=4):
+        self.blocks = collections.deque()  # (frames, channels) float32 arrays not fully played yet
+        self.block_offset = 0              # frames of blocks[0] already played
+        self.max_blocks = max_blocks
+        self.ended = False                 # no more blocks will be added
+        self.offset = start_frame          # frames played since the start of the track
+        self.fader = Fader(0.0)
+        self.finished = threading.Event()
+
+    def position(self, sample_rate):
+        return self.offset / sample_rate
+
+    def feed(self, frames):
+        """Adds a block, waiting while `max_blocks` are already buffered. Returns False once the track is finished."""
+        while len(self.blocks) >= self.max_blocks:
+            if self.finished.wait(0.05):
+                return False
+        self.blocks.append(frames)
+        return not self.finished.is_set()
+
+    def mix(self, out, gains):
+        """Adds the next len(out) frames (silence if the feeder is late) into out. Returns False at the end of the track."""
+        filled = 0
+        while filled < len(out) and self.blocks:
+            block = self.blocks[0]
+            n = min(len(out) - filled, len(block) - self.block_offset)
+            out[filled:filled + n] += block[self.block_offset:self.block_offset + n] * gains[filled:filled + n, None]
+            self.block_offset += n
+            filled += n
+            if self.block_offset >= len(block):
+                self.blocks.popleft()
+                self.block_offset = 0
+        self.offset += filled
+        return bool(self.blocks) or not self.ended
+
+
+class AudioOutput:
+    """
+    Single audio output of Akira: one callback-driven sounddevice stream that
+    plays NumPy buffers straight from memory.
+
+    - Voice: `enqueue(y, sr)` queues speech clips, which are played back to
+      back without gaps (the next clip starts on the sample after the previous
+      one ends), and returns a Clip whose position follows the real playhead.
+    - Music: one background track (`stream_music` from a file, `play_music`
+      from memory, `stop_music`) with fades, ducked to `duck_gain` while Akira is speaking.
+    - Clock: `playhead()` is the time of the sample being heard, from the
+      stream's DAC timestamps, so jaw movements can lock onto it.
+
+    The stream is opened on first use and keeps running (silence when idle).
+    """
+    def __init__(self, sample_rate=44100, channels=2, blocksize=512, device=None, latency="low", duck_gain=0.3, duck_time=0.15):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.device = device
+        self.latency = latency
+        self.duck_gain = duck_gain
+        self.duck_time = duck_time
+
+        self.lock = threading.Lock()
+        self.voice = collections.deque()  # Clips waiting or being mixed
+        self.playing = []                 # Clips fully mixed, not heard to the end yet
+        self.music = None
+        self.ducker = Fader(1.0)
+
+        self.stream = None
+        self.frames_written = 0
+        self.block_start = 0
+        self.block_dac = None  # time.monotonic() at which the sample `block_start` is heard
+
+        self.callbacks = 0
+        self.underflows = 0
+        self.max_callback = 0.0
+
+    def start(self):
+        with self.lock:
+            if self.stream is not None:
+                return
+            self.stream = sd.OutputStream(
+                samplerate=self.sample_rate,
+                channels=self.channels,
+                dtype="float32",
+                blocksize=self.blocksize,
+                device=self.device,
+                latency=self.latency,
+                callback=self._callback
+                )
+        self.stream.start()
+        logger.info(f"Audio output started: {self.sample_rate} Hz, {self.channels} channels, latency {self.stream.latency * 1000:.1f} ms")
+
+    def close(self):
+        with self.lock:
+            stream, self.stream = self.stream, None
+            clips = list(self.voice) + self.playing
+            self.voice.clear()
+            self.playing = []
+        if stream is not None:
+            stream.stop()
+            stream.close()
+        for clip in clips:
+            clip.cancelled = True
+            clip.finished.set()
+
+    # Clock
+
+    def playhead_frame(self):
+        """Stream frame being heard right now."""
+        with self.lock:
+            if self.block_dac is None:
+                return 0
+            frame = self.block_start + (time.monotonic() - self.block_dac) * self.sample_rate
+            return max(0.0, min(frame, self.frames_written))
+
+    def playhead(self):
+        """Seconds of audio heard since the stream started."""
+        return self.playhead_frame() / self.sample_rate
+
+    # Voice
+
+    def enqueue(self, y, sr):
+        """Queues a speech buffer after the ones already queued and returns its Clip."""
+        clip = Clip(self, to_frames(y, sr, self.sample_rate, self.channels), sr)
+        self.start()
+        with self.lock:
+            self.voice.append(clip)
+        return clip
+
+    def play(self, y, sr, wait=True):
+        clip = self.enqueue(y, sr)
+        if wait:
+            clip.wait()
+        return clip
+
+    def play_file(self, path, wait=True):
+        y, sr = sf.read(path, dtype="float32")
+        return self.play(y, sr, wait=wait)
+
+    def is_speaking(self):
+        with self.lock:
+            return bool(self.voice or self.playing)
+
+    def stop_speech(self):
+        """Drops every queued clip, including the one being played."""
+        with self.lock:
+            clips = list(self.voice) + self.playing
+            self.voice.clear()
+            self.playing = []
+        for clip in clips:
+            clip.cancelled = True
+            clip.finished.set()
+
+    # Music
+
+    def play_music(self, y, sr, start=0.0, fade_in=2.0):
+        """Plays a background track held in memory from `start` seconds, replacing the current one. Returns its MusicTrack."""
+        start_frame = int(start * sr)
+        track = MusicTrack(int(start * self.sample_rate))
+        track.blocks.append(to_frames(y[start_frame:], sr, self.sample_rate, self.channels))
+        track.ended = True
+        return self._play_track(track, fade_in)
+
+    def stream_music(self, path, start=0.0, fade_in=2.0, block_seconds=0.5):
+        """
+        Plays an audio file from `start` seconds, replacing the current track.
+        The file is read `block_seconds` at a time by a feeder thread, a few
+        blocks ahead of the playhead, instead of being decoded whole. Returns its MusicTrack.
+        """
+        sound_file = sf.SoundFile(path)
+        if start > 0:
+            sound_file.seek(min(int(start * sound_file.samplerate), sound_file.frames))
+        track = MusicTrack(int(start * self.sample_rate))
+        threading.Thread(target=self._feed_music, args=(track, sound_file, block_seconds), daemon=True).start()
+        return self._play_track(track, fade_in)
+
+    def _feed_music(self, track, sound_file, block_seconds):
+        try:
+            with sound_file:
+                blocksize = int(block_seconds * sound_file.samplerate)
+                while True:
+                    block = sound_file.read(blocksize, dtype="float32", always_2d=True)
+                    # Resampled block by block (when the file rate differs from the stream's)
+                    if len(block) == 0 or not track.feed(to_frames(block, sound_file.samplerate, self.sample_rate, self.channels)):
+                        break
+        except Exception as e:
+            logger.warning(f"Error reading {sound_file.name}: {e}")
+        finally:
+            track.ended = True
+
+    def _play_track(self, track, fade_in):
+        track.fader.set(1.0, fade_in, self.sample_rate)
+        self.start()
+        with self.lock:
+            previous, self.music = self.music, track
+        if previous is not None:
+            previous.finished.set()
+        return track
+
+    def stop_music(self, fade_out=2.0):
+        """Fades the background track out. Returns it (None if nothing was playing)."""
+        with self.lock:
+            track = self.music
+            if track is not None:
+                track.fader.set(0.0, fade_out, self.sample_rate)
+        return track
+
+    def music_position(self):
+        with self.lock:
+            return None if self.music is None else self.music.position(self.sample_rate)
+
+    # Stream callback (PortAudio thread: no allocation-heavy work, no blocking)
+
+    def _callback(self, outdata, frames, time_info, status):
+        started = time.perf_counter()
+        if status.output_underflow:
+            self.underflows += 1
+
+        now = time.monotonic()
+        if time_info.outputBufferDacTime and time_info.currentTime:
+            dac = now + (time_info.outputBufferDacTime - time_info.currentTime)
+        else:
+            dac = now + (self.stream.latency if self.stream is not None else 0.0)
+
+        outdata.fill(0)
+        finished = []
+        with self.lock:
+            self.block_start = self.frames_written
+            self.block_dac = dac
+            # Frame heard at the time of this callback
+            heard = self.block_start - (dac - now) * self.sample_rate
+
+            filled = 0
+            while self.voice and filled < frames:
+                clip = self.voice[0]
+                if clip.start_frame is None:
+                    clip.start_frame = self.block_start + filled
+                    clip.started.set()
+                n = min(frames - filled, len(clip.frames) - clip.offset)
+                outdata[filled:filled + n] += clip.frames[clip.offset:clip.offset + n]
+                clip.offset += n
+                filled += n
+                if clip.offset >= len(clip.frames):
+                    self.playing.append(self.voice.popleft())
+
+            still_playing = []
+            for clip in self.playing:
+                (finished if clip.end_frame <= heard else still_playing).append(clip)
+            self.playing = still_playing
+
+            music = self.music
+            if music is not None:
+                duck_target = self.duck_gain if (self.voice or self.playing) else 1.0
+                if duck_target != self.ducker.target:
+                    self.ducker.set(duck_target, self.duck_time, self.sample_rate)
+                gains = music.fader.ramp(frames) * self.ducker.ramp(frames)
+                playing = music.mix(outdata, gains)
+                if not playing or (music.fader.value == 0.0 and music.fader.target == 0.0):
+                    self.music = None
+                    finished.append(music)
+
+            self.frames_written += frames
+
+        for item in finished:
+            item.finished.set()
+
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+        self.callbacks += 1
+        self.max_callback = max(self.max_callback, time.perf_counter() - started)
+
+    def stats(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "latency": self.stream.latency if self.stream is not None else None,
+            "callbacks": self.callbacks,
+            "underflows": self.underflows,
+            "max_callback": self.max_callback,
+            "playhead": self.playhead()
+            }
+
+
+# Shared by speech, lip-sync and music: there is a single output stream
+audio_output = AudioOutput()
+
+
+if __name__ == "__main__":
+    sr = 24000
+    t = np.arange(int(0.5 * sr)) / sr
+    beeps = [0.3 * np.sin(2 * np.pi * f * t) for f in (440, 550, 660)]
+
+    music = 0.1 * np.sin(2 * np.pi * 220 * np.arange(8 * sr) / sr)
+    audio_output.play_music(music, sr, fade_in=1.0)
+    time.sleep(1.5)
+
+    # Three clips queued at once play back to back, the music ducked under them
+    clips = [audio_output.enqueue(beep, sr) for beep in beeps]
+    for clip in clips:
+        clip.started.wait()
+        print(f"Clip started at playhead {audio_output.playhead():.3f}s (frame {clip.start_frame})")
+    clips[-1].wait()
+    time.sleep(1.0)
+    audio_output.stop_music(fade_out=1.0).finished.wait()
+    print(audio_output.stats())
+    audio_output.close()
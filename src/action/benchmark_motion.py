@@ -0,0 +1,254 @@
+"""
+Hardware-free motion benchmark: replays servo command traces through
+MotionController into two emulated Arduinos (see arduino_emulator.py) and
+reports, per serial configuration:
+
+    latency     send_command -> angle applied on the servo (delivered commands)
+    staleness   send_command -> servo holding that target or a newer one (every command)
+    throughput  servo updates applied per second
+    delivered   share of the commands that reached a servo (the rest were superseded)
+    queue depth pending commands in MotionController, sampled every 10 ms
+
+Traces are CSV files (t,arduino,servo_name,angle), recorded on the robot with
+MotionController.start_command_log() / save_command_log(path), or built-in
+synthetic ones: blink, jaw, head_tracking, gestures and mixed (all of them at once).
+
+Usage (from src/):
+    python action/benchmark_motion.py --traces mixed jaw --duration 20
+    python action/benchmark_motion.py --trace-file session.csv --configs pipelined_115200
+"""
+import argparse
+import statistics
+import threading
+import bisect
+import logging
+import random
+import math
+import time
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from action.arduino_emulator import ArduinoEmulator
+from action.motion_controller import MotionController, logger as motion_logger
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CONFIGURATIONS = {
+    # One command per round trip at the old sketches' baud rate
+    "legacy_9600": dict(protocol="legacy", baud_rate=9600),
+    "legacy_115200": dict(protocol="legacy", baud_rate=115200),
+    "pipelined_115200": dict(protocol="pipelined", baud_rate=115200, window=2),
+    "pipelined_115200_w4": dict(protocol="pipelined", baud_rate=115200, window=4),
+}
+
+
+def blink_trace(duration):
+    events = []
+    eyelids = {
+        "Eyelid_Right_Upper": (80, 35), "Eyelid_Right_Lower": (90, 130),
+        "Eyelid_Left_Down": (90, 40), "Eyelid_Left_Up": (72, 165)
+        }
+    t = random.uniform(0.5, 2)
+    while t < duration:
+        for servo_name, (open_angle, closed_angle) in eyelids.items():
+            events.append((t, "left", servo_name, closed_angle))
+            events.append((t + 0.2, "left", servo_name, open_angle))
+        t += random.uniform(3, 7)
+    return events
+
+
+def jaw_trace(duration, frame_rate=43.0):
+    """Jaw and upper lip switching between closed/half/full on syllables, like move_jaw_and_play."""
+    states = {"closed": (80, 65), "half": (102, 82), "full": (125, 99)}
+    events = []
+    t, state = 0.0, "closed"
+    while t < duration:
+        state = random.choice([s for s in states if s != state])
+        jaw, upper = states[state]
+        events.append((t, "left", "Jaw", jaw))
+        events.append((t, "left", "Upper_Lip", upper))
+        # A state lasts at least one energy frame, usually half a syllable
+        t += max(1.0 / frame_rate, random.uniform(0.04, 0.125))
+    return events
+
+
+def head_tracking_trace(duration, rate=30.0):
+    """Rothead and Neck following a moving visitor, one command per degree of change."""
+    events = []
+    last = {}
+    for i in range(int(duration * rate)):
+        t = i / rate
+        targets = {
+            "Rothead": int(round(90 + 40 * math.sin(2 * math.pi * 0.15 * t))),
+            "Neck": int(round(70 + 10 * math.sin(2 * math.pi * 0.23 * t)))
+            }
+        for servo_name, angle in targets.items():
+            if last.get(servo_name) != angle:
+                events.append((t, "left", servo_name, angle))
+                last[servo_name] = angle
+    return events
+
+
+def gestures_trace(duration):
+    """Random arm gestures on both sides, 2 interpolation steps of 4 servos (akira_move_arms_randomly)."""
+    limits = {
+        "left": {"shoulder": (75, 180), "omoplate": (10, 70), "rotate": (40, 90), "bicep": (0, 63)},
+        "right": {"shoulder": (0, 110), "omoplate": (70, 125), "rotate": (40, 90), "bicep": (15, 45)}
+        }
+    events = []
+    t = random.uniform(0, 2)
+    while t < duration:
+        for arduino in random.choice([["left"], ["right"], ["left", "right"]]):
+            for step in range(2):
+                for servo_name, (min_pos, max_pos) in limits[arduino].items():
+                    events.append((t + 0.1 * step, arduino, servo_name, random.randint(min_pos + 5, max_pos - 5)))
+        t += random.uniform(2, 6)
+    return events
+
+
+TRACES = {
+    "blink": blink_trace,
+    "jaw": jaw_trace,
+    "head_tracking": head_tracking_trace,
+    "gestures": gestures_trace,
+    "mixed": lambda duration: blink_trace(duration) + jaw_trace(duration) + head_tracking_trace(duration) + gestures_trace(duration),
+}
+
+
+def load_trace(path):
+    df = pd.read_csv(path)
+    return list(df[["t", "arduino", "servo_name", "angle"]].itertuples(index=False, name=None))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else float("nan")
+
+
+def run(trace, config, settle=1.0, ack_jitter=0.002):
+    emulators = {
+        "left": ArduinoEmulator(os.path.join(CURRENT_DIR, "servos_data_left.csv"), baud_rate=config["baud_rate"], ack_jitter=ack_jitter, name="left"),
+        "right": ArduinoEmulator(os.path.join(CURRENT_DIR, "servos_data_right.csv"), baud_rate=config["baud_rate"], ack_jitter=ack_jitter, name="right")
+        }
+    mc = MotionController(left_port=emulators["left"].port, right_port=emulators["right"].port, **config)
+
+    requests = []  # (t, arduino, servo_index, angle)
+    depths = []
+    replaying = True
+
+    def sample_depth():
+        while replaying:
+            depths.append(mc.left_command_queue.qsize() + mc.right_command_queue.qsize())
+            time.sleep(0.01)
+
+    sampler = threading.Thread(target=sample_depth, daemon=True)
+    sampler.start()
+
+    trace = sorted(trace)
+    start = time.monotonic()
+    for t, arduino, servo_name, angle in trace:
+        delay = start + t - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        servo_index, _, min_pos, max_pos, _ = mc.get_servo_positions(servo_name, arduino)
+        angle = int(max(min_pos, min(angle, max_pos)))
+        requests.append((time.monotonic(), arduino, servo_index, angle))
+        mc.send_command(servo_index, angle, arduino, servo_name)
+        mc.set_current_pos_servo(servo_name, arduino, angle)
+    end = time.monotonic()
+
+    time.sleep(settle)
+    replaying = False
+    sampler.join()
+    queue_stats = mc.command_queue_stats()
+    mc.close_connection(rest=False)
+    for emulator in emulators.values():
+        emulator.close()
+
+    return analyze(requests, emulators, end - start, depths, queue_stats)
+
+
+def analyze(requests, emulators, duration, depths, queue_stats):
+    # Match every applied angle with the latest request of that angle for that servo
+    events = [(t, 0, arduino, index, angle) for t, arduino, index, angle in requests]
+    for arduino, emulator in emulators.items():
+        events += [(t, 1, arduino, index, angle) for t, index, angle in emulator.history]
+    events.sort()
+
+    last_request = {}
+    applies = {}  # (arduino, index) -> [(source request time, apply time)]
+    latencies = []
+    for t, kind, arduino, index, angle in events:
+        key = (arduino, index)
+        if kind == 0:
+            last_request.setdefault(key, {})[angle] = t
+        else:
+            source = last_request.get(key, {}).get(angle)
+            if source is not None:
+                latencies.append(t - source)
+                applies.setdefault(key, []).append((source, t))
+
+    # Staleness: first time the servo holds a target requested at or after this one
+    staleness = []
+    for t, arduino, index, angle in requests:
+        servo_applies = applies.get((arduino, index), [])
+        i = bisect.bisect_left(servo_applies, (t,))
+        if i < len(servo_applies):
+            staleness.append(servo_applies[i][1] - t)
+
+    delivered = sum(len(v) for v in applies.values())
+    return {
+        "commands": len(requests),
+        "delivered": delivered / len(requests) if requests else 0.0,
+        "throughput": delivered / duration if duration else 0.0,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "staleness_p50": percentile(staleness, 0.5),
+        "staleness_p95": percentile(staleness, 0.95),
+        "staleness_max": max(staleness) if staleness else float("nan"),
+        "depth_mean": statistics.mean(depths) if depths else 0.0,
+        "depth_max": max(depths) if depths else 0,
+        "lines": {arduino: emulator.lines for arduino, emulator in emulators.items()},
+        "queues": queue_stats
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traces", nargs="+", default=["mixed"], choices=list(TRACES))
+    parser.add_argument("--trace-file", action="append", default=[], help="Recorded trace CSV (can be repeated)")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    parser.add_argument("--duration", type=float, default=20.0, help="Length of the synthetic traces (s)")
+    parser.add_argument("--ack-jitter", type=float, default=0.002)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    motion_logger.setLevel(logging.WARNING)
+
+    traces = {}
+    for name in args.traces if not args.trace_file else []:
+        random.seed(args.seed)
+        traces[name] = TRACES[name](args.duration)
+    for path in args.trace_file:
+        traces[os.path.basename(path)] = load_trace(path)
+
+    results = []
+    for trace_name, trace in traces.items():
+        for config_name in args.configs:
+            print(f"{trace_name} / {config_name}: replaying {len(trace)} commands...")
+            results.append((trace_name, config_name, run(trace, CONFIGURATIONS[config_name], ack_jitter=args.ack_jitter)))
+
+    print(f"\n{'trace':14s} {'configuration':20s} {'cmds':>6s} {'deliv.':>7s} {'upd/s':>7s} "
+          f"{'lat p50':>8s} {'lat p95':>8s} {'stale p50':>10s} {'stale p95':>10s} {'stale max':>10s} {'depth':>6s} {'max':>4s}")
+    for trace_name, config_name, r in results:
+        print(f"{trace_name:14s} {config_name:20s} {r['commands']:6d} {r['delivered'] * 100:6.1f}% {r['throughput']:7.1f} "
+              f"{r['latency_p50'] * 1000:6.1f}ms {r['latency_p95'] * 1000:6.1f}ms "
+              f"{r['staleness_p50'] * 1000:8.1f}ms {r['staleness_p95'] * 1000:8.1f}ms {r['staleness_max'] * 1000:8.1f}ms "
+              f"{r['depth_mean']:6.2f} {r['depth_max']:4d}")
+
+
+if __name__ == "__main__":
+    main()
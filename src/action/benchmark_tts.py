@@ -0,0 +1,116 @@
+"""
+F5-TTS benchmark: wall time of a multi-chunk reply synthesized with the
+sequential path (one CFM.sample ODE solve and one vocoder call per chunk,
+batch_size=1) against the batched path (every chunk padded into one solve and
+one vocoder call, batch_size=None), and optionally intermediate batch sizes.
+
+The reply is split with chunk_text at --max-chars, so the number of chunks
+can be chosen independently of the reference voice. Every configuration runs
+the same chunks with the same seed, after a warm-up run.
+
+Usage (from src/):
+    python action/benchmark_tts.py --chunks 2 4 --repeats 3
+    python action/benchmark_tts.py --batch-sizes 1 2 0 --max-chars 80
+"""
+import argparse
+import statistics
+import time
+import os
+import sys
+
+import tqdm
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "f5_tts_"))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from f5_tts_.api import F5TTS
+except ModuleNotFoundError as e:
+    from action.f5_tts_.api import F5TTS
+from infer.utils_infer import chunk_text, infer_batch_process, target_sample_rate
+from model.utils import seed_everything
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REF_TEXT = "This is a test of my voice that I will use for cloning it and specially for the speech of Akira. Akira will have my voice and I hope it can mimic it very well. Thank you!"
+
+SENTENCES = [
+    "Hello there, it is really nice to see you again today.",
+    "I have been thinking about the books on the shelf behind you.",
+    "Some of them look old, with beautiful covers and golden letters.",
+    "Would you like me to tell you a short story about one of them?",
+    "It is about a robot who learned to read by listening to people.",
+    "Every evening it would sit by the window and repeat new words.",
+    "One day it read a whole page out loud without a single mistake.",
+    "Everybody in the house came to listen, and the robot was very proud.",
+]
+
+
+def synchronize(device):
+    if "cuda" in str(device):
+        import torch
+        torch.cuda.synchronize()
+
+
+def synthesize(f5tts, chunks, batch_size, seed):
+    seed_everything(seed)
+    synchronize(f5tts.device)
+    start = time.perf_counter()
+    wav, sr, _ = infer_batch_process(
+        f5tts.voice,
+        f5tts.ref_text,
+        chunks,
+        f5tts.ema_model,
+        f5tts.vocoder,
+        mel_spec_type=f5tts.mel_spec_type,
+        progress=tqdm,
+        device=f5tts.device,
+        batch_size=batch_size,
+    )
+    synchronize(f5tts.device)
+    return time.perf_counter() - start, len(wav) / sr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[2, 4], help="Chunks per reply")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 0], help="0 = every chunk in one batch")
+    parser.add_argument("--max-chars", type=int, default=70, help="chunk_text limit, one sentence per chunk by default")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ref-audio", default=os.path.join(CURRENT_DIR, "ref_audio.wav"))
+    args = parser.parse_args()
+
+    f5tts = F5TTS(
+        ref_file=args.ref_audio,
+        ref_text=REF_TEXT,
+        voice_cache=os.path.splitext(args.ref_audio)[0] + ".voice.pt"
+    )
+
+    results = []
+    for n_chunks in args.chunks:
+        text = " ".join(SENTENCES[i % len(SENTENCES)] for i in range(n_chunks))
+        chunks = chunk_text(text, max_chars=args.max_chars)
+        # Warm-up (CUDA kernels, allocator) with the same shapes
+        synthesize(f5tts, chunks, None, args.seed)
+
+        for batch_size in args.batch_sizes:
+            times = []
+            for _ in range(args.repeats):
+                elapsed, audio_seconds = synthesize(f5tts, chunks, batch_size or None, args.seed)
+                times.append(elapsed)
+            results.append((len(chunks), batch_size, statistics.median(times), min(times), audio_seconds))
+
+    print(f"\n{'chunks':>6s} {'batch':>6s} {'median':>8s} {'best':>8s} {'audio':>7s} {'RTF':>6s} {'speedup':>8s}")
+    sequential = {}
+    for n_chunks, batch_size, median, best, audio_seconds in results:
+        if batch_size == 1:
+            sequential[n_chunks] = median
+        speedup = sequential[n_chunks] / median if n_chunks in sequential else float("nan")
+        print(f"{n_chunks:6d} {batch_size or 'all':>6} {median:7.2f}s {best:7.2f}s {audio_seconds:6.2f}s "
+              f"{median / audio_seconds:6.2f} {speedup:7.2f}x")
+    print(f"\n(sample rate {target_sample_rate} Hz, device {f5tts.device})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import collections
+import threading
+import queue
+import time
+
+
+class LatestCommandSlots:
+    """
+    Servo command queue where the latest value wins: there is one pending slot
+    per servo, and a new angle for a servo that is still waiting replaces the
+    old one (which is counted as dropped) instead of queuing behind it. The
+    serial worker therefore always sends the newest target of every servo, and
+    the queue can never hold more commands than there are servos.
+
+    Servos are served in the order they started waiting, so a servo updated
+    continuously (face tracking, jaw) cannot starve the others.
+
+    Same interface as the queue.Queue it replaces: put(command) with
+    command = (servo_index, angle, servo_name), or None to close the queue
+    once the pending commands are sent; get(timeout) raises queue.Empty.
+    """
+    def __init__(self):
+        self.slots = collections.OrderedDict()  # servo_index -> (angle, servo_name, enqueue time)
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.put_count = 0
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_staleness = 0.0
+
+    def put(self, command, replace=True):
+        """
+        Queues command = (servo_index, angle, servo_name), or closes the queue with None.
+        With replace=False, a servo that already has a pending command keeps it
+        (used to resend a lost command without overwriting a newer target).
+        """
+        with self.condition:
+            if command is None:
+                self.closed = True
+            else:
+                self._put(command, replace)
+            self.condition.notify()
+
+    def put_many(self, commands):
+        """Queues several commands atomically, so a batch reader gets them together."""
+        with self.condition:
+            for command in commands:
+                self._put(command, True)
+            self.condition.notify()
+
+    def _put(self, command, replace):
+        servo_index, angle, servo_name = command
+        self.put_count += 1
+        if servo_index in self.slots and not replace:
+            return
+        if servo_index in self.slots:
+            # Superseded before it was sent: keep the servo's place in line, send the new angle
+            _, _, enqueued = self.slots[servo_index]
+            self.slots[servo_index] = (angle, servo_name, enqueued)
+            self.dropped += 1
+        else:
+            self.slots[servo_index] = (angle, servo_name, time.monotonic())
+            self.max_depth = max(self.max_depth, len(self.slots))
+
+    def get(self, timeout=None):
+        """Next (servo_index, angle, servo_name), or None once the queue is closed and empty."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.slots or self.closed, timeout):
+                raise queue.Empty
+            if not self.slots:
+                return None
+            servo_index, (angle, servo_name, enqueued) = self.slots.popitem(last=False)
+            self.sent += 1
+            self.last_staleness = time.monotonic() - enqueued
+            return servo_index, angle, servo_name
+
+    def get_batch(self, timeout=None):
+        """
+        Every pending command at once, as a list of (servo_index, angle, servo_name)
+        in the order the servos started waiting, or None once the queue is closed and empty.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.slots or self.closed, timeout):
+                raise queue.Empty
+            if not self.slots:
+                return None
+            now = time.monotonic()
+            batch = [(servo_index, angle, servo_name) for servo_index, (angle, servo_name, _) in self.slots.items()]
+            self.last_staleness = max(now - enqueued for _, _, enqueued in self.slots.values())
+            self.sent += len(batch)
+            self.slots.clear()
+            return batch
+
+    def qsize(self):
+        with self.condition:
+            return len(self.slots)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "depth": len(self.slots),
+                "max_depth": self.max_depth,
+                "received": self.put_count,
+                "sent": self.sent,
+                "dropped": self.dropped,
+                "last_staleness": self.last_staleness
+                }
@@ -1,5 +1,6 @@
 import random
 import sys
+import os
 from importlib.resources import files
 
 import soundfile as sf
@@ -11,16 +12,23 @@ from infer.utils_infer import (
     infer_process,
     load_model,
     load_vocoder,
-    preprocess_ref_audio_text,
     remove_silence_for_generated_wav,
     save_spectrogram,
     transcribe,
     target_sample_rate,
+    VoiceProfile,
 )
 from model import DiT, UNetT
 from model.utils import seed_everything
 
 
+def file_identity(path):
+    """`path` and its modification time, so that replacing the file changes it."""
+    if not path:
+        return ""
+    return f"{path}@{os.path.getmtime(path)}" if os.path.exists(path) else str(path)
+
+
 class F5TTS:
     def __init__(
         self,
@@ -35,6 +43,7 @@ class F5TTS:
         local_path=None,
         device=None,
         hf_cache_dir=None,
+        voice_cache=None,
     ):
         # Initialize parameters
         self.final_wave = None
@@ -64,7 +73,21 @@ class F5TTS:
         self.load_ema_model(
             model_type, ckpt_file, vocoder_name, vocab_file, ode_method, use_ema, hf_cache_dir=hf_cache_dir
         )
-        self.ref_file, self.ref_text = preprocess_ref_audio_text(ref_file, ref_text, device=self.device)
+        # Reference waveform, mel and text tokens computed once (and kept in `voice_cache` if given,
+        # for this checkpoint and vocoder only)
+        model_id = "|".join(
+            [model_type, file_identity(self.ckpt_file), file_identity(vocab_file), vocoder_name, file_identity(local_path)]
+        )
+        self.voice = VoiceProfile.from_reference(
+            ref_file,
+            ref_text,
+            self.ema_model,
+            cache_path=voice_cache,
+            mel_spec_type=vocoder_name,
+            device=self.device,
+            model_id=model_id,
+        )
+        self.ref_file, self.ref_text = ref_file, self.voice.ref_text
 
     def load_vocoder_model(self, vocoder_name, local_path=None, hf_cache_dir=None):
         self.vocoder = load_vocoder(vocoder_name, local_path is not None, local_path, self.device, hf_cache_dir)
@@ -92,6 +115,7 @@ class F5TTS:
         else:
             raise ValueError(f"Unknown model type: {model_type}")
 
+        self.ckpt_file = ckpt_file
         self.ema_model = load_model(
             model_cls, model_cfg, ckpt_file, mel_spec_type, vocab_file, ode_method, use_ema, self.device
         )
@@ -124,17 +148,16 @@ class F5TTS:
         file_wave=None,
         file_spect=None,
         seed=-1,
+        batch_size=None,
     ):
         if seed == -1:
             seed = random.randint(0, sys.maxsize)
         seed_everything(seed)
         self.seed = seed
 
-        # This was moved to the init of the class so it does not have to be run every time:
-        #ref_file, ref_text = preprocess_ref_audio_text(ref_file, ref_text, device=self.device)
-
+        # The reference voice was preprocessed once in __init__ (see VoiceProfile)
         wav, sr, spect = infer_process(
-            self.ref_file,
+            self.voice,
             self.ref_text,
             gen_text,
             self.ema_model,
@@ -150,6 +173,7 @@ class F5TTS:
             speed=speed,
             fix_duration=fix_duration,
             device=self.device,
+            batch_size=batch_size,
         )
 
         if file_wave is not None:
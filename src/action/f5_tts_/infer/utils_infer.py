@@ -20,6 +20,7 @@ import numpy as np
 import torch
 import torchaudio
 import tqdm
+from torch.nn.utils.rnn import pad_sequence
 from huggingface_hub import snapshot_download, hf_hub_download
 from pydub import AudioSegment, silence
 from transformers import pipeline
@@ -29,6 +30,7 @@ from model import CFM
 from model.utils import (
     get_tokenizer,
     convert_char_to_pinyin,
+    list_str_to_idx,
 )
 
 _ref_audio_cache = {}
@@ -359,6 +361,174 @@ def preprocess_ref_audio_text(ref_audio_orig, ref_text, clip_short=True, show_in
     return ref_audio, ref_text
 
 
+# voice profile: reference conditioning computed once per voice
+
+
+class VoiceProfile:
+    """
+    Everything infer_batch_process needs from the reference voice, computed once:
+    the mono, RMS-normalized reference waveform resampled to target_sample_rate,
+    its mel spectrogram (the `cond` of CFM.sample) and the tokenized reference
+    text. Reused by every inference, and persistable with save() / load() so
+    even the preprocessing (silence clipping, transcription) runs once per voice.
+    A saved profile is only reused for the same reference file (content and
+    modification time) and the same model and vocoder (`model_id`).
+    """
+
+    version = 2
+
+    def __init__(
+        self,
+        ref_text,
+        audio,
+        rms,
+        mel,
+        ref_chars,
+        ref_ids=None,
+        target_rms=target_rms,
+        source_hash=None,
+        model_id=None,
+        ref_mtime=None,
+    ):
+        self.ref_text = ref_text  # as returned by preprocess_ref_audio_text
+        self.audio = audio  # [1, samples] at target_sample_rate, normalized to target_rms if quieter
+        self.rms = rms  # of the original reference, to give the generated speech the same loudness
+        self.mel = mel  # [1, frames, n_mel_channels]
+        self.ref_chars = ref_chars  # convert_char_to_pinyin of the prompt text, None if it cannot be reused
+        self.ref_ids = ref_ids  # ref_chars through the model vocabulary
+        self.target_rms = target_rms
+        self.source_hash = source_hash
+        self.model_id = model_id  # checkpoint and vocoder the mel and tokens were computed for
+        self.ref_mtime = ref_mtime
+
+        # infer_batch_process adds a space after a prompt ending in a single-byte character
+        self.prompt_text = ref_text + " " if len(ref_text[-1].encode("utf-8")) == 1 else ref_text
+
+    @property
+    def duration(self):
+        return self.audio.shape[-1] / target_sample_rate
+
+    @property
+    def ref_audio_len(self):
+        return self.audio.shape[-1] // hop_length
+
+    @classmethod
+    def from_audio(cls, audio, sr, ref_text, model_obj, target_rms=target_rms, device=device, source_hash=None):
+        if audio.shape[0] > 1:
+            audio = torch.mean(audio, dim=0, keepdim=True)
+
+        rms = torch.sqrt(torch.mean(torch.square(audio))).item()
+        if rms < target_rms:
+            audio = audio * target_rms / rms
+        if sr != target_sample_rate:
+            resampler = torchaudio.transforms.Resample(sr, target_sample_rate)
+            audio = resampler(audio)
+        audio = audio.to(device)
+
+        with torch.inference_mode():
+            mel = model_obj.mel_spec(audio).permute(0, 2, 1)
+
+        profile = cls(ref_text, audio, rms, mel, None, target_rms=target_rms, source_hash=source_hash)
+        # jieba segments text at whitespace, so a prompt ending with one tokenizes
+        # the same alone as at the start of "prompt + gen_text"
+        if profile.prompt_text[-1].isspace():
+            profile.ref_chars = convert_char_to_pinyin([profile.prompt_text])[0]
+            if model_obj.vocab_char_map is not None:
+                profile.ref_ids = list_str_to_idx([profile.ref_chars], model_obj.vocab_char_map)[0].to(device)
+        return profile
+
+    @classmethod
+    def from_reference(
+        cls,
+        ref_file,
+        ref_text,
+        model_obj,
+        cache_path=None,
+        mel_spec_type=mel_spec_type,
+        target_rms=target_rms,
+        show_info=print,
+        device=device,
+        model_id="",
+    ):
+        """
+        Profile of the voice in `ref_file`, loaded from `cache_path` if it was
+        saved there for the same audio, text, model mel settings and `model_id`
+        (e.g. checkpoint and vocoder, see F5TTS).
+        """
+        with open(ref_file, "rb") as f:
+            key = hashlib.md5(f.read())
+        key.update(f"{ref_text}|{target_rms}|{mel_spec_type}|{hop_length}|{n_mel_channels}|{cls.version}".encode("utf-8"))
+        source_hash = key.hexdigest()
+        ref_mtime = os.path.getmtime(ref_file)
+
+        if cache_path is not None and os.path.exists(cache_path):
+            profile = cls.load(cache_path, model_obj, device=device)
+            if profile is None:
+                show_info("Voice profile saved by another version, rebuilding it...")
+            elif profile.model_id != model_id:
+                show_info("Model or vocoder changed, rebuilding the voice profile...")
+            elif profile.source_hash != source_hash or profile.ref_mtime != ref_mtime:
+                show_info("Reference voice changed, rebuilding its profile...")
+            else:
+                show_info(f"Using cached voice profile {cache_path}")
+                return profile
+
+        ref_audio, ref_text = preprocess_ref_audio_text(ref_file, ref_text, show_info=show_info, device=device)
+        audio, sr = torchaudio.load(ref_audio)
+        profile = cls.from_audio(audio, sr, ref_text, model_obj, target_rms=target_rms, device=device, source_hash=source_hash)
+        profile.model_id, profile.ref_mtime = model_id, ref_mtime
+        if cache_path is not None:
+            profile.save(cache_path)
+        return profile
+
+    def save(self, path):
+        torch.save(
+            {
+                "version": self.version,
+                "ref_text": self.ref_text,
+                "audio": self.audio.cpu(),
+                "rms": self.rms,
+                "mel": self.mel.cpu(),
+                "ref_chars": self.ref_chars,
+                "target_rms": self.target_rms,
+                "source_hash": self.source_hash,
+                "model_id": self.model_id,
+                "ref_mtime": self.ref_mtime,
+            },
+            path,
+        )
+
+    @classmethod
+    def load(cls, path, model_obj, device=device):
+        """The profile saved in `path`, or None if it was saved by another version."""
+        state = torch.load(path, map_location=device, weights_only=True)
+        if state.get("version") != cls.version:
+            return None
+        profile = cls(
+            state["ref_text"],
+            state["audio"],
+            state["rms"],
+            state["mel"],
+            state["ref_chars"],
+            target_rms=state["target_rms"],
+            source_hash=state["source_hash"],
+            model_id=state["model_id"],
+            ref_mtime=state["ref_mtime"],
+        )
+        if profile.ref_chars is not None and model_obj.vocab_char_map is not None:
+            profile.ref_ids = list_str_to_idx([profile.ref_chars], model_obj.vocab_char_map)[0].to(device)
+        return profile
+
+    def text(self, gen_text, vocab_char_map=None):
+        """Text input of CFM.sample for `gen_text`: token ids when the prompt ones are cached, chars otherwise."""
+        if self.ref_ids is not None and vocab_char_map is not None:
+            gen_ids = list_str_to_idx(convert_char_to_pinyin([gen_text]), vocab_char_map)[0].to(self.ref_ids.device)
+            return torch.cat([self.ref_ids, gen_ids])[None]
+        if self.ref_chars is not None:
+            return [self.ref_chars + convert_char_to_pinyin([gen_text])[0]]
+        return convert_char_to_pinyin([self.prompt_text + gen_text])
+
+
 # infer process: chunk text -> infer batches [i.e. infer_batch_process()]
 
 
@@ -379,10 +549,17 @@ def infer_process(
     speed=speed,
     fix_duration=fix_duration,
     device=device,
+    batch_size=None,
 ):
     # Split the input text into batches
-    audio, sr = torchaudio.load(ref_audio)
-    max_chars = int(len(ref_text.encode("utf-8")) / (audio.shape[-1] / sr) * (25 - audio.shape[-1] / sr))
+    if isinstance(ref_audio, VoiceProfile):
+        # Nothing to load: ref_text and the reference duration come from the profile
+        ref_text = ref_audio.ref_text
+        max_chars = int(len(ref_text.encode("utf-8")) / ref_audio.duration * (25 - ref_audio.duration))
+    else:
+        audio, sr = torchaudio.load(ref_audio)
+        max_chars = int(len(ref_text.encode("utf-8")) / (audio.shape[-1] / sr) * (25 - audio.shape[-1] / sr))
+        ref_audio = (audio, sr)
     gen_text_batches = chunk_text(gen_text, max_chars=max_chars)
     for i, gen_text in enumerate(gen_text_batches):
         print(f"gen_text {i}", gen_text)
@@ -390,7 +567,7 @@ def infer_process(
 
     show_info(f"Generating audio in {len(gen_text_batches)} batches...")
     return infer_batch_process(
-        (audio, sr),
+        ref_audio,
         ref_text,
         gen_text_batches,
         model_obj,
@@ -405,6 +582,7 @@ def infer_process(
         speed=speed,
         fix_duration=fix_duration,
         device=device,
+        batch_size=batch_size,
     )
 
 
@@ -427,64 +605,44 @@ def infer_batch_process(
     speed=1,
     fix_duration=None,
     device=None,
+    batch_size=None,
 ):
-    audio, sr = ref_audio
-    if audio.shape[0] > 1:
-        audio = torch.mean(audio, dim=0, keepdim=True)
-
-    rms = torch.sqrt(torch.mean(torch.square(audio)))
-    if rms < target_rms:
-        audio = audio * target_rms / rms
-    if sr != target_sample_rate:
-        resampler = torchaudio.transforms.Resample(sr, target_sample_rate)
-        audio = resampler(audio)
-    audio = audio.to(device)
+    """
+    batch_size: Chunks solved together in one CFM.sample call (padded, with
+        per-chunk durations) and vocoded in one call. None puts every chunk of
+        the text in a single batch, 1 solves them one after the other.
+    """
+    # ref_audio: a VoiceProfile, or (audio, sr) to build a one-off profile from
+    if isinstance(ref_audio, VoiceProfile):
+        profile = ref_audio
+        if target_rms != profile.target_rms:
+            print(f"Voice profile normalized to target_rms={profile.target_rms}, ignoring {target_rms}")
+    else:
+        audio, sr = ref_audio
+        profile = VoiceProfile.from_audio(audio, sr, ref_text, model_obj, target_rms=target_rms, device=device)
 
     generated_waves = []
     spectrograms = []
 
-    if len(ref_text[-1].encode("utf-8")) == 1:
-        ref_text = ref_text + " "
-    for i, gen_text in enumerate(progress.tqdm(gen_text_batches)):
-        # Prepare the text
-        text_list = [ref_text + gen_text]
-        final_text_list = convert_char_to_pinyin(text_list)
-
-        ref_audio_len = audio.shape[-1] // hop_length
-        if fix_duration is not None:
-            duration = int(fix_duration * target_sample_rate / hop_length)
-        else:
-            # Calculate duration
-            ref_text_len = len(ref_text.encode("utf-8"))
-            gen_text_len = len(gen_text.encode("utf-8"))
-            duration = ref_audio_len + int(ref_audio_len / ref_text_len * gen_text_len / speed)
-
-        # inference
+    if batch_size is None or batch_size < 1:
+        batch_size = max(1, len(gen_text_batches))
+    groups = [gen_text_batches[i : i + batch_size] for i in range(0, len(gen_text_batches), batch_size)]
+    for group in progress.tqdm(groups):
         with torch.inference_mode():
-            generated, _ = model_obj.sample(
-                cond=audio,
-                text=final_text_list,
-                duration=duration,
-                steps=nfe_step,
+            for generated_wave, generated_mel_spec in sample_chunks(
+                profile,
+                group,
+                model_obj,
+                vocoder,
+                mel_spec_type=mel_spec_type,
+                nfe_step=nfe_step,
                 cfg_strength=cfg_strength,
                 sway_sampling_coef=sway_sampling_coef,
-            )
-
-            generated = generated.to(torch.float32)
-            generated = generated[:, ref_audio_len:, :]
-            generated_mel_spec = generated.permute(0, 2, 1)
-            if mel_spec_type == "vocos":
-                generated_wave = vocoder.decode(generated_mel_spec)
-            elif mel_spec_type == "bigvgan":
-                generated_wave = vocoder(generated_mel_spec)
-            if rms < target_rms:
-                generated_wave = generated_wave * rms / target_rms
-
-            # wav -> numpy
-            generated_wave = generated_wave.squeeze().cpu().numpy()
-
-            generated_waves.append(generated_wave)
-            spectrograms.append(generated_mel_spec[0].cpu().numpy())
+                speed=speed,
+                fix_duration=fix_duration,
+            ):
+                generated_waves.append(generated_wave)
+                spectrograms.append(generated_mel_spec)
 
     # Combine all generated waves with cross-fading
     if cross_fade_duration <= 0:
@@ -529,6 +687,91 @@ def infer_batch_process(
     return final_wave, target_sample_rate, combined_spectrogram
 
 
+# sample several chunks in one batch
+
+
+def sample_chunks(
+    profile,
+    gen_texts,
+    model_obj,
+    vocoder,
+    mel_spec_type="vocos",
+    nfe_step=32,
+    cfg_strength=2.0,
+    sway_sampling_coef=-1,
+    speed=1,
+    fix_duration=None,
+    max_duration=4096,
+):
+    """
+    Generates every text of `gen_texts` in the voice of `profile` with a single
+    ODE solve: the chunks share the reference mel as prompt and are padded to
+    the longest one, CFM.sample masking each item past its own duration. The
+    mels are then vocoded in one call. Returns [(wave, mel)] in input order.
+    """
+    ref_audio_len = profile.ref_audio_len
+    ref_text_len = len(profile.prompt_text.encode("utf-8"))
+    cond_len = profile.mel.shape[1]
+
+    texts = [profile.text(gen_text, model_obj.vocab_char_map) for gen_text in gen_texts]
+    durations = []
+    for gen_text, text in zip(gen_texts, texts):
+        if fix_duration is not None:
+            duration = int(fix_duration * target_sample_rate / hop_length)
+        else:
+            # Calculate duration
+            gen_text_len = len(gen_text.encode("utf-8"))
+            duration = ref_audio_len + int(ref_audio_len / ref_text_len * gen_text_len / speed)
+        # Same bounds as CFM.sample, to know where every item ends in the padded batch
+        text_len = text.shape[-1] if torch.is_tensor(text) else len(text[0])
+        durations.append(min(max(duration, text_len + 1, cond_len + 1), max_duration))
+
+    if len(gen_texts) == 1:
+        text, duration = texts[0], durations[0]
+    else:
+        if torch.is_tensor(texts[0]):
+            text = pad_sequence([t[0] for t in texts], padding_value=-1, batch_first=True)
+        else:
+            text = [t[0] for t in texts]
+        duration = torch.tensor(durations, dtype=torch.long, device=profile.mel.device)
+
+    # inference, conditioned on the precomputed reference mel
+    generated, _ = model_obj.sample(
+        cond=profile.mel.expand(len(gen_texts), -1, -1),
+        text=text,
+        duration=duration,
+        steps=nfe_step,
+        cfg_strength=cfg_strength,
+        sway_sampling_coef=sway_sampling_coef,
+        max_duration=max_duration,
+    )
+    generated = generated.to(torch.float32)
+
+    # Generated part of every item, padded with the quietest value of the batch for the vocoder
+    mels = [generated[i, ref_audio_len:duration_i, :] for i, duration_i in enumerate(durations)]
+    frames = max(mel.shape[0] for mel in mels)
+    padded = generated.new_full((len(mels), frames, generated.shape[-1]), generated.min().item())
+    for i, mel in enumerate(mels):
+        padded[i, : mel.shape[0]] = mel
+    generated_mel_spec = padded.permute(0, 2, 1)
+
+    if mel_spec_type == "vocos":
+        generated_wave = vocoder.decode(generated_mel_spec)
+    elif mel_spec_type == "bigvgan":
+        generated_wave = vocoder(generated_mel_spec)
+    generated_wave = generated_wave.reshape(len(mels), -1)
+    if profile.rms < profile.target_rms:
+        generated_wave = generated_wave * profile.rms / profile.target_rms
+
+    # wav -> numpy, without the samples of the padding frames of every item
+    generated_wave = generated_wave.cpu().numpy()
+    samples = generated_wave.shape[-1]
+    return [
+        (generated_wave[i, : samples - (frames - mel.shape[0]) * hop_length], mel.permute(1, 0).cpu().numpy())
+        for i, mel in enumerate(mels)
+    ]
+
+
 # remove silence from generated wav
 
 
@@ -0,0 +1,223 @@
+import collections
+import threading
+import logging
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pacing import RatePacer
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class AxisPID:
+    """
+    PID in velocity form: the output is a servo speed (degrees per second) for
+    an error in pixels, so the gains do not depend on the loop rate.
+    """
+    def __init__(self, kp, ki, kd, integral_limit=200.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.prev_error = None
+
+    def update(self, error, dt):
+        self.integral = max(-self.integral_limit, min(self.integral + error * dt, self.integral_limit))
+        derivative = (error - self.prev_error) / dt if self.prev_error is not None and dt > 0 else 0.0
+        self.prev_error = error
+        return self.kp * error + self.ki * self.integral + self.kd * derivative
+
+
+class GazeController:
+    """
+    Points Akira's head (Rothead for yaw, Neck for pitch) at a target given as an
+    image error, for every face tracking mode.
+
+    Face tracking only posts the latest error with `update`; a control thread
+    runs the PID at a fixed `rate` and keeps one floating-point target per servo.
+    A servo command is sent only when its target moved by at least
+    `min_step` degrees, and at most `max_command_rate` times per second per
+    servo. Intermediate targets are coalesced into the next command instead of
+    being queued, so the left Arduino (shared with blinking, jaw and random head
+    motion) is not flooded with stale angles.
+
+    Args:
+        motion_controller: MotionController driving the left Arduino.
+        rate: Control loop rate (Hz).
+        yaw_gains, pitch_gains: (kp, ki, kd) velocity gains, degrees per second per pixel.
+        max_speed: Servo slew limit (degrees per second).
+        min_step: Smallest target change (degrees) worth a command.
+        max_command_rate: Commands per second per servo.
+        deadband: Fraction of the frame size treated as centered.
+        max_error_age: Seconds after which a target is considered lost and the head holds still.
+        invert_pitch: The neck moves the image the opposite way of the error (Akira's mounting).
+    """
+    def __init__(
+        self,
+        motion_controller,
+        rate=30.0,
+        yaw_gains=(0.4, 0.0015, 0.06),
+        pitch_gains=(0.4, 0.0015, 0.06),
+        max_speed=90.0,
+        min_step=1.0,
+        max_command_rate=10.0,
+        deadband=0.05,
+        max_error_age=0.5,
+        invert_pitch=True,
+        arduino="left"
+        ):
+        self.motion_controller = motion_controller
+        self.rate = rate
+        self.yaw_pid = AxisPID(*yaw_gains)
+        self.pitch_pid = AxisPID(*pitch_gains)
+        self.max_speed = max_speed
+        self.min_step = min_step
+        self.min_command_interval = 1.0 / max_command_rate
+        self.deadband = deadband
+        self.max_error_age = max_error_age
+        self.invert_pitch = invert_pitch
+        self.pitch_sign = -1.0 if invert_pitch else 1.0
+        self.arduino = arduino
+
+        neck_name, _, rot_name = motion_controller.neck_servos
+        self.servos = {"yaw": rot_name, "pitch": neck_name}
+        self.limits = {}
+        self.targets = {}
+        self.sent = {}
+        self.last_sent_time = {}
+        self.sync_with_motion_controller()
+
+        self.error = None  # (err_x, err_y, frame_size, timestamp)
+        self.error_lock = threading.Lock()
+        self.centered = False
+
+        self.pacer = RatePacer(rate)
+        self.running = False
+        self.thread = None
+
+        self.commands = 0
+        self.coalesced = 0
+        self.command_times = collections.deque(maxlen=200)
+
+    def sync_with_motion_controller(self):
+        """Starts from the positions the motion controller believes the head is at."""
+        for axis, servo_name in self.servos.items():
+            index, rest, min_pos, max_pos, current = self.motion_controller.get_servo_positions(servo_name, self.arduino)
+            self.limits[axis] = (index, min_pos, max_pos)
+            self.targets[axis] = float(current)
+            self.sent[axis] = int(current)
+            self.last_sent_time[axis] = 0.0
+
+    def update(self, error, frame_size=None):
+        """
+        Posts the latest error (err_x, err_y) in pixels between the frame center
+        and the target, or None if the target is lost. Only the newest one is kept.
+        """
+        with self.error_lock:
+            if error is None:
+                self.error = None
+            else:
+                self.error = (error[0], error[1], frame_size, time.monotonic())
+
+    def is_centered(self):
+        return self.centered
+
+    def start(self):
+        if self.running:
+            return
+        self.sync_with_motion_controller()
+        self.yaw_pid.reset()
+        self.pitch_pid.reset()
+        self.pacer.reset()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="gaze_controller", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.error_lock:
+            self.error = None
+        self.centered = False
+
+    def _run(self):
+        while self.running:
+            dt = self.pacer.wait()
+            with tracer.span("gaze.step"):
+                self.step(dt)
+
+    def step(self, dt):
+        with self.error_lock:
+            error = self.error
+
+        if error is None or time.monotonic() - error[3] > self.max_error_age:
+            # Target lost: hold the head still and forget the integral
+            self.yaw_pid.reset()
+            self.pitch_pid.reset()
+            self.centered = False
+            return
+
+        err_x, err_y, frame_size, _ = error
+        if frame_size is not None:
+            w, h = frame_size
+            self.centered = abs(err_x) <= w * self.deadband and abs(err_y) <= h * self.deadband
+        else:
+            self.centered = False
+        if self.centered:
+            self.yaw_pid.prev_error = None
+            self.pitch_pid.prev_error = None
+        else:
+            max_delta = self.max_speed * dt
+            speeds = {
+                "yaw": self.yaw_pid.update(err_x, dt),
+                "pitch": self.pitch_sign * self.pitch_pid.update(err_y, dt)
+                }
+            for axis, speed in speeds.items():
+                _, min_pos, max_pos = self.limits[axis]
+                delta = max(-max_delta, min(speed * dt, max_delta))
+                self.targets[axis] = max(min_pos, min(self.targets[axis] + delta, max_pos))
+
+        self._send_changes()
+
+    def _send_changes(self):
+        now = time.monotonic()
+        for axis, target in self.targets.items():
+            angle = int(round(target))
+            if abs(angle - self.sent[axis]) < self.min_step:
+                continue
+            if now - self.last_sent_time[axis] < self.min_command_interval:
+                # Sent on a later tick with the newest target instead
+                self.coalesced += 1
+                continue
+
+            index, _, _ = self.limits[axis]
+            servo_name = self.servos[axis]
+            self.motion_controller.set_current_pos_servo(servo_name, self.arduino, angle)
+            self.motion_controller.send_command(index, angle, self.arduino, servo_name)
+            self.sent[axis] = angle
+            self.last_sent_time[axis] = now
+            self.commands += 1
+            self.command_times.append(now)
+
+    def command_rate(self, window=2.0):
+        """Servo commands per second over the last `window` seconds."""
+        now = time.monotonic()
+        return sum(1 for t in self.command_times if now - t <= window) / window
+
+    def stats(self):
+        stats = self.pacer.stats()
+        stats.update({
+            "commands": self.commands,
+            "coalesced": self.coalesced,
+            "command_rate": self.command_rate()
+            })
+        return stats
@@ -0,0 +1,87 @@
+import numpy as np
+
+
+MOUTH_STATES = ("closed", "half", "full")
+
+
+def frame_energy(y, frame_length=1024, hop_length=512):
+    """
+    Energy (sum of squares) of every frame of `frame_length` samples starting
+    every `hop_length` samples, the last frames being truncated at the end of
+    the signal. One vectorized pass over a cumulative sum instead of a Python
+    loop over the frames.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if y.ndim > 1:
+        y = y.mean(axis=-1)
+    cumulative = np.concatenate(([0.0], np.cumsum(y * y)))
+    starts = np.arange(0, len(y), hop_length)
+    ends = np.minimum(starts + frame_length, len(y))
+    return cumulative[ends] - cumulative[starts]
+
+
+def normalize(energy):
+    """Min-max normalization to [0, 1] (zeros for a flat signal)."""
+    energy = np.asarray(energy, dtype=np.float64)
+    if energy.size == 0:
+        return energy
+    span = energy.max() - energy.min()
+    if span <= 0:
+        return np.zeros_like(energy)
+    return (energy - energy.min()) / span
+
+
+class MouthSchedule:
+    """
+    When the mouth changes state while an audio clip plays: `times` (seconds
+    from the start of the clip) and `states` (index in MOUTH_STATES), one
+    entry per change only.
+    """
+    def __init__(self, times=None, states=None, duration=0.0):
+        self.times = np.asarray(times if times is not None else [], dtype=np.float64)
+        self.states = np.asarray(states if states is not None else [], dtype=np.int64)
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        for t, state in zip(self.times, self.states):
+            yield float(t), MOUTH_STATES[state]
+
+    def state_at(self, t):
+        i = np.searchsorted(self.times, t, side="right") - 1
+        return MOUTH_STATES[self.states[i]] if i >= 0 else "closed"
+
+
+class LipSync:
+    """
+    Turns speech audio into a jaw / upper lip schedule: normalized frame
+    energy below `threshold_half` keeps the mouth closed, below
+    `threshold_full` half open, above it fully open.
+    """
+    def __init__(self, frame_length=1024, hop_length=512, threshold_half=0.1, threshold_full=0.3):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.threshold_half = threshold_half
+        self.threshold_full = threshold_full
+
+    def states(self, norm_energy):
+        """MOUTH_STATES index of every frame."""
+        return np.digitize(norm_energy, [self.threshold_half, self.threshold_full])
+
+    def _changes(self, states, sr):
+        states = np.asarray(states, dtype=np.int64)
+        if states.size == 0:
+            return MouthSchedule()
+        prev = np.concatenate(([-1], states[:-1]))
+        changes = np.flatnonzero(states != prev)
+        times = changes * self.hop_length / sr
+        return MouthSchedule(times, states[changes])
+
+    def schedule(self, y, sr):
+        """MouthSchedule of a whole clip (and its normalized energy, for plots)."""
+        norm_energy = normalize(frame_energy(y, self.frame_length, self.hop_length))
+        schedule = self._changes(self.states(norm_energy), sr)
+        schedule.duration = len(y) / sr
+        return schedule, norm_energy
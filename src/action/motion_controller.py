@@ -1,4 +1,3 @@
-from playsound import playsound
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
@@ -9,8 +8,17 @@ import serial
 import queue
 import time
 import os
+import sys
 import logging
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tracing import tracer
+from action.command_slots import LatestCommandSlots
+from action.serial_link import SerialLink
+from action.trajectory import TrajectoryScheduler
+from action.lip_sync import LipSync
+from action.audio_output import audio_output
+
 # Set up logging: logs will be written to 'motion_controller.log' and output to the console.
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -33,14 +41,26 @@ class MotionController:
         self,
         left_port="/dev/ttyACM0",
         right_port="/dev/ttyACM1",
-        baud_rate=9600,
+        baud_rate=115200,
         left_servos_file="servos_data_left.csv",
         right_servos_file="servos_data_right.csv",
         initialize_on_start=True,
-        verbose=False
+        verbose=False,
+        protocol="pipelined",
+        window=2
         ):
+        """
+        protocol: "pipelined" sends every pending servo of an Arduino as one
+            batched frame and matches the acks in a reader thread (see serial_link.py),
+            "legacy" sends one "idx angle" command at a time and waits for its "OK".
+        window: Frames in flight per Arduino in pipelined mode.
+        """
+        if protocol not in ("pipelined", "legacy"):
+            raise ValueError(f"Unknown serial protocol: {protocol}")
 
         self.verbose = verbose
+        self.protocol = protocol
+        self.window = window
         self.logger = logger  # use the module-level logger
 
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -57,15 +77,22 @@ class MotionController:
         self.baud_rate = baud_rate
 
         self.connection_status = False
+        self.links = {}
+
+        # (seconds, arduino, servo_name, angle) of every command, while recording (see benchmark_motion.py)
+        self.command_log = None
+        self.command_log_start = None
+
+        # One pending slot per servo: a new angle replaces a stale one instead of queuing behind it
+        self.left_command_queue = LatestCommandSlots()
+        self.right_command_queue = LatestCommandSlots()
 
         if initialize_on_start:
             self.initiate_connection()
 
-        self.left_command_queue = queue.Queue()
-        self.right_command_queue = queue.Queue()
-        
-        self.left_worker_thread = threading.Thread(target=self.process_queue, args=("left",), daemon=True)
-        self.right_worker_thread = threading.Thread(target=self.process_queue, args=("right",), daemon=True)
+        worker = self.process_queue_pipelined if protocol == "pipelined" else self.process_queue
+        self.left_worker_thread = threading.Thread(target=worker, args=("left",), daemon=True)
+        self.right_worker_thread = threading.Thread(target=worker, args=("right",), daemon=True)
         self.left_worker_thread.start()
         self.right_worker_thread.start()
         
@@ -110,6 +137,14 @@ class MotionController:
         # Length of the time window (in seconds)
         self.window_duration = 1.0
 
+        # Jaw and upper lip schedule from the speech energy
+        self.lip_sync = LipSync(frame_length=1024, hop_length=512, threshold_half=0.1, threshold_full=0.3)
+        # Mouth changes are sent this early, to make up for the serial and servo latency
+        self.mouth_lead = 0.03
+
+        # Interpolates gestures (see move_servos) and sends them as synchronized poses
+        self.trajectories = TrajectoryScheduler(self)
+
     def process_queue_slow(self, arduino):
         q = self.left_command_queue if arduino == "left" else self.right_command_queue
         while self.connection_status:
@@ -118,7 +153,6 @@ class MotionController:
             except queue.Empty:
                 continue
             if command is None:
-                q.task_done()
                 break
 
             servo_index, angle, servo_name = command
@@ -161,8 +195,6 @@ class MotionController:
                 self.logger.warning(f"{arduino} command for {servo_name} did not receive an OK response.")
                 # Optionally, re-enqueue the command for a retry
 
-            q.task_done()
-
     def process_queue(self, arduino):
         """Worker thread for processing the command queue for the given Arduino."""
         q = self.left_command_queue if arduino == "left" else self.right_command_queue
@@ -174,33 +206,79 @@ class MotionController:
             
             if command is None:
                 # Received sentinel value; break out of the loop.
-                q.task_done()
                 break
 
             servo_index, angle, servo_name = command
+            tracer.observe(f"serial.{arduino}.staleness", q.last_staleness)
 
             # Send the command while ensuring only one thread is writing to the serial port
-            if arduino == "left":
-                with self.lock_left:
-                    self.arduino_left.write(f"{servo_index} {angle}\n".encode())
-                    response = self.arduino_left.readline().decode().strip()
-            else:
-                with self.lock_right:
-                    self.arduino_right.write(f"{servo_index} {angle}\n".encode())
-                    response = self.arduino_right.readline().decode().strip()
+            with tracer.span(f"serial.{arduino}", servo=servo_name, angle=angle):
+                if arduino == "left":
+                    with self.lock_left:
+                        self.arduino_left.write(f"{servo_index} {angle}\n".encode())
+                        response = self.arduino_left.readline().decode().strip()
+                else:
+                    with self.lock_right:
+                        self.arduino_right.write(f"{servo_index} {angle}\n".encode())
+                        response = self.arduino_right.readline().decode().strip()
 
             self.logger.info(f"{arduino} command for {servo_name} sent with angle {angle}. Response: {response}")
 
             #if response != "OK":
             #    self.logger.warning(f"{arduino} command for {servo_name} did not receive an OK response.")
                 # Optionally: re-enqueue command here if desired
-            q.task_done()
 
 
+    def process_queue_pipelined(self, arduino):
+        """
+        Worker thread for the pipelined protocol: every servo with a pending
+        target goes out in one frame, without waiting for the previous frame's ack.
+        While the window is full, new targets keep coalescing in the queue.
+        """
+        q = self.left_command_queue if arduino == "left" else self.right_command_queue
+        while self.connection_status:
+            try:
+                batch = q.get_batch(timeout=1)
+            except queue.Empty:
+                continue
+
+            if batch is None:
+                # Received sentinel value; break out of the loop.
+                break
+
+            link = self.links.get(arduino)
+            if link is None:
+                # The connection is being closed: nothing to send the frame on
+                continue
+
+            tracer.observe(f"serial.{arduino}.staleness", q.last_staleness)
+            with tracer.span(f"serial.{arduino}.frame", servos=len(batch)):
+                link.send_frame(batch)
+
+            if self.verbose:
+                self.logger.info(f"{arduino} frame sent: " + ", ".join(f"{servo_name}={angle}" for _, angle, servo_name in batch))
+
+    def _resend_lost(self, arduino, commands):
+        """Re-queues the commands of a lost frame, unless their servo already has a newer target."""
+        q = self.left_command_queue if arduino == "left" else self.right_command_queue
+        for command in commands:
+            q.put(command, replace=False)
+
+    def command_queue_stats(self):
+        """Depth, max depth, received, sent and dropped (superseded) commands of each Arduino's queue."""
+        stats = {
+            "left": self.left_command_queue.stats(),
+            "right": self.right_command_queue.stats()
+            }
+        for arduino, link in self.links.items():
+            stats[arduino]["link"] = link.stats()
+        return stats
+
     def send_command(self, servo_index, angle, arduino, servo_name):
         """
         Instead of immediately writing to the serial port,
         this method enqueues the command for processing.
+        A pending command for the same servo is replaced by this one.
         """
         if not self.connection_status:
             self.logger.warning(f"Connection status: {self.connection_status}")
@@ -215,6 +293,12 @@ class MotionController:
         if not isinstance(angle, int):
             angle = int(angle)
 
+        if self.command_log is not None:
+            self.command_log.append((time.monotonic() - self.command_log_start, arduino, servo_name, angle))
+
+        # A direct command overrides the trajectory the servo was following
+        self.trajectories.cancel(arduino, servo_name)
+
         # Build the command tuple
         command = (servo_index, angle, servo_name)
         if arduino == "left":
@@ -224,6 +308,53 @@ class MotionController:
         else:
             self.logger.error(f"{arduino} arduino does not exist. Please try either 'left' or 'right'!")
 
+    def send_pose(self, arduino, pose):
+        """
+        Enqueues several servos of one Arduino at once, so they are sent
+        together (in one frame with the pipelined protocol).
+
+        Args:
+            pose: [(servo_name, angle)]
+        """
+        if not self.connection_status:
+            self.logger.warning(f"Connection status: {self.connection_status}")
+            return
+        if arduino not in ("left", "right"):
+            self.logger.error(f"{arduino} arduino does not exist. Please try either 'left' or 'right'!")
+            return
+
+        commands = []
+        now = time.monotonic()
+        for servo_name, angle in pose:
+            servo_index, _, min_pos, max_pos, _ = self.get_servo_positions(servo_name, arduino)
+            angle = int(max(min_pos, min(angle, max_pos)))
+            self.set_current_pos_servo(servo_name, arduino, angle)
+            if self.command_log is not None:
+                self.command_log.append((now - self.command_log_start, arduino, servo_name, angle))
+            commands.append((servo_index, angle, servo_name))
+
+        q = self.left_command_queue if arduino == "left" else self.right_command_queue
+        q.put_many(commands)
+
+    def move_servos(self, targets, duration=1.0, easing="ease_in_out", wait=False):
+        """
+        Moves servos to their targets along a trajectory interpolated by the
+        TrajectoryScheduler, instead of sending every intermediate step by hand.
+
+        Args:
+            targets: {arduino: {servo_name: angle}}; servos on both Arduinos move in sync.
+            duration: Seconds to reach the targets.
+            easing: "linear", "ease_in", "ease_out", "ease_in_out" or "min_jerk".
+            wait: Block until the move is over.
+
+        Returns:
+            A Motion handle (motion.wait() blocks until the move is over).
+        """
+        motion = self.trajectories.move(targets, duration=duration, easing=easing)
+        if wait:
+            motion.wait(timeout=duration + 1.0)
+        return motion
+
     def load_servo_info(self, left_servos_file, right_servos_file):
             df_left = pd.read_csv(left_servos_file)
             df_right = pd.read_csv(right_servos_file)
@@ -248,14 +379,38 @@ class MotionController:
         self.arduino_right = serial.Serial(self.right_port, self.baud_rate, timeout=1)
         time.sleep(2)  # Give them time to initialize
 
+        if self.protocol == "pipelined":
+            for arduino, port in (("left", self.arduino_left), ("right", self.arduino_right)):
+                port.reset_input_buffer()
+                self.links[arduino] = SerialLink(
+                    port,
+                    arduino,
+                    window=self.window,
+                    on_lost=lambda commands, arduino=arduino: self._resend_lost(arduino, commands)
+                    )
+
         self.logger.info("Connection has been successfully initiated!")
         self.connection_status = True
 
-    def close_connection(self):
+    def start_command_log(self):
+        """Records every servo command from now on, to be replayed by benchmark_motion.py."""
+        self.command_log = []
+        self.command_log_start = time.monotonic()
+
+    def save_command_log(self, path):
+        """Stops recording and writes the commands as a CSV trace (t,arduino,servo_name,angle)."""
+        log, self.command_log = self.command_log or [], None
+        pd.DataFrame(log, columns=["t", "arduino", "servo_name", "angle"]).to_csv(path, index=False)
+        self.logger.info(f"{len(log)} servo commands saved in {path}")
+
+    def close_connection(self, rest=True):
         if self.arduino_left is not None and self.arduino_right is not None:
-            time.sleep(5)
-            self.all_rest()
-            time.sleep(15)
+            if rest:
+                time.sleep(5)
+                self.all_rest()
+                time.sleep(15)
+
+            self.trajectories.stop()
 
             # Insert sentinel values into each queue so the workers can exit their loop.
             self.left_command_queue.put(None)
@@ -264,6 +419,10 @@ class MotionController:
             # Optionally wait for the queues to clear and join the threads.
             self.left_worker_thread.join(timeout=2)
             self.right_worker_thread.join(timeout=2)
+
+            for link in self.links.values():
+                link.close()
+            self.links = {}
             
             self.arduino_left.close()
             self.arduino_right.close()
@@ -344,24 +503,14 @@ class MotionController:
             neck_target = random.randint(neck_min + 5, neck_max - 5)
             roll_target = random.randint(roll_min + 5, roll_max - 5)
             rot_target = random.randint(rot_min + 5, rot_max - 5)
-            
-            distance = abs(neck_target - neck_rest)
-            step_size = max(5, distance // 10)
 
-            for _ in range(10):
-                neck_current += (neck_target - neck_current) / step_size
-                roll_current += (roll_target - roll_current) / step_size
-                rot_current += (rot_target - rot_current) / step_size
-                
-                neck_angle = int(max(neck_min, min(neck_current, neck_max)))
-                roll_angle = int(max(roll_min, min(roll_current, roll_max)))
-                rot_angle = int(max(rot_min, min(rot_current, rot_max)))
-                
-                self.send_command(neck_index, neck_angle, arduino, neck_name)
-                self.send_command(roll_index, roll_angle, arduino, roll_name)
-                self.send_command(rot_index, rot_angle, arduino, rot_name)
-                
-                time.sleep(0.1)
+            # The three neck servos move together, interpolated by the trajectory scheduler
+            self.move_servos(
+                {arduino: {neck_name: neck_target, roll_name: roll_target, rot_name: rot_target}},
+                duration=1.0,
+                easing="ease_in_out",
+                wait=True
+                )
 
             time.sleep(random.uniform(2, 6))
 
@@ -371,94 +520,77 @@ class MotionController:
     def stop_move_head_randomly(self):
         self.move_head_randomly = False
 
-    def move_jaw_and_play(self, audio_file="output.wav", plot_debug=False):
-        arduino = "left"
-        y, sr = librosa.load(audio_file, sr=None)
-        frame_length = 1024
-        hop_length = 512
-        energy = np.array([
-            sum(abs(y[i:i+frame_length]**2)) for i in range(0, len(y), hop_length)
-        ])
-        norm_energy = (energy - energy.min()) / (energy.max() - energy.min())
-        jaw_name = "Jaw"
-        jaw_index, jaw_rest, jaw_min, jaw_max, _ = self.get_servo_positions(jaw_name, arduino)
-        upper_name = "Upper_Lip"
-        upper_index, upper_rest, upper_min, upper_max, _ = self.get_servo_positions(upper_name, arduino)
-        threshold_half = 0.1
-        threshold_full = 0.3
-        
-        def determine_state(n_energy):
-            if n_energy < threshold_half:
-                return "closed"
-            elif n_energy < threshold_full:
-                return "half"
-            else:
-                return "full"
-        
-        state_angles = {
+    def mouth_angles(self, arduino="left"):
+        """Jaw and upper lip angles of every mouth state."""
+        _, _, jaw_min, jaw_max, _ = self.get_servo_positions("Jaw", arduino)
+        _, _, upper_min, upper_max, _ = self.get_servo_positions("Upper_Lip", arduino)
+        return {
             "closed": {"jaw": jaw_min, "upper": upper_min},
             "half": {"jaw": int((jaw_min + jaw_max) / 2), "upper": int((upper_min + upper_max) / 2)},
             "full": {"jaw": jaw_max, "upper": upper_max}
         }
-        frame_interval = hop_length / sr
-        audio_duration = len(y) / sr
-        audio_finished = threading.Event()
-        current_state = None
-        
-        def move_mouth():
-            nonlocal current_state
-            start_time = time.time()
-            while (time.time() - start_time) < audio_duration and not audio_finished.is_set():
-                elapsed = time.time() - start_time
-                frame_idx = int(elapsed / frame_interval)
-                if frame_idx >= len(norm_energy):
-                    break
-                desired_state = determine_state(norm_energy[frame_idx])
-                if desired_state != current_state:
-                    angles = state_angles[desired_state]
-                    self.send_command(jaw_index, angles["jaw"], arduino, jaw_name)
-                    self.send_command(upper_index, angles["upper"], arduino, upper_name)
-                    current_state = desired_state
-                    self.logger.info(f"Elapsed {elapsed:.2f}s, frame {frame_idx}: Changed state to {desired_state}")
-                time.sleep(0.005)
+
+    def follow_clip_with_mouth(self, clip, schedule, arduino="left"):
+        """
+        Moves the jaw and upper lip along `schedule` while `clip` plays, locked to
+        the playhead of the audio output (not to when playback was requested).
+        """
+        state_angles = self.mouth_angles(arduino)
+        for change_time, state in schedule:
+            if not clip.wait_until(change_time - self.mouth_lead):
+                break
+            angles = state_angles[state]
+            self.send_pose(arduino, [("Jaw", angles["jaw"]), ("Upper_Lip", angles["upper"])])
+            if self.verbose:
+                self.logger.info(f"Elapsed {change_time:.2f}s: Changed state to {state}")
+        clip.wait()
+        if not audio_output.is_speaking():
+            # Only close the mouth if no other clip follows this one
             final_state = state_angles["closed"]
-            self.send_command(jaw_index, final_state["jaw"], arduino, jaw_name)
-            self.send_command(upper_index, final_state["upper"], arduino, upper_name)
+            self.send_pose(arduino, [("Jaw", final_state["jaw"]), ("Upper_Lip", final_state["upper"])])
             self.logger.info("Audio finished, stopping mouth movement.")
-        
-        def play_audio():
-            playsound(audio_file)
-            audio_finished.set()
-        
-        jaw_thread = threading.Thread(target=move_mouth)
-        audio_thread = threading.Thread(target=play_audio)
-        
+
+    def move_jaw_and_play(self, audio_file="output.wav", plot_debug=False, wait=True):
+        """Reads `audio_file` and plays it with jaw sync (see play_with_jaw)."""
+        y, sr = librosa.load(audio_file, sr=None)
+        return self.play_with_jaw(y, sr, plot_debug=plot_debug, wait=wait)
+
+    @tracer.trace("play_with_jaw")
+    def play_with_jaw(self, y, sr, plot_debug=False, wait=True):
+        """
+        Plays the waveform `y` (sample rate `sr`) on the shared audio output with jaw sync.
+
+        With wait=False it returns the Clip as soon as it is queued: a clip
+        queued next starts right after this one, without a gap, and the mouth
+        follows both.
+        """
+        # The whole mouth schedule is computed once, in one vectorized pass (see lip_sync.py)
+        schedule, norm_energy = self.lip_sync.schedule(y, sr)
+
+        clip = audio_output.enqueue(y, sr)
+        jaw_thread = threading.Thread(target=self.follow_clip_with_mouth, args=(clip, schedule), daemon=True)
         jaw_thread.start()
-        audio_thread.start()
-        
-        audio_thread.join()
-        jaw_thread.join()
-        
+
+        if wait:
+            clip.wait()
+            jaw_thread.join()
+
         if plot_debug:
             plt.figure(figsize=(10, 8))
-            plt.subplot(4, 1, 1)
+            plt.subplot(3, 1, 1)
             plt.plot(y)
             plt.title("Audio Signal")
-            plt.subplot(4, 1, 2)
-            plt.plot(energy)
-            plt.title("Energy")
-            plt.subplot(4, 1, 3)
+            plt.subplot(3, 1, 2)
             plt.plot(norm_energy)
             plt.title("Normalized Energy")
-            state_numeric = [0 if determine_state(ne) == "closed" 
-                             else 1 if determine_state(ne) == "half" 
-                             else 2 for ne in norm_energy]
-            plt.subplot(4, 1, 4)
-            plt.plot(state_numeric, 'o-')
+            plt.subplot(3, 1, 3)
+            plt.plot(self.lip_sync.states(norm_energy), 'o-')
             plt.title("Mouth State (0=closed, 1=half, 2=full)")
             plt.tight_layout()
             plt.show()
 
+        return clip
+
     def akira_open_hand(self, arduino):
         if self.verbose:
             self.logger.info(f"Opening {arduino} hand.")
@@ -567,6 +699,7 @@ class MotionController:
             else:
                 arduinos_to_move = [choice]
         
+            targets = {}
             for arduino in arduinos_to_move:
                 shoulder_name, omoplate_name, rotate_name, bicep_name = self.shoulder_servos
                 shoulder_index, shoulder_rest, shoulder_min, shoulder_max, shoulder_current = self.get_servo_positions(servo_name=shoulder_name, arduino=arduino)
@@ -574,24 +707,15 @@ class MotionController:
                 rotate_index, rotate_rest, rotate_min, rotate_max, rotate_current = self.get_servo_positions(servo_name=rotate_name, arduino=arduino)
                 bicep_index, bicep_rest, bicep_min, bicep_max, bicep_current = self.get_servo_positions(servo_name=bicep_name, arduino=arduino)
 
-                shoulder_target = random.randint(shoulder_min + 5, shoulder_max - 5)
-                omoplate_target = random.randint(omoplate_min + 5, omoplate_max - 5)
-                rotate_target = random.randint(rotate_min + 5, rotate_max - 5)
-                bicep_target = random.randint(bicep_min + 5, bicep_max - 5)
-
-                steps = 2
-                for _ in range(steps):
-                    shoulder_current += (shoulder_target - shoulder_current) / steps
-                    omoplate_current += (omoplate_target - omoplate_current) / steps
-                    rotate_current += (rotate_target - rotate_current) / steps
-                    bicep_current += (bicep_target - bicep_current) / steps
+                targets[arduino] = {
+                    shoulder_name: random.randint(shoulder_min + 5, shoulder_max - 5),
+                    omoplate_name: random.randint(omoplate_min + 5, omoplate_max - 5),
+                    rotate_name: random.randint(rotate_min + 5, rotate_max - 5),
+                    bicep_name: random.randint(bicep_min + 5, bicep_max - 5)
+                    }
 
-                    self.send_command(shoulder_index, int(shoulder_current), arduino, shoulder_name)
-                    self.send_command(omoplate_index, int(omoplate_current), arduino, omoplate_name)
-                    self.send_command(rotate_index, int(rotate_current), arduino, rotate_name)
-                    self.send_command(bicep_index, int(bicep_current), arduino, bicep_name)
-
-                    time.sleep(0.1)
+            # Both arms move in sync, interpolated by the trajectory scheduler
+            self.move_servos(targets, duration=0.6, easing="ease_in_out", wait=True)
 
             time.sleep(random.uniform(2, 6))
             
@@ -1,17 +1,27 @@
-import pygame
+import threading
+import librosa
 import time
+import sys
 import os
 import re
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from action.audio_output import audio_output
+
 class MusicPlayer:
-    def __init__(self, freq=44100, size=-16, channels=2, buffer=512):
-        
-        pygame.mixer.init(frequency=freq, size=size, channels=channels, buffer=buffer)
-        
+    """
+    Background music of the thinking mode, played on the music channel of the
+    shared audio output (so it is mixed with, and ducked under, Akira's voice).
+    Tracks are streamed from their file a few seconds ahead of the playhead,
+    never decoded whole in memory.
+    """
+    def __init__(self, output=audio_output):
+        self.output = output
+
         music_dir = os.path.expanduser("~/Music/2018_Music_for_Reading")
         if not os.path.isdir(music_dir):
             raise ValueError(f"Music directory not found: {music_dir}")
-        
+
         audio_exts = (".mp3", ".wav", ".ogg", ".flac")
         tracks = [f for f in os.listdir(music_dir)
                   if f.lower().endswith(audio_exts) and re.match(r"^\d+", f)]
@@ -19,13 +29,12 @@ class MusicPlayer:
             m = re.match(r"^(\d+)", f)
             return int(m.group(1)) if m else float('inf')
         tracks.sort(key=_sort_key)
-        
+
         self.playlist = []
         for track in tracks:
             path = os.path.join(music_dir, track)
             try:
-                sound = pygame.mixer.Sound(path)
-                duration = sound.get_length()
+                duration = librosa.get_duration(path=path)
             except Exception as e:
                 print(f"Warning: Could not load {path}: {e}")
                 continue
@@ -34,31 +43,37 @@ class MusicPlayer:
             raise ValueError(f"No audio tracks found in {music_dir}")
 
         self.current_index = 0
-        self.resumed = None
-        self.paused = None
         self.current_pos = 0.0
+        self.track = None
+
+        self.lock = threading.Lock()
 
     def play_music(self, fade_in_ms=2000):
-        if self.resumed is not None:
-            elapsed = time.time() - self.resumed + self.current_pos
+        with self.lock:
+            if self.track is not None:
+                # Exact position in the track, from the output clock
+                self.current_pos = self.track.position(self.output.sample_rate)
+                self.track = None
             duration = self.playlist[self.current_index][1]
-            if elapsed >= duration:
+            if self.current_pos >= duration - 0.1:
                 # Advance to next track (wrap around)
                 self.current_index = (self.current_index + 1) % len(self.playlist)
                 self.current_pos = 0.0
-            else:
-                # Resume at the correct position
-                self.current_pos = elapsed
-    
-        path, duration = self.playlist[self.current_index]
-        print(f"Playing track {self.current_index+1}/{len(self.playlist)}: {os.path.basename(path)} ({duration:.2f}s)")
-        pygame.mixer.music.load(path)
-        self.resumed = time.time()
-        pygame.mixer.music.play(loops=0, start=self.current_pos, fade_ms=fade_in_ms)
+
+            path, duration = self.playlist[self.current_index]
+            print(f"Playing track {self.current_index+1}/{len(self.playlist)}: {os.path.basename(path)} ({duration:.2f}s)")
+            try:
+                self.track = self.output.stream_music(path, start=self.current_pos, fade_in=fade_in_ms / 1000)
+            except Exception as e:
+                print(f"Warning: Could not play {path}: {e}")
 
     def stop_music(self, fade_out_ms=2000):
-        pygame.mixer.music.fadeout(fade_out_ms)
-        self.paused = time.time()
+        with self.lock:
+            if self.track is not None:
+                # Resume later from where the fade out started
+                self.current_pos = self.track.position(self.output.sample_rate)
+                self.output.stop_music(fade_out_ms / 1000)
+                self.track = None
 
 if __name__ == '__main__':
     player = MusicPlayer()
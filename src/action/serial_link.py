@@ -0,0 +1,176 @@
+import collections
+import threading
+import logging
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class SerialLink:
+    """
+    Pipelined, batched protocol to one Arduino (see LeftArduino.ino / RightArduino.ino).
+
+    A frame sets several servos in one line and is acknowledged with its sequence number:
+
+        host    -> "S<seq> <idx> <angle> <idx> <angle> ...\\n"
+        arduino -> "K <seq>"
+
+    Frames are written without waiting for their ack: up to `window` frames can
+    be in flight, and a reader thread matches the acks as they come back.
+
+    The in-flight frames are also bounded in bytes by `rx_buffer`, the size of
+    the Arduino's serial input buffer (64 bytes on AVR boards): a frame is only
+    written ahead of unacknowledged ones if they all fit in it together. A frame
+    larger than the buffer on its own (a full pose is about 200 bytes) is only
+    written once nothing else is in flight, and relies on the sketch moving
+    bytes into its line buffer as they arrive.
+
+    A frame not acknowledged within `ack_timeout` is considered lost and handed
+    to `on_lost(commands)` (the servos may have a newer target by then).
+
+    The legacy "idx angle" / "OK idx angle" exchange is still understood by the sketches.
+
+    Args:
+        port: An open serial.Serial (or any object with write/readline/close).
+        name: "left" or "right", for logs and traces.
+        window: Maximum number of frames in flight.
+        rx_buffer: Bytes the Arduino can buffer before reading them.
+        ack_timeout: Seconds before an unacknowledged frame is considered lost.
+    """
+    def __init__(self, port, name, window=2, ack_timeout=0.5, on_lost=None, rx_buffer=64):
+        self.port = port
+        self.name = name
+        self.window = window
+        self.rx_buffer = rx_buffer
+        self.ack_timeout = ack_timeout
+        self.on_lost = on_lost
+
+        self.condition = threading.Condition()
+        self.in_flight = collections.OrderedDict()  # seq -> (send time, commands, frame bytes)
+        self.in_flight_bytes = 0
+        self.next_seq = 0
+
+        self.frames = 0
+        self.updates = 0
+        self.acked = 0
+        self.lost = 0
+        self.latencies = collections.deque(maxlen=200)
+
+        self.running = True
+        self.reader = threading.Thread(target=self._read_acks, name=f"serial_reader_{name}", daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def encode_frame(seq, commands):
+        return ("S" + str(seq) + "".join(f" {servo_index} {int(angle)}" for servo_index, angle, *_ in commands) + "\n").encode()
+
+    def send_frame(self, commands, timeout=None):
+        """
+        Writes one frame setting every (servo_index, angle, servo_name) of `commands`.
+        Blocks while `window` frames are waiting for their ack, or while the frame
+        would not fit in the Arduino's input buffer with them. Returns the frame's sequence number.
+        """
+        commands = list(commands)
+        with self.condition:
+            def can_send():
+                if not self.running or not self.in_flight:
+                    return True
+                size = len(self.encode_frame(self.next_seq, commands))
+                return len(self.in_flight) < self.window and self.in_flight_bytes + size <= self.rx_buffer
+
+            self.condition.wait_for(can_send, timeout)
+            self._expire_lost()
+            if not self.running:
+                return None
+
+            seq = self.next_seq
+            size = len(self.encode_frame(seq, commands))
+            self.next_seq = (self.next_seq + 1) % 10000
+            self.in_flight[seq] = (time.perf_counter(), commands, size)
+            self.in_flight_bytes += size
+            self.frames += 1
+            self.updates += len(commands)
+
+        self.port.write(self.encode_frame(seq, commands))
+        return seq
+
+    def _expire_lost(self):
+        now = time.perf_counter()
+        lost = []
+        while self.in_flight:
+            seq, (sent, commands, size) = next(iter(self.in_flight.items()))
+            if now - sent <= self.ack_timeout:
+                break
+            del self.in_flight[seq]
+            self.in_flight_bytes -= size
+            self.lost += 1
+            lost.append(commands)
+        if lost:
+            logger.warning(f"{self.name} Arduino did not acknowledge {len(lost)} frame(s).")
+            self.condition.notify_all()
+            if self.on_lost is not None:
+                for commands in lost:
+                    self.on_lost(commands)
+
+    def _read_acks(self):
+        while self.running:
+            try:
+                line = self.port.readline()
+            except Exception as e:
+                if self.running:
+                    logger.error(f"Error reading from the {self.name} Arduino: {e}")
+                    time.sleep(0.1)
+                continue
+
+            with self.condition:
+                if line:
+                    self._handle_line(line.decode(errors="replace").strip())
+                self._expire_lost()
+
+    def _handle_line(self, line):
+        if line.startswith("K "):
+            try:
+                seq = int(line[2:])
+            except ValueError:
+                return
+            item = self.in_flight.pop(seq, None)
+            if item is None:
+                return
+            self.in_flight_bytes -= item[2]
+            latency = time.perf_counter() - item[0]
+            self.latencies.append(latency)
+            self.acked += 1
+            tracer.observe(f"serial.{self.name}.ack_latency", latency)
+            self.condition.notify_all()
+        elif line and not line.startswith("OK"):
+            logger.info(f"{self.name} Arduino: {line}")
+
+    def wait_idle(self, timeout=1.0):
+        """Waits until every frame in flight is acknowledged (or lost)."""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.in_flight, timeout)
+
+    def close(self):
+        self.wait_idle()
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.reader.join(timeout=2)
+
+    def stats(self):
+        with self.condition:
+            latencies = sorted(self.latencies)
+            return {
+                "frames": self.frames,
+                "servo_updates": self.updates,
+                "acked": self.acked,
+                "lost": self.lost,
+                "in_flight": len(self.in_flight),
+                "ack_latency_p50": latencies[len(latencies) // 2] if latencies else None,
+                "ack_latency_max": latencies[-1] if latencies else None
+                }
@@ -1,11 +1,17 @@
+import threading
+import queue
+import io
 import os
 import sys
-import shutil
 import requests
-from playsound import playsound
+import soundfile as sf
+from matplotlib.figure import Figure
 from gradio_client import Client, handle_file
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "f5_tts_"))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tracing import tracer
+from action.audio_output import audio_output
 
 try:
     from f5_tts_.api import F5TTS
@@ -19,22 +25,34 @@ class Akira_Talk:
         method="jetson",    
         url_path = "../../../url.txt",
         output_path = "./output.wav",
-        spec_path = "./spec.png"
+        spec_path = "./spec.png",
+        save_audio=False,
+        save_spectrogram=False
         ):
+        """
+        speak() returns the waveform in memory. With save_audio / save_spectrogram,
+        the WAV (output_path) and the spectrogram PNG (spec_path) are also written,
+        by a background thread, off the speech path.
+        """
 
         self.method = method
         self.ref_audio_path = "/home/maiguek/Documents/PROJECTS/AKIRA/src/action/ref_audio.wav"
         self.ref_text = "This is a test of my voice that I will use for cloning it and specially for the speech of Akira. Akira will have my voice and I hope it can mimic it very well. Thank you!"
         self.output_path = output_path
         self.spec_path = spec_path
-        
+        self.save_audio = save_audio
+        self.save_spectrogram = save_spectrogram
+
+        self.exports = queue.Queue()
+        self.export_thread = None
         
         if self.method in ["jetson", "API", "laptop"]:
             if self.method == "jetson":
                 
                 self.f5tts = F5TTS(
                     ref_file=self.ref_audio_path, 
-                    ref_text=self.ref_text
+                    ref_text=self.ref_text,
+                    voice_cache=os.path.splitext(self.ref_audio_path)[0] + ".voice.pt"
                 )
                 
             elif self.method == "laptop":
@@ -48,14 +66,24 @@ class Akira_Talk:
         else:
             raise ValueError(f"Method {method} not found. Please try again!")
 
-    def speak(self, gen_text, play=False):
+    def speak(self, gen_text, play=False, output_path=None):
+        """
+        Clones `gen_text` with Akira's voice.
+
+        Returns:
+            (wav, sr): the waveform as a float32 NumPy array and its sample rate,
+            or None if the speech could not be generated.
+        """
+        if output_path is None:
+            output_path = self.output_path
+        spect = None
+
         if self.method == "jetson":
-            wav, sr, spect = self.f5tts.infer(
-                gen_text=gen_text,
-                file_wave=self.output_path,
-                file_spect=self.spec_path,
-                seed=-1  # random seed = -1
-            )
+            with tracer.span("F5TTS.infer", chars=len(gen_text)):
+                wav, sr, spect = self.f5tts.infer(
+                    gen_text=gen_text,
+                    seed=-1  # random seed = -1
+                )
             
             
         elif self.method == "laptop":
@@ -64,13 +92,11 @@ class Akira_Talk:
             try:
                 response = requests.post(self.url, json=text)
                 response.raise_for_status()
-
-                with open("output.wav", "wb") as f:
-                    f.write(response.content)
-                print("Audio file saved as output.wav")
+                wav, sr = sf.read(io.BytesIO(response.content), dtype="float32")
 
             except Exception as e:
                 print("Error:", e)
+                return None
                 
         elif self.method == "API":    
             # only a limited amount of times available
@@ -85,23 +111,67 @@ class Akira_Talk:
                             api_name="/basic_tts"
             )
             
-            source = result[0]
-            destination = self.output_path
-            shutil.copy(source, destination)
+            wav, sr = sf.read(result[0], dtype="float32")
         else:
-            raise ValueError(f"Method {method} not found. Please try again!")
+            raise ValueError(f"Method {self.method} not found. Please try again!")
+
+        self.export(wav, sr, spect, output_path)
 
         if play:
-            playsound(self.output_path)
-        
+            audio_output.play(wav, sr)
+        return wav, sr
+
+    def export(self, wav, sr, spect, output_path):
+        """Queues the enabled exports (WAV, spectrogram PNG) for the background thread."""
+        jobs = []
+        if self.save_audio:
+            jobs.append((self._write_wave, (wav, sr, output_path)))
+        if self.save_spectrogram and spect is not None:
+            jobs.append((self._render_spectrogram, (spect, self.spec_path)))
+        if not jobs:
+            return
+
+        if self.export_thread is None:
+            self.export_thread = threading.Thread(target=self._export_worker, daemon=True)
+            self.export_thread.start()
+        for job in jobs:
+            self.exports.put(job)
+
+    def wait_exports(self):
+        """Blocks until every queued export is written."""
+        self.exports.join()
+
+    def _export_worker(self):
+        while True:
+            function, args = self.exports.get()
+            try:
+                function(*args)
+            except Exception as e:
+                print(f"Export failed: {e}")
+            finally:
+                self.exports.task_done()
+
+    def _write_wave(self, wav, sr, path):
+        sf.write(path, wav, sr)
+        print(f"Audio file saved as {path}")
+
+    def _render_spectrogram(self, spect, path):
+        # Object-oriented matplotlib, pyplot is not safe outside of the main thread
+        figure = Figure(figsize=(12, 4))
+        axes = figure.subplots()
+        image = axes.imshow(spect, origin="lower", aspect="auto")
+        figure.colorbar(image)
+        figure.savefig(path)
 
 
 if __name__ == "__main__":
-    voice = Akira_Talk()
+    voice = Akira_Talk(save_audio=True, save_spectrogram=True)
 
-    voice.speak(
+    wav, sr = voice.speak(
         gen_text="I would love to be cat. Real bad, you know!",
         play=True
         )
+    print(f"{len(wav) / sr:.2f}s of speech at {sr} Hz")
+    voice.wait_exports()
         
             
@@ -0,0 +1,175 @@
+import collections
+import threading
+import math
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pacing import RatePacer
+from tracing import tracer
+
+
+# Progress (0..1) -> eased progress (0..1)
+EASINGS = {
+    "linear": lambda s: s,
+    "ease_in": lambda s: s * s,
+    "ease_out": lambda s: 1 - (1 - s) * (1 - s),
+    "ease_in_out": lambda s: 0.5 - 0.5 * math.cos(math.pi * s),
+    # Minimum jerk profile, the smoothest start and stop
+    "min_jerk": lambda s: s ** 3 * (10 - 15 * s + 6 * s * s),
+}
+
+
+class Motion:
+    """Handle of a `move`: done() is set once every servo of the move reached its target (or was overridden)."""
+    def __init__(self, count):
+        self.remaining = count
+        self.event = threading.Event()
+        if count == 0:
+            self.event.set()
+
+    def _servo_finished(self):
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.event.set()
+
+    def done(self):
+        return self.event.is_set()
+
+    def wait(self, timeout=None):
+        return self.event.wait(timeout)
+
+
+class Trajectory:
+    def __init__(self, arduino, servo_name, servo_index, start, target, start_time, duration, easing, motion):
+        self.arduino = arduino
+        self.servo_name = servo_name
+        self.servo_index = servo_index
+        self.start = start
+        self.target = target
+        self.start_time = start_time
+        self.duration = duration
+        self.easing = EASINGS[easing]
+        self.motion = motion
+        self.last_sent = int(round(start))
+
+    def angle_at(self, t):
+        if self.duration <= 0:
+            return self.target
+        s = min(max((t - self.start_time) / self.duration, 0.0), 1.0)
+        return self.start + (self.target - self.start) * self.easing(s)
+
+    def finished(self, t):
+        return t - self.start_time >= self.duration
+
+
+class TrajectoryScheduler:
+    """
+    Moves servos along trajectories (target + duration + easing profile)
+    instead of callers sleeping between hand-made intermediate steps.
+
+    A single thread samples every active trajectory at `rate` Hz and emits,
+    per Arduino, one synchronized pose with the servos whose angle changed
+    (MotionController.send_pose, one batched frame with the pipelined
+    protocol). Servos moved together, even on both Arduinos, start and
+    arrive together. A new trajectory, or a direct send_command, for a servo
+    replaces the trajectory it was following.
+    """
+    def __init__(self, motion_controller, rate=50.0):
+        self.motion_controller = motion_controller
+        self.pacer = RatePacer(rate)
+        self.trajectories = collections.OrderedDict()  # (arduino, servo_name) -> Trajectory
+        self.condition = threading.Condition()
+
+        self.poses = 0
+        self.servo_updates = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="trajectory_scheduler", daemon=True)
+        self.thread.start()
+
+    def move(self, targets, duration=1.0, easing="ease_in_out"):
+        """
+        Starts moving servos from their current position to their target.
+
+        Args:
+            targets: {arduino: {servo_name: angle}}.
+            duration: Seconds to reach the targets.
+            easing: One of EASINGS.
+
+        Returns:
+            A Motion, to wait for the end of the move.
+        """
+        if easing not in EASINGS:
+            raise ValueError(f"Unknown easing: {easing}")
+
+        servos = [(arduino, servo_name, angle) for arduino, poses in targets.items() for servo_name, angle in poses.items()]
+        motion = Motion(len(servos))
+        start_time = time.monotonic()
+
+        with self.condition:
+            for arduino, servo_name, angle in servos:
+                servo_index, _, min_pos, max_pos, current = self.motion_controller.get_servo_positions(servo_name, arduino)
+                target = max(min_pos, min(angle, max_pos))
+                self._cancel((arduino, servo_name))
+                self.trajectories[(arduino, servo_name)] = Trajectory(
+                    arduino, servo_name, servo_index, float(current), float(target), start_time, duration, easing, motion)
+            self.condition.notify()
+        return motion
+
+    def cancel(self, arduino, servo_name):
+        """Stops the trajectory of a servo, where it is."""
+        with self.condition:
+            self._cancel((arduino, servo_name))
+
+    def _cancel(self, key):
+        trajectory = self.trajectories.pop(key, None)
+        if trajectory is not None:
+            trajectory.motion._servo_finished()
+
+    def is_moving(self):
+        with self.condition:
+            return bool(self.trajectories)
+
+    def stop(self):
+        with self.condition:
+            for key in list(self.trajectories):
+                self._cancel(key)
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.trajectories:
+                    self.condition.wait_for(lambda: self.trajectories or not self.running)
+                    self.pacer.reset()
+                if not self.running:
+                    break
+
+            self.pacer.wait()
+            with tracer.span("trajectory.tick"):
+                self.tick(time.monotonic())
+
+    def tick(self, now):
+        poses = collections.defaultdict(list)
+        with self.condition:
+            for key, trajectory in list(self.trajectories.items()):
+                angle = int(round(trajectory.angle_at(now)))
+                if angle != trajectory.last_sent:
+                    poses[trajectory.arduino].append((trajectory.servo_name, angle))
+                    trajectory.last_sent = angle
+                if trajectory.finished(now):
+                    self._cancel(key)
+
+        for arduino, pose in poses.items():
+            self.motion_controller.send_pose(arduino, pose)
+            self.poses += 1
+            self.servo_updates += len(pose)
+
+    def stats(self):
+        stats = self.pacer.stats()
+        stats.update({"poses": self.poses, "servo_updates": self.servo_updates})
+        return stats
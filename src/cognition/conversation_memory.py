@@ -0,0 +1,125 @@
+import threading
+
+
+class ConversationMemory:
+    """
+    Keeps the prompt sent to the LLM roughly constant in size during a long
+    conversation.
+
+    The system prompt and the last `keep_turns` turns are kept verbatim, older
+    turns are folded into a running summary by `summarize_fn` in a background
+    thread (once Akira has answered, so never while a reply is being generated).
+    Vision captions are only kept for the latest user message, since older ones
+    describe a scene that is no longer there.
+
+    Args:
+        system_prompt: Akira's system prompt, always the first message.
+        summarize_fn: Callable (summary, turns) -> new summary, where turns is a
+            list of (user_text, assistant_text). If None, old turns are dropped.
+        token_budget: Approximate maximum number of tokens of the whole prompt.
+        keep_turns: Maximum number of turns kept verbatim.
+        fold_to: Number of turns left once folding starts (defaults to
+            keep_turns). Folding several turns at once changes the summary, and
+            so the prompt prefix the server has cached, less often.
+        chars_per_token: Used to estimate token counts without a tokenizer.
+    """
+    def __init__(self, system_prompt, summarize_fn=None, token_budget=2048, keep_turns=4, fold_to=None, chars_per_token=4):
+        self.system_prompt = system_prompt
+        self.summarize_fn = summarize_fn
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.fold_to = keep_turns if fold_to is None else min(fold_to, keep_turns)
+        self.chars_per_token = chars_per_token
+
+        self.summary = ""
+        self.turns = []  # [{"user": str, "description": str or None, "assistant": str or None}]
+        self.to_summarize = []
+
+        self.lock = threading.Lock()
+        self.summarizing = False
+
+    def add_user(self, user_input, description=None):
+        with self.lock:
+            self.turns.append({"user": user_input, "description": description, "assistant": None})
+
+    def add_assistant(self, response):
+        with self.lock:
+            if not self.turns or self.turns[-1]["assistant"] is not None:
+                self.turns.append({"user": None, "description": None, "assistant": response})
+            else:
+                self.turns[-1]["assistant"] = response
+            self._fold_old_turns()
+        self._start_summarizing()
+
+    def messages(self):
+        """The list of messages to send to the LLM."""
+        with self.lock:
+            return self._build_messages(self.turns)
+
+    def estimate_tokens(self, messages=None):
+        if messages is None:
+            messages = self.messages()
+        return sum(len(message["content"]) for message in messages) // self.chars_per_token + 4 * len(messages)
+
+    def reset(self):
+        with self.lock:
+            self.summary = ""
+            self.turns = []
+            self.to_summarize = []
+
+    def _build_messages(self, turns):
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the conversation so far: {self.summary}"})
+
+        for i, turn in enumerate(turns):
+            if turn["user"] is not None:
+                content = turn["user"]
+                # Only the latest caption describes what Akira is seeing now
+                if i == len(turns) - 1 and turn["description"]:
+                    content = f"{content}\n[Context: Akira is currently seeing: {turn['description']}]"
+                messages.append({"role": "user", "content": content})
+            if turn["assistant"] is not None:
+                messages.append({"role": "assistant", "content": turn["assistant"]})
+        return messages
+
+    def _over_budget(self):
+        return self.estimate_tokens(self._build_messages(self.turns)) > self.token_budget
+
+    def _fold_old_turns(self):
+        # Called with the lock held. The latest turn is never folded.
+        if len(self.turns) <= self.keep_turns and not self._over_budget():
+            return
+        while len(self.turns) > 1 and (len(self.turns) > self.fold_to or self._over_budget()):
+            turn = self.turns.pop(0)
+            self.to_summarize.append((turn["user"] or "", turn["assistant"] or ""))
+
+    def _start_summarizing(self):
+        with self.lock:
+            if self.summarize_fn is None:
+                self.to_summarize = []
+                return
+            if self.summarizing or not self.to_summarize:
+                # A running thread picks up the new turns when it is done
+                return
+            self.summarizing = True
+        threading.Thread(target=self._summarize_pending, daemon=True).start()
+
+    def _summarize_pending(self):
+        while True:
+            with self.lock:
+                turns = self.to_summarize
+                self.to_summarize = []
+                summary = self.summary
+                if not turns:
+                    self.summarizing = False
+                    return
+
+            try:
+                new_summary = self.summarize_fn(summary, turns)
+            except Exception as e:
+                print(f"Error summarizing the conversation: {e}")
+                new_summary = summary
+
+            with self.lock:
+                self.summary = new_summary.strip()
@@ -1,10 +1,102 @@
-import ollama
-import subprocess
+import argparse
+import time
+import sys
+import os
+import re
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tracing import tracer
+
+try:
+    from cognition.conversation_memory import ConversationMemory
+    from cognition.llm_backends import BackendPool, OllamaBackend, StubOllamaServer
+except ModuleNotFoundError:
+    from conversation_memory import ConversationMemory
+    from llm_backends import BackendPool, OllamaBackend, StubOllamaServer
+
+class SentenceSplitter:
+    """
+    Cuts a stream of tokens into sentences as soon as they are closed, so
+    they can be spoken while the rest of the answer is still being generated.
+
+    Args:
+        min_clause_chars: If set, a clause ending in , ; or : also closes a
+            segment once it is at least this many characters long.
+    """
+    SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+    CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+    ABBREVIATIONS = ("Mr.", "Mrs.", "Ms.", "Dr.", "St.", "e.g.", "i.e.", "vs.")
+
+    def __init__(self, min_clause_chars=None):
+        self.min_clause_chars = min_clause_chars
+        self.buffer = ""
+
+    def feed(self, token):
+        """Add a token and return the list of segments it closed (possibly empty)."""
+        self.buffer += token
+        segments = []
+        while True:
+            boundary = self._next_boundary()
+            if boundary is None:
+                break
+            segment = self.buffer[:boundary.start()].strip()
+            self.buffer = self.buffer[boundary.end():]
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self):
+        """Return whatever is left once the stream has ended."""
+        segment = self.buffer.strip()
+        self.buffer = ""
+        return [segment] if segment else []
+
+    def _next_boundary(self):
+        sentence_end = None
+        for match in self.SENTENCE_END.finditer(self.buffer):
+            if not self.buffer[:match.start()].endswith(self.ABBREVIATIONS):
+                sentence_end = match
+                break
+
+        if self.min_clause_chars is not None:
+            for match in self.CLAUSE_END.finditer(self.buffer):
+                if sentence_end is not None and match.start() > sentence_end.start():
+                    break
+                if match.start() >= self.min_clause_chars:
+                    return match
+
+        return sentence_end
+
 
 class Akira_Chat:
-    def __init__(self, model_name="llama3.2:3b", prompt="philosophical"):
+    def __init__(
+        self,
+        model_name="llama3.2:3b",
+        prompt="philosophical",
+        token_budget=2048,
+        keep_turns=4,
+        keep_alive=-1,
+        num_ctx=4096,
+        backend=None,
+        health_check_interval=30.0
+        ):
         self.model_name = model_name
 
+        # Any LLMBackend (see llm_backends.py); by default Ollama in its jetson container.
+        # It runs inside a BackendPool, which restarts it when a request fails and,
+        # every `health_check_interval` seconds, checks that it still answers.
+        if backend is None:
+            backend = OllamaBackend(model_name)
+        if not isinstance(backend, BackendPool):
+            backend = BackendPool([backend], health_check_interval=health_check_interval)
+        self.backend = backend
+
+        # Session mode: the model stays loaded between turns (-1 = forever) and every
+        # request uses the same options, so Ollama never reloads it and can reuse the
+        # KV cache of the system prompt, which is always the first message.
+        self.keep_alive = keep_alive
+        self.options = {"num_ctx": num_ctx}
+
         if prompt == "default":
             self.akira_prompt = """
             You are Akira, a humanoid robot. Your body is part of the open-source InMoov Project by Gael Langevin, a French sculptor and designer.
@@ -56,63 +148,144 @@ class Akira_Chat:
             - Do NOT explicitly define humanity; focus on learning from the person's perspective.
             - Do NOT use parentheses, **, or other formatting symbols—respond ONLY with plain text."""
         
-        self.tag = None
-        self.container_id = None
-        
-        self.messages = [{"role": "system", "content": self.akira_prompt}]
+        self.memory = ConversationMemory(
+            self.akira_prompt,
+            summarize_fn=self.summarize,
+            token_budget=token_budget,
+            keep_turns=keep_turns,
+            fold_to=max(1, keep_turns // 2)
+            )
 
-    def generate_response(self, user_input, description=None):
-        if description and isinstance(description, str):
-            user_input = f"{user_input}\n[Context: Akira is currently seeing: {description}]"
+    @property
+    def messages(self):
+        return self.memory.messages()
+
+    def add_user_message(self, user_input, description=None):
+        if not (description and isinstance(description, str)):
+            description = None
             
-        self.messages.append({"role": "user", "content": user_input})
+        self.memory.add_user(user_input, description)
+
+    def chat(self, messages, stream=False, **options):
+        """Chat request to the backend with the session keep-alive and options."""
+        return self.backend.chat(
+            messages,
+            stream=stream,
+            keep_alive=self.keep_alive,
+            options={**self.options, **options}
+            )
+
+    def warm_up(self, timeout=120):
+        """
+        Loads the model and prefills the system prompt so the first visitor
+        does not pay for it. Retries while the model is still being pulled or loaded.
+        """
+        deadline = time.time() + timeout
+        while True:
+            try:
+                start = time.time()
+                self.chat([{"role": "system", "content": self.akira_prompt}], num_predict=1)
+                print(f"Ollama model {self.model_name} warmed up in {time.time() - start:.2f}s")
+                return True
+            except Exception as e:
+                if time.time() > deadline:
+                    print(f"Error warming up Ollama: {e}")
+                    return False
+                time.sleep(1)
+
+    def summarize(self, summary, turns):
+        """Folds `turns` [(user, akira), ...] into the running `summary` of the conversation."""
+        transcript = "\n".join(f"Visitor: {user}\nAkira: {akira}" for user, akira in turns)
+        prompt = (
+            "Update the summary of a conversation between Akira, a humanoid robot, and a visitor. "
+            "Keep names, facts about the visitor and open questions. Answer with the summary only, "
+            "in at most 80 words.\n\n"
+            f"Current summary: {summary or 'None'}\n\nNew exchanges:\n{transcript}"
+            )
+        # Starting with the system prompt keeps its cached prefix valid for the next turn
+        response = self.chat(
+            [{"role": "system", "content": self.akira_prompt}, {"role": "user", "content": prompt}],
+            num_predict=160
+            )
+        return response["message"]["content"]
+
+    @tracer.trace("generate_response")
+    def generate_response(self, user_input, description=None):
+        self.add_user_message(user_input, description)
         
-        response = ollama.chat(model=self.model_name, messages=self.messages)
+        response = self.chat(self.messages)
         
-        akira_response = {"role": "assistant", "content": response["message"]["content"]}
-        self.messages.append(akira_response)
-        return akira_response["content"]
+        akira_response = response["message"]["content"]
+        self.memory.add_assistant(akira_response)
+        return akira_response
 
-    def start_ollama(self):
-        if self.tag is None and self.container_id is None:            
-            try:
-                self.tag = subprocess.check_output("autotag ollama", shell=True, text=True).strip()
+    def generate_response_stream(self, user_input, description=None, on_token=None, on_sentence=None, min_clause_chars=None):
+        """
+        Same as generate_response, but yields the reply token by token while
+        Ollama is still generating it. The full reply is added to the history
+        once the stream is exhausted.
 
-                # Start the container in detached mode (background)
-                subprocess.run(f"jetson-containers run -d {self.tag}", shell=True, check=True)
+        Args:
+            on_token: Optional callable run with every token as it arrives.
+            on_sentence: Optional callable run with every sentence (or clause,
+                see SentenceSplitter) as soon as it is closed.
+            min_clause_chars: Passed to SentenceSplitter.
+        """
+        self.add_user_message(user_input, description)
+        splitter = SentenceSplitter(min_clause_chars=min_clause_chars)
 
-                # Get the actual running container ID
-                self.container_id = subprocess.check_output(f"docker ps -q --filter ancestor={self.tag}", shell=True, text=True).strip()
+        tokens = []
+        with tracer.span("generate_response"):
+            for chunk in self.chat(self.messages, stream=True):
+                token = chunk["message"]["content"]
+                if not token:
+                    continue
+                if not tokens:
+                    tracer.instant("llm.first_token")
+                tokens.append(token)
 
-                if not self.container_id:
-                    print("Error: Could not retrieve the running container ID.")
-                    return
-                
-                print(f"Successfully started Ollama with tag: {self.tag}, Container ID: {self.container_id}")
-                
-            except subprocess.CalledProcessError as e:
-                print(f"Error starting the container: {e}")            
+                if on_token is not None:
+                    on_token(token)
+                if on_sentence is not None:
+                    for sentence in splitter.feed(token):
+                        on_sentence(sentence)
+                yield token
+
+            if on_sentence is not None:
+                for sentence in splitter.flush():
+                    on_sentence(sentence)
+
+        self.memory.add_assistant("".join(tokens))
+
+    def generate_sentence_stream(self, user_input, description=None, on_token=None, min_clause_chars=None):
+        """Yields the reply sentence by sentence (or clause by clause) as soon as each one is closed."""
+        splitter = SentenceSplitter(min_clause_chars=min_clause_chars)
+        for token in self.generate_response_stream(user_input, description, on_token=on_token):
+            yield from splitter.feed(token)
+        yield from splitter.flush()
+
+    def start_ollama(self):
+        """Starts the LLM backend (if needed), waits until it answers and warms the model up."""
+        if self.backend.start() is False:
+            print("Error: the LLM backend could not be started.")
+            return
+        self.warm_up()
 
     def stop_ollama(self):
-        if self.container_id:
-            try:
-                # Split multiple container IDs (if any)
-                container_ids = self.container_id.split()
-                
-                for container_id in container_ids:
-                    print(f"Stopping Ollama container: {container_id}")
-                    subprocess.run(f"docker stop {container_id}", shell=True, check=True)
-                    
-                print(f"Successfully stopped all Ollama containers.")
-                self.container_id = None  # Reset container ID after stopping
-                    
-            except subprocess.CalledProcessError as e:
-                print(f"Error stopping the container: {e}")
+        self.backend.stop()
+        print("LLM backend stopped.")
 
-    
 
 if __name__ == "__main__":
-    chat = Akira_Chat()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stub", action="store_true", help="talk to a local stub server instead of Ollama")
+    args = parser.parse_args()
+
+    if args.stub:
+        stub = StubOllamaServer().start()
+        chat = Akira_Chat(backend=OllamaBackend(host=stub.host, container=False))
+    else:
+        chat = Akira_Chat()
     chat.start_ollama()
     
     while True:
@@ -122,5 +295,5 @@ if __name__ == "__main__":
             break
         else:
             description = "a man standing in a room"
-            response = chat.generate_response(user_input, description)
-            print("Akira: ", response)
+            for sentence in chat.generate_sentence_stream(user_input, description):
+                print("Akira: ", sentence)
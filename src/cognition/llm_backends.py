@@ -0,0 +1,375 @@
+import http.server
+import subprocess
+import abc
+import threading
+import requests
+import json
+import time
+
+from requests.adapters import HTTPAdapter
+
+
+class LLMBackend(abc.ABC):
+    """
+    A local LLM server Akira_Chat can talk to.
+
+    `chat` follows the Ollama chat API: it returns {"message": {"content": ...}}
+    or, with stream=True, an iterator of such chunks.
+    """
+    name = "backend"
+
+    @abc.abstractmethod
+    def start(self):
+        """Starts the backend if needed; returns False if it could not be started."""
+
+    def stop(self):
+        pass
+
+    @abc.abstractmethod
+    def is_ready(self):
+        """True when the backend answers requests."""
+
+    @abc.abstractmethod
+    def chat(self, messages, stream=False, keep_alive=None, options=None):
+        """Chat request, see the class docstring for the response format."""
+
+    def wait_until_ready(self, timeout=120, interval=0.5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_ready():
+                return True
+            time.sleep(interval)
+        return self.is_ready()
+
+    def restart(self):
+        print(f"Restarting {self.name}...")
+        self.stop()
+        self.start()
+
+
+class OllamaBackend(LLMBackend):
+    """
+    Ollama over HTTP, through one pooled keep-alive session instead of a new
+    connection per request.
+
+    Args:
+        model_name: Model served by Ollama.
+        host: URL of the Ollama server.
+        container: If True, `start` launches the jetson-containers Ollama image
+            when no server answers, and `stop` stops the container it started.
+        ready_timeout: Seconds to wait for the server to answer after starting it.
+    """
+    name = "ollama"
+
+    def __init__(self, model_name="llama3.2:3b", host="http://localhost:11434", container=True, ready_timeout=120):
+        self.model_name = model_name
+        self.host = host.rstrip("/")
+        self.container = container
+        self.ready_timeout = ready_timeout
+
+        self.tag = None
+        self.container_id = None
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+    def is_ready(self):
+        try:
+            return self.session.get(f"{self.host}/api/version", timeout=1).ok
+        except requests.RequestException:
+            return False
+
+    def start(self):
+        if self.is_ready():
+            return True
+
+        if self.container and self.container_id is None:
+            try:
+                self.tag = subprocess.check_output(["autotag", "ollama"], text=True).strip()
+
+                # Start the container in detached mode (background)
+                subprocess.run(["jetson-containers", "run", "-d", self.tag], check=True)
+
+                # Get the actual running container ID
+                self.container_id = subprocess.check_output(
+                    ["docker", "ps", "-q", "--filter", f"ancestor={self.tag}"], text=True
+                    ).strip() or None
+            except (subprocess.CalledProcessError, FileNotFoundError) as e:
+                print(f"Error starting the container: {e}")
+                return False
+
+            if self.container_id is None:
+                print("Error: Could not retrieve the running container ID.")
+                return False
+
+        if not self.wait_until_ready(self.ready_timeout):
+            print(f"Error: Ollama is not answering on {self.host}")
+            return False
+
+        print(f"Ollama is ready on {self.host} (tag: {self.tag}, container ID: {self.container_id})")
+        return True
+
+    def stop(self):
+        if self.container_id:
+            # Split multiple container IDs (if any)
+            for container_id in self.container_id.split():
+                print(f"Stopping Ollama container: {container_id}")
+                try:
+                    subprocess.run(["docker", "stop", container_id], check=True)
+                except subprocess.CalledProcessError as e:
+                    print(f"Error stopping the container: {e}")
+            self.container_id = None
+
+    def chat(self, messages, stream=False, keep_alive=None, options=None):
+        payload = {"model": self.model_name, "messages": messages, "stream": stream}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+
+        response = self.session.post(f"{self.host}/api/chat", json=payload, stream=stream, timeout=(2, 300))
+        response.raise_for_status()
+        if not stream:
+            return response.json()
+        return self._iter_chunks(response)
+
+    @staticmethod
+    def _iter_chunks(response):
+        with response:
+            for line in response.iter_lines():
+                if line:
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(chunk["error"])
+                    yield chunk
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    In-process llama.cpp (llama-cpp-python) on a GGUF file: no server, no HTTP.
+
+    Args:
+        model_path: Path to the GGUF model.
+        n_ctx: Context length.
+        n_gpu_layers: Layers offloaded to the GPU (-1 = all).
+    """
+    name = "llama.cpp"
+
+    def __init__(self, model_path, n_ctx=4096, n_gpu_layers=-1, verbose=False):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_gpu_layers = n_gpu_layers
+        self.verbose = verbose
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.llm is None:
+            from llama_cpp import Llama
+
+            self.llm = Llama(
+                model_path=self.model_path,
+                n_ctx=self.n_ctx,
+                n_gpu_layers=self.n_gpu_layers,
+                verbose=self.verbose
+                )
+        return True
+
+    def stop(self):
+        self.llm = None
+
+    def is_ready(self):
+        return self.llm is not None
+
+    def chat(self, messages, stream=False, keep_alive=None, options=None):
+        # keep_alive is meaningless here: the model lives as long as this object
+        options = options or {}
+        kwargs = {"messages": messages, "stream": stream}
+        if "num_predict" in options:
+            kwargs["max_tokens"] = options["num_predict"]
+        for key in ("temperature", "top_p", "top_k", "seed"):
+            if key in options:
+                kwargs[key] = options[key]
+
+        if not stream:
+            with self.lock:
+                completion = self.llm.create_chat_completion(**kwargs)
+            return {"message": {"role": "assistant", "content": completion["choices"][0]["message"]["content"]}}
+        return self._iter_chunks(kwargs)
+
+    def _iter_chunks(self, kwargs):
+        with self.lock:
+            for chunk in self.llm.create_chat_completion(**kwargs):
+                token = chunk["choices"][0]["delta"].get("content", "")
+                yield {"message": {"role": "assistant", "content": token}, "done": False}
+        yield {"message": {"role": "assistant", "content": ""}, "done": True}
+
+
+class BackendPool(LLMBackend):
+    """
+    Health-checked list of backends, in order of preference.
+
+    Requests go to the first backend that is ready. A failed request is
+    retried once (after restarting the backend if it is down), then the next
+    backend is used. With `health_check_interval`, a background thread probes
+    the active backend and restarts it when it stops answering.
+    """
+    name = "pool"
+
+    def __init__(self, backends, health_check_interval=None):
+        self.backends = list(backends)
+        self.active = None
+        self.health_check_interval = health_check_interval
+        self.watching = False
+        self.watchdog_thread = None
+
+    def start(self):
+        for backend in self.backends:
+            try:
+                if backend.start() is not False and backend.is_ready():
+                    self.active = backend
+                    break
+            except Exception as e:
+                print(f"Error starting {backend.name}: {e}")
+
+        if self.active is None:
+            print("Error: no LLM backend could be started.")
+            return False
+
+        if self.health_check_interval and self.watchdog_thread is None:
+            self.watching = True
+            self.watchdog_thread = threading.Thread(target=self._watch, daemon=True)
+            self.watchdog_thread.start()
+        return True
+
+    def stop(self):
+        self.watching = False
+        if self.watchdog_thread is not None:
+            self.watchdog_thread.join()
+            self.watchdog_thread = None
+        for backend in self.backends:
+            backend.stop()
+        self.active = None
+
+    def is_ready(self):
+        return self.active is not None and self.active.is_ready()
+
+    def chat(self, messages, stream=False, keep_alive=None, options=None):
+        if self.active is None:
+            self.start()
+
+        for backend in self._failover_order():
+            for attempt in range(2):
+                try:
+                    response = backend.chat(messages, stream=stream, keep_alive=keep_alive, options=options)
+                    self.active = backend
+                    return response
+                except Exception as e:
+                    print(f"Error from {backend.name}: {e}")
+                    # A timeout or a bad response is retried as is; restarting (e.g. the Ollama
+                    # container, and the model loaded in it) is only for a backend that is down
+                    if attempt == 0 and not backend.is_ready():
+                        backend.restart()
+        raise RuntimeError("No LLM backend is answering.")
+
+    def _failover_order(self):
+        if self.active is None:
+            return self.backends
+        return [self.active] + [backend for backend in self.backends if backend is not self.active]
+
+    def _watch(self):
+        while self.watching:
+            time.sleep(self.health_check_interval)
+            if self.watching and self.active is not None and not self.active.is_ready():
+                print(f"{self.active.name} is not answering.")
+                self.active.restart()
+
+
+class StubOllamaServer:
+    """
+    Tiny local server speaking the subset of the Ollama API used by Akira
+    (/api/version, /api/tags, /api/chat), answering with a canned reply.
+    Useful to run the dialogue code without a GPU or a model.
+
+    Args:
+        reply: Text returned to every chat request.
+        token_delay: Seconds between streamed tokens, to mimic generation speed.
+        port: 0 picks a free port, see `host`.
+    """
+    def __init__(self, reply="Hello, I am Akira. What is your name?", token_delay=0.02, port=0):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.requests = []
+
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, body):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "stub"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": []})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append(request)
+
+                if not request.get("stream", True):
+                    self._send_json({"message": {"role": "assistant", "content": stub.reply}, "done": True})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in stub.tokens():
+                    self._send_chunk({"message": {"role": "assistant", "content": token}, "done": False})
+                    time.sleep(stub.token_delay)
+                self._send_chunk({"message": {"role": "assistant", "content": ""}, "done": True})
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _send_chunk(self, body):
+                data = json.dumps(body).encode() + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread = None
+
+    @property
+    def host(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tokens(self):
+        words = self.reply.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,192 @@
+import threading
+import queue
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tracing import tracer
+
+
+class TurnTimeline:
+    """
+    Monotonic timestamps (in seconds since the start of the turn) for every
+    stage of a conversation turn. Only the first time a stage is reached is kept.
+    Every stage also shows up as an instant event in the session trace.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = {}
+        self.lock = threading.Lock()
+
+    def mark(self, stage):
+        with self.lock:
+            if stage in self.marks:
+                return
+            self.marks[stage] = time.perf_counter() - self.start
+        tracer.instant(f"turn.{stage}")
+
+    def get(self, stage):
+        return self.marks.get(stage)
+
+    def time_to_first_audio(self):
+        return self.get("first_audio")
+
+    def summary(self):
+        with self.lock:
+            stages = sorted(self.marks.items(), key=lambda item: item[1])
+        return "\n".join(f"{elapsed:8.3f}s  {stage}" for stage, elapsed in stages)
+
+
+class TurnPipeline:
+    """
+    Runs a conversation turn with its stages overlapped instead of one after the other:
+
+    - the scene is captioned by BLIP in the background while the visitor is still being listened to,
+    - the LLM reply is streamed sentence by sentence (first clauses are cut early),
+    - every finished sentence is cloned by F5-TTS while the next ones are still being generated,
+    - synthesized sentences are queued on the audio output with jaw sync, in order, as soon as they are
+      ready, and played back to back.
+    """
+    def __init__(self, listener, vision, chat, voice, motion_controller, min_clause_chars=40, caption_interval=3.0, caption_max_age=10.0, caption_wait=2.0):
+        self.listener = listener
+        self.vision = vision
+        self.chat = chat
+        self.voice = voice
+        self.motion_controller = motion_controller
+        self.min_clause_chars = min_clause_chars
+        self.caption_interval = caption_interval
+        self.caption_max_age = caption_max_age
+        self.caption_wait = caption_wait
+
+        self.timeline = None
+        self.description = None
+
+    def listen(self):
+        """Listen to the visitor while the scene is captioned in the background."""
+        self.timeline = TurnTimeline()
+        self.description = None
+
+        self.vision.start_background_captioning(interval=self.caption_interval)
+        try:
+            user_input = self.listener.recognize_speech()
+        finally:
+            self.vision.pause_background_captioning()
+        self.timeline.mark("asr_done")
+        return user_input
+
+    def _look(self):
+        image_input = self.vision.take_photo()
+        self.timeline.mark("photo_done")
+        if image_input is None:
+            return
+
+        self.description = self.vision.describe_what_akira_sees(
+            image_input=image_input,
+            eliminate_photo=False,
+            annotate_photo=True
+            )
+        self.timeline.mark("caption_done")
+
+    def respond(self, user_input, on_first_audio=None):
+        """
+        Stream the answer to `user_input` into speech.
+
+        Args:
+            user_input: Transcript returned by `listen`.
+            on_first_audio: Optional callable run right before the first sentence is played.
+
+        Returns:
+            The full text of Akira's answer.
+        """
+        self.description = self.vision.current_description(max_age=self.caption_max_age)
+        if self.description is None and self.vision.wait_background_caption(self.caption_wait):
+            # A caption was still running (e.g. a very short utterance): use it rather than
+            # starting a second one next to it on the GPU
+            self.description = self.vision.current_description(max_age=self.caption_max_age)
+        if self.description is not None:
+            tracer.instant("caption.precomputed")
+        else:
+            # Nothing captioned during listening (e.g. a very short utterance)
+            self._look()
+        self.timeline.mark("caption_ready")
+
+        sentences = queue.Queue()
+        clips = queue.Queue()
+
+        tts_thread = threading.Thread(target=self._synthesize, args=(sentences, clips), daemon=True)
+        playback_thread = threading.Thread(target=self._play, args=(clips, on_first_audio), daemon=True)
+        tts_thread.start()
+        playback_thread.start()
+
+        def on_token(token):
+            self.timeline.mark("llm_first_token")
+
+        spoken = []
+        try:
+            for sentence in self.chat.generate_sentence_stream(
+                user_input,
+                self.description,
+                on_token=on_token,
+                min_clause_chars=self.min_clause_chars
+                ):
+                self.timeline.mark("first_sentence")
+                spoken.append(sentence)
+                sentences.put(sentence)
+            self.timeline.mark("llm_done")
+        finally:
+            sentences.put(None)
+
+        tts_thread.join()
+        playback_thread.join()
+        self.timeline.mark("turn_done")
+
+        tracer.record("turn", self.timeline.start, time.perf_counter())
+        if self.timeline.time_to_first_audio() is not None:
+            tracer.observe("turn.time_to_first_audio", self.timeline.time_to_first_audio())
+
+        return " ".join(spoken)
+
+    def _sentence_path(self, index):
+        root, ext = os.path.splitext(self.voice.output_path)
+        return f"{root}_{index}{ext}"
+
+    def _synthesize(self, sentences, clips):
+        index = 0
+        try:
+            while True:
+                sentence = sentences.get()
+                if sentence is None:
+                    break
+
+                self.timeline.mark("tts_start")
+                # In memory, the path is only used if the voice exports its WAVs
+                audio = self.voice.speak(sentence, output_path=self._sentence_path(index))
+                self.timeline.mark(f"tts_done[{index}]")
+
+                if audio is not None:
+                    clips.put(audio)
+                index += 1
+        finally:
+            clips.put(None)
+
+    def _play(self, clips, on_first_audio):
+        first = True
+        clip = None
+        while True:
+            audio = clips.get()
+            if audio is None:
+                break
+
+            if first:
+                if on_first_audio is not None:
+                    on_first_audio()
+                self.timeline.mark("first_audio")
+                first = False
+
+            # Queued behind the sentence being played: no gap between sentences synthesized in time
+            wav, sr = audio
+            clip = self.motion_controller.play_with_jaw(wav, sr, wait=False)
+
+        if clip is not None:
+            clip.wait()
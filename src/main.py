@@ -7,9 +7,13 @@ import random
 from perception.listening import Akira_Listen
 from perception.vision import Akira_See
 from cognition.dialogue_manager import Akira_Chat
+from cognition.turn_pipeline import TurnPipeline
 from action.speech_synthesis import Akira_Talk
 from action.motion_controller import MotionController
 from action.music_manager import MusicPlayer
+from action.audio_output import audio_output
+from perception.camera_service import camera_service
+from tracing import tracer
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "action"))
 
@@ -65,7 +69,7 @@ def stop_looking_at(akira_vision, looking_at_thread):
     looking_at_thread.join()
     
 def main():
-    listener = Akira_Listen()
+    listener = Akira_Listen(streaming=True)
     mics = listener.list_microphones()
     mic_index = None
     for mic_name, mic_idx in mics.items():
@@ -87,6 +91,8 @@ def main():
 
     music_player = MusicPlayer()
 
+    turn = TurnPipeline(listener, akira_vision, chat, voice, mc)
+
     blinking_thread = start_blinking(mc)
     moving_hands_rand_thread = start_moving_hands_rand(mc)
     moving_arms_rand_thread = start_moving_arms_rand(mc)
@@ -102,16 +108,14 @@ def main():
             mc.arms_rest()
             looking_at_thread = start_looking_at(akira_vision)
             
-            user_input = listener.recognize_speech()
+            # The photo is taken and described while Akira is listening
+            user_input = turn.listen()
             if user_input:
                 # Akira asks for confirmation: or says something by default
                 print("User:", user_input)
                 if "exit" in user_input.lower():
                     break
 
-                # Take a photo of what is happening
-                image_input = akira_vision.take_photo()
-
                 # Akira will appear to be thinking while we generate an answer
                 stop_blinking(mc, blinking_thread)
                 stop_looking_at(akira_vision, looking_at_thread)
@@ -123,26 +127,26 @@ def main():
                 moving_arms_rand_thread = start_moving_arms_rand(mc)
                 moving_head_rand_thread = start_moving_head_rand(mc)
 
-                # Get a description ow fhat is happening
-                description = akira_vision.describe_what_akira_sees(
-                    image_input=image_input,
-                    eliminate_photo=False,
-                    annotate_photo=True
-                    )
-
-                response = chat.generate_response(user_input, description) # generates text to speak
+                def stop_thinking():
+                    nonlocal blinking_thread
+                    music_player.stop_music()
+
+                    # Akira stops thinking mode
+                    mc.akira_open_eyes()
+                    blinking_thread = start_blinking(mc)
+                    mc.akira_half_close_hand("left")
+                    mc.akira_half_close_hand("right")
+
+                # Sentences are cloned and spoken (with jaw sync) while the rest of the answer is generated
+                response = turn.respond(user_input, on_first_audio=stop_thinking)
+                if turn.timeline.time_to_first_audio() is None:
+                    # Nothing was spoken, Akira still has to leave thinking mode
+                    stop_thinking()
                 print("Akira:", response)
-                voice.speak(response) # clones the voice
-
-                music_player.stop_music()
-                
-                # Akira stops thinking mode
-                mc.akira_open_eyes()
-                blinking_thread = start_blinking(mc)
-                mc.akira_half_close_hand("left")
-                mc.akira_half_close_hand("right")
-                
-                mc.move_jaw_and_play(akira_voice_file) # reproduces audio and moves jaw
+                print(turn.timeline.summary())
+                print(tracer.summary())
+                print(f"Servo command queues: {mc.command_queue_stats()}")
+                print(f"Audio output: {audio_output.stats()}")
 
     finally:
         try:
@@ -150,8 +154,9 @@ def main():
         except Exception as e:
             print(e)
             
-        voice.speak("Thanks for talking with me, see you next time.")
-        mc.move_jaw_and_play(akira_voice_file)
+        goodbye = voice.speak("Thanks for talking with me, see you next time.")
+        if goodbye is not None:
+            mc.play_with_jaw(*goodbye)
         print("Stopping background threads...")
 
         # add for putting all servos in their rest positions before closing connection
@@ -176,8 +181,14 @@ def main():
         except Exception as e:
             print(e)
             
+        listener.stop_stream()
+        akira_vision.shutdown()
+        camera_service.stop_all()
         chat.stop_ollama()
         mc.close_connection()
+        audio_output.close()
+
+        print(f"Session trace saved in: {tracer.save()}")
 
         print("All processes stopped safely!")
 
@@ -18,6 +18,7 @@ from cognition.dialogue_manager import Akira_Chat
 from action.speech_synthesis import Akira_Talk
 from action.motion_controller import MotionController
 from action.music_manager import MusicPlayer
+from perception.camera_service import camera_service
 
 class DualCameraSelectorApp:
     def __init__(self, root):
@@ -115,7 +116,7 @@ class DualCameraSelectorApp:
         if selection != "None":
             try:
                 cam_index = int(selection)
-                cap = cv2.VideoCapture(cam_index)
+                cap = camera_service.reader(cam_index)
                 if cap.isOpened():
                     self.captures[index] = cap
                     self.selected_devices[index] = cam_index
@@ -205,23 +206,24 @@ class DualCameraSelectorApp:
                     )
                     response = chat.generate_response(user_input, description)
                     self.append_chat(f"🤖 Akira: {response}")
-                    voice.speak(response)
+                    speech = voice.speak(response)
 
                     music_player.stop_music()
                     mc.akira_open_eyes()
                     blink_t = start_blinking(mc)
                     mc.akira_half_close_hand("left")
                     mc.akira_half_close_hand("right")
-                    mc.move_jaw_and_play("action/output.wav")
+                    if speech is not None:
+                        mc.play_with_jaw(*speech)
         finally:
             try: music_player.stop_music()
             except: pass
-            try: voice.speak("Thanks for talking with me, see you next time.")
-            except: pass
-            try: mc.move_jaw_and_play("action/output.wav")
+            try: mc.play_with_jaw(*voice.speak("Thanks for talking with me, see you next time."))
             except: pass
             try: stop_looking_at(akira_vision, look_t)
             except: pass
+            try: akira_vision.shutdown()
+            except: pass
             try: stop_moving_arms_rand(mc, arms_t)
             except: pass
             try: stop_moving_hands_rand(mc, hands_t)
@@ -259,6 +261,7 @@ class DualCameraSelectorApp:
         for cap in self.captures:
             if cap:
                 cap.release()
+        camera_service.stop_all()
 
         self.append_chat("👋 Exiting application...")
         self.root.destroy()
@@ -266,7 +269,8 @@ class DualCameraSelectorApp:
     def update_frames(self):
         for i, label in enumerate([self.label_cam1, self.label_cam2]):
             if self.running and self.captures[i]:
-                ret, frame = self.captures[i].read()
+                # Never block the Tk loop: show the newest frame of the shared stream
+                ret, frame = self.captures[i].read_latest()
                 if ret:
                     frame = cv2.resize(frame, (380, 240))
                     frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
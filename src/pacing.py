@@ -0,0 +1,63 @@
+import collections
+import time
+
+
+class RatePacer:
+    """
+    Paces a loop to a fixed rate on the monotonic clock: `wait()` sleeps until
+    the next tick instead of a fixed amount, so the time spent working in the
+    loop is not added to the period. A loop that falls behind by more than one
+    period skips the missed ticks instead of bursting to catch up.
+
+    Also keeps the last `window` tick intervals to report the achieved rate and jitter.
+    """
+    def __init__(self, rate, window=200):
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.next_time = None
+        self.last_tick = None
+
+        self.ticks = 0
+        self.overruns = 0
+        self.intervals = collections.deque(maxlen=window)
+
+    def reset(self):
+        self.next_time = None
+        self.last_tick = None
+
+    def wait(self):
+        """Sleeps until the next tick and returns the time elapsed since the previous one."""
+        now = time.monotonic()
+        if self.next_time is None:
+            self.next_time = now
+        else:
+            delay = self.next_time - now
+            if delay > 0:
+                time.sleep(delay)
+                now = time.monotonic()
+            elif -delay > self.period:
+                self.overruns += 1
+                self.next_time = now
+        self.next_time += self.period
+
+        dt = now - self.last_tick if self.last_tick is not None else self.period
+        self.last_tick = now
+        self.ticks += 1
+        self.intervals.append(dt)
+        return dt
+
+    def stats(self):
+        """Achieved rate (Hz), mean interval and jitter (standard deviation of the interval) in seconds."""
+        intervals = list(self.intervals)
+        if not intervals:
+            return {"rate": 0.0, "interval": 0.0, "jitter": 0.0, "ticks": self.ticks, "overruns": self.overruns}
+
+        mean = sum(intervals) / len(intervals)
+        jitter = (sum((interval - mean) ** 2 for interval in intervals) / len(intervals)) ** 0.5
+        return {
+            "rate": 1.0 / mean if mean > 0 else 0.0,
+            "interval": mean,
+            "jitter": jitter,
+            "ticks": self.ticks,
+            "overruns": self.overruns
+            }
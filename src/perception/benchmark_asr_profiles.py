@@ -0,0 +1,108 @@
+"""
+Compares faster-whisper ASR profiles on recorded utterances: load time,
+real-time factor (processing time / audio duration, lower is faster) and
+word error rate against reference transcripts.
+
+Each WAV needs a reference transcript in a .txt file with the same name
+(utterance.wav -> utterance.txt); WAVs without one are timed but not scored.
+
+Usage (from src/):
+    python perception/benchmark_asr_profiles.py recordings/*.wav --profiles baseline jetson_gpu jetson_cpu
+"""
+import argparse
+import statistics
+import time
+import wave
+import re
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from perception.listening import ASR_PROFILES, pcm_to_float32
+
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level Levenshtein distance between two lists of words."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current.append(min(
+                previous[j] + 1,                            # deletion
+                current[j - 1] + 1,                         # insertion
+                previous[j - 1] + (ref_word != hyp_word)    # substitution
+                ))
+        previous = current
+    return previous[-1]
+
+
+def load_wav(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1:
+            raise ValueError(f"{path} must be mono")
+        audio = pcm_to_float32(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+
+    reference = None
+    reference_path = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(reference_path):
+        with open(reference_path) as f:
+            reference = f.read().strip()
+    return audio, reference
+
+
+def benchmark_profile(profile, utterances):
+    start = time.perf_counter()
+    model = profile.load_model()
+    load_time = time.perf_counter() - start
+
+    # Warmup, as Akira_Listen does at load time
+    segments, info = model.transcribe(utterances[0][1][:16000], **profile.transcribe_kwargs())
+    list(segments)
+
+    rtfs = []
+    errors = 0
+    reference_words = 0
+    for path, audio, reference in utterances:
+        start = time.perf_counter()
+        segments, info = model.transcribe(audio, **profile.transcribe_kwargs())
+        hypothesis = " ".join(segment.text for segment in segments)
+        elapsed = time.perf_counter() - start
+
+        rtfs.append(elapsed / (len(audio) / 16000))
+        if reference is not None:
+            reference_words += len(normalize(reference))
+            errors += word_errors(normalize(reference), normalize(hypothesis))
+        print(f"    {os.path.basename(path)}: {elapsed * 1000:.0f} ms | {hypothesis.strip()}")
+
+    wer = errors / reference_words if reference_words else None
+    return load_time, rtfs, wer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", help="mono WAV files, one utterance each")
+    parser.add_argument("--profiles", nargs="+", default=list(ASR_PROFILES), choices=list(ASR_PROFILES))
+    args = parser.parse_args()
+
+    utterances = [(path, *load_wav(path)) for path in args.wavs]
+
+    results = {}
+    for name in args.profiles:
+        print(f"Profile {name}:")
+        try:
+            results[name] = benchmark_profile(ASR_PROFILES[name], utterances)
+        except Exception as e:
+            print(f"    Error: {e}")
+
+    print(f"\n{'profile':18s} {'load (s)':>9s} {'RTF median':>11s} {'RTF max':>8s} {'WER':>7s}")
+    for name, (load_time, rtfs, wer) in results.items():
+        wer_text = f"{wer * 100:6.1f}%" if wer is not None else "    n/a"
+        print(f"{name:18s} {load_time:9.2f} {statistics.median(rtfs):11.3f} {max(rtfs):8.3f} {wer_text}")
+
+
+if __name__ == "__main__":
+    main()
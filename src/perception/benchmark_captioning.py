@@ -0,0 +1,82 @@
+"""
+Caption latency of the BLIP CaptionEngine per configuration (device,
+precision, generation length, beams, torch.compile).
+
+Usage (from src/):
+    python perception/benchmark_captioning.py perception/photos/*.jpg --repeats 5
+"""
+import argparse
+import statistics
+import glob
+import time
+import os
+import sys
+
+import torch
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from perception.captioning import CaptionEngine
+
+CONFIGURATIONS = {
+    # What Akira_See used to do: model left on the CPU in fp32, default generation
+    "cpu_fp32": dict(device="cpu", fp16=False, max_new_tokens=20),
+    "cuda_fp32": dict(device="cuda", fp16=False, max_new_tokens=20),
+    "cuda_fp16": dict(device="cuda", fp16=True, max_new_tokens=20),
+    "cuda_fp16_short": dict(device="cuda", fp16=True, max_new_tokens=12),
+    "cuda_fp16_beams3": dict(device="cuda", fp16=True, max_new_tokens=20, num_beams=3),
+    "cuda_fp16_compiled": dict(device="cuda", fp16=True, max_new_tokens=20, compile_model=True),
+}
+
+
+def main():
+    default_photos = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "photos", "*.jpg")))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", default=default_photos)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    images = [Image.open(path).convert("RGB") for path in args.images]
+    if not images:
+        parser.error("no images to caption")
+
+    results = {}
+    for name in args.configs:
+        config = CONFIGURATIONS[name]
+        if config["device"] == "cuda" and not torch.cuda.is_available():
+            print(f"{name}: skipped, CUDA is not available")
+            continue
+
+        print(f"{name}:")
+        start = time.perf_counter()
+        engine = CaptionEngine(warmup=False, **config)
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.warmup()
+        warmup_time = time.perf_counter() - start
+
+        timings = []
+        for image in images:
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                caption = engine.caption(image)
+                timings.append(time.perf_counter() - start)
+            print(f"    {caption}")
+        results[name] = (load_time, warmup_time, timings)
+
+        del engine
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    print(f"\n{'configuration':20s} {'load (s)':>9s} {'warmup (s)':>11s} {'median (ms)':>12s} {'p95 (ms)':>9s}")
+    for name, (load_time, warmup_time, timings) in results.items():
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))]
+        print(f"{name:20s} {load_time:9.2f} {warmup_time:11.2f} {statistics.median(timings) * 1000:12.1f} {p95 * 1000:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
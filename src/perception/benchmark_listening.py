@@ -0,0 +1,84 @@
+"""
+Per-utterance latency of the two ways of handing an utterance to faster-whisper:
+
+- "tempfile": the old path, WAV bytes written to a temporary file and decoded again by faster-whisper,
+- "memory": raw PCM converted (and resampled) to a float32 array in memory.
+
+Usage (from src/):
+    python perception/benchmark_listening.py perception/test_audio.wav --repeats 10
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import wave
+import os
+import sys
+
+import speech_recognition as sr
+from faster_whisper import WhisperModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from perception.listening import pcm_to_float32
+
+
+def load_audio_data(path):
+    """Reads a WAV file into the same AudioData the microphone would produce."""
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1:
+            raise ValueError(f"{path} must be mono")
+        return sr.AudioData(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+
+
+def transcribe_via_tempfile(model, audio_data):
+    with tempfile.NamedTemporaryFile(suffix=".wav") as tmp_wav:
+        tmp_wav.write(audio_data.get_wav_data())
+        tmp_wav.flush()
+        segments, info = model.transcribe(tmp_wav.name)
+        return " ".join(segment.text for segment in segments)
+
+
+def transcribe_in_memory(model, audio_data):
+    audio = pcm_to_float32(audio_data.get_raw_data(), audio_data.sample_rate, audio_data.sample_width)
+    segments, info = model.transcribe(audio)
+    return " ".join(segment.text for segment in segments)
+
+
+def benchmark(model, audio_data, transcribe_fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        text = transcribe_fn(model, audio_data)
+        timings.append(time.perf_counter() - start)
+    return timings, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="+", help="mono WAV files, one utterance each")
+    parser.add_argument("--model", default="tiny", help="faster-whisper model size")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    model = WhisperModel(args.model)
+    paths = {"tempfile": transcribe_via_tempfile, "memory": transcribe_in_memory}
+
+    for wav_path in args.wavs:
+        audio_data = load_audio_data(wav_path)
+        duration = len(audio_data.get_raw_data()) / (audio_data.sample_rate * audio_data.sample_width)
+        print(f"{wav_path}: {duration:.2f}s at {audio_data.sample_rate} Hz")
+
+        # Warmup so the first measured run does not pay for lazy initialization
+        transcribe_in_memory(model, audio_data)
+
+        for name, transcribe_fn in paths.items():
+            timings, text = benchmark(model, audio_data, transcribe_fn, args.repeats)
+            print(
+                f"  {name:9s} median {statistics.median(timings) * 1000:7.1f} ms"
+                f"  mean {statistics.mean(timings) * 1000:7.1f} ms"
+                f"  min {min(timings) * 1000:7.1f} ms  | {text.strip()}"
+                )
+
+
+if __name__ == "__main__":
+    main()
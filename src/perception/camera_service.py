@@ -0,0 +1,182 @@
+import collections
+import threading
+import logging
+import time
+import cv2
+
+logger = logging.getLogger(__name__)
+
+
+class CameraStream:
+    """
+    Keeps one camera open and reads it continuously in a background thread,
+    keeping the latest frames in a small ring buffer of (sequence, timestamp, frame).
+
+    Frames are shared between all readers without copies, so they are marked
+    read-only: copy a frame before drawing on it.
+    """
+    def __init__(self, index, buffer_size=4, width=None, height=None):
+        self.index = index
+        self.width = width
+        self.height = height
+
+        self.buffer = collections.deque(maxlen=buffer_size)
+        self.sequence = 0
+        self.condition = threading.Condition()
+
+        self.cap = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return True
+
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            self.cap.release()
+            self.cap = None
+            return False
+
+        # Only keep the most recent frame in the driver, older ones are stale anyway
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.width is not None and self.height is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"camera{self.index}", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        with self.condition:
+            self.condition.notify_all()
+
+    def is_opened(self):
+        return self.running
+
+    def _run(self):
+        failures = 0
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                failures += 1
+                if failures == 10:
+                    logger.error(f"Camera {self.index} is not returning frames.")
+                time.sleep(0.05)
+                continue
+            failures = 0
+
+            frame.flags.writeable = False
+            with self.condition:
+                self.sequence += 1
+                self.buffer.append((self.sequence, time.monotonic(), frame))
+                self.condition.notify_all()
+
+    def latest(self):
+        """Returns (sequence, timestamp, frame) of the newest frame, or None if there is none yet."""
+        with self.condition:
+            return self.buffer[-1] if self.buffer else None
+
+    def wait_for_frame(self, after=0, timeout=1.0):
+        """Waits for a frame with a sequence number greater than `after` and returns it (or None on timeout)."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.running and (not self.buffer or self.buffer[-1][0] <= after):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+            return self.buffer[-1] if self.buffer else None
+
+
+class CameraReader:
+    """
+    cv2.VideoCapture-like view on a shared CameraStream. `read` returns a frame
+    this reader has not seen yet; `release` does not close the shared camera.
+    """
+    def __init__(self, stream, timeout=1.0):
+        self.stream = stream
+        self.timeout = timeout
+        self.last_sequence = 0
+
+    def isOpened(self):
+        return self.stream is not None and self.stream.is_opened()
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        item = self.stream.wait_for_frame(self.last_sequence, self.timeout)
+        if item is None:
+            return False, None
+        self.last_sequence, timestamp, frame = item
+        return True, frame
+
+    def read_latest(self):
+        """Non-blocking: the newest frame, even if it was already read."""
+        item = self.stream.latest() if self.isOpened() else None
+        if item is None:
+            return False, None
+        self.last_sequence, timestamp, frame = item
+        return True, frame
+
+    def release(self):
+        self.stream = None
+
+
+class CameraService:
+    """
+    One CameraStream per camera index, shared by face tracking, photos,
+    captioning and the GUI, so every device is opened once for the whole session.
+    """
+    def __init__(self, buffer_size=4):
+        self.buffer_size = buffer_size
+        self.streams = {}
+        self.lock = threading.Lock()
+
+    def get(self, index):
+        """The running stream of camera `index`, opening it if needed (None if it cannot be opened)."""
+        with self.lock:
+            stream = self.streams.get(index)
+            if stream is None:
+                stream = CameraStream(index, buffer_size=self.buffer_size)
+                if not stream.start():
+                    logger.error(f"Could not open camera {index}.")
+                    return None
+                self.streams[index] = stream
+            return stream
+
+    def first_available(self, indices):
+        for index in indices:
+            stream = self.get(index)
+            if stream is not None:
+                return stream
+        return None
+
+    def reader(self, index, timeout=1.0):
+        return CameraReader(self.get(index), timeout=timeout)
+
+    def release(self, index):
+        with self.lock:
+            stream = self.streams.pop(index, None)
+        if stream is not None:
+            stream.stop()
+
+    def stop_all(self):
+        with self.lock:
+            streams = list(self.streams.values())
+            self.streams = {}
+        for stream in streams:
+            stream.stop()
+
+
+# Shared by every module that needs the cameras
+camera_service = CameraService()
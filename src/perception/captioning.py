@@ -0,0 +1,280 @@
+import threading
+import time
+import os
+import numpy as np
+import torch
+
+from transformers import BlipProcessor, BlipForConditionalGeneration
+from PIL import Image
+
+
+class CaptionEngine:
+    """
+    BLIP image captioning placed on the right device and tuned for latency.
+
+    Args:
+        model_name: Hugging Face BLIP captioning checkpoint.
+        device: "cuda", "cpu", ... (defaults to CUDA when available).
+        fp16: Run in half precision when the device supports it (CUDA).
+        max_new_tokens: Upper bound on the caption length.
+        num_beams: 1 = greedy decoding.
+        compile_model: Compile the vision encoder with torch.compile (slow
+            first call, faster afterwards). The first call is made at load
+            time, and falls back to eager mode if compilation fails.
+        warmup: Run one caption at load time so the first real one is not slowed
+            down by CUDA initialization and kernel selection.
+    """
+    def __init__(
+        self,
+        model_name="Salesforce/blip-image-captioning-base",
+        device=None,
+        fp16=True,
+        max_new_tokens=20,
+        num_beams=1,
+        compile_model=False,
+        warmup=True
+        ):
+        self.device = torch.device(device if device is not None else ("cuda" if torch.cuda.is_available() else "cpu"))
+        self.dtype = torch.float16 if fp16 and self.device.type == "cuda" else torch.float32
+        self.max_new_tokens = max_new_tokens
+        self.num_beams = num_beams
+
+        self.processor = BlipProcessor.from_pretrained(model_name)
+        self.model = BlipForConditionalGeneration.from_pretrained(model_name, torch_dtype=self.dtype)
+        self.model.to(self.device)
+        self.model.eval()
+
+        self.compiled = False
+        if compile_model:
+            eager_vision_model = self.model.vision_model
+            try:
+                self.model.vision_model = torch.compile(eager_vision_model)
+                # torch.compile is lazy: compilation errors only show up on the first forward pass
+                self.warmup()
+                self.compiled = True
+            except Exception as e:
+                print(f"Could not compile the BLIP vision encoder, using eager mode: {e}")
+                self.model.vision_model = eager_vision_model
+
+        if warmup and not self.compiled:
+            self.warmup()
+
+    @torch.inference_mode()
+    def caption(self, image):
+        """Caption of a PIL image (or RGB array)."""
+        inputs = self.processor(images=image, return_tensors="pt")
+        pixel_values = inputs["pixel_values"].to(self.device, dtype=self.dtype, non_blocking=True)
+
+        outputs = self.model.generate(
+            pixel_values=pixel_values,
+            max_new_tokens=self.max_new_tokens,
+            num_beams=self.num_beams
+            )
+        return self.processor.decode(outputs[0], skip_special_tokens=True)
+
+    def warmup(self, runs=1):
+        start = time.perf_counter()
+        image = Image.new("RGB", (384, 384), color="gray")
+        for _ in range(runs):
+            self.caption(image)
+        if self.device.type == "cuda":
+            torch.cuda.synchronize()
+        print(f"BLIP warmed up on {self.device} ({self.dtype}) in {time.perf_counter() - start:.2f}s")
+
+
+class CaptionCache:
+    """
+    Reuses a previous caption while the scene has not changed.
+
+    Scenes are compared with a 64-bit difference hash (dHash) of the frame
+    downsampled to 9x8 grayscale: cheap to compute, insensitive to noise and
+    global lighting, but changes when someone walks in or the camera moves.
+
+    Args:
+        max_distance: Maximum number of differing hash bits for a hit.
+        max_age: Seconds after which a cached caption is stale and recomputed.
+        max_hits: A caption is recomputed after being reused this many times in a row.
+        max_entries: Number of scenes remembered.
+    """
+    def __init__(self, max_distance=6, max_age=60.0, max_hits=5, max_entries=8):
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.max_hits = max_hits
+        self.max_entries = max_entries
+
+        self.entries = []  # [{"signature", "caption", "time", "hits"}], most recent last
+        self.hits = 0
+        self.misses = 0
+        self.last_age = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def signature(image):
+        """dHash of a PIL image."""
+        small = np.asarray(image.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int(np.packbits(bits).view(">u8")[0])
+
+    @staticmethod
+    def distance(a, b):
+        return bin(a ^ b).count("1")
+
+    def lookup(self, signature):
+        """The cached caption of a similar, fresh enough scene, or None."""
+        now = time.monotonic()
+        with self.lock:
+            self.entries = [entry for entry in self.entries if now - entry["time"] <= self.max_age]
+
+            best = None
+            for entry in self.entries:
+                distance = self.distance(signature, entry["signature"])
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry)
+
+            if best is None or best[1]["hits"] >= self.max_hits:
+                self.misses += 1
+                return None
+
+            entry = best[1]
+            entry["hits"] += 1
+            self.hits += 1
+            self.last_age = now - entry["time"]
+            return entry["caption"]
+
+    def store(self, signature, caption):
+        with self.lock:
+            self.entries = [entry for entry in self.entries if self.distance(signature, entry["signature"]) > self.max_distance]
+            self.entries.append({"signature": signature, "caption": caption, "time": time.monotonic(), "hits": 0})
+            del self.entries[:-self.max_entries]
+
+    def caption(self, image, caption_fn):
+        """Cached caption of `image`, computed with caption_fn(image) on a miss."""
+        signature = self.signature(image)
+        caption = self.lookup(signature)
+        if caption is None:
+            caption = caption_fn(image)
+            self.store(signature, caption)
+        return caption
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "last_hit_age": self.last_age,
+            "entries": len(self.entries)
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries = []
+
+
+class BackgroundCaptioner:
+    """
+    Keeps a "current scene description" fresh while it is active (e.g. while
+    Akira listens), so the LLM can get a caption with no added latency.
+
+    Every `interval` seconds, frame_source() is captioned with caption_fn(frame)
+    in a background thread running at a lower CPU priority than the rest of Akira.
+
+    Args:
+        frame_source: Callable returning the latest frame (or None).
+        caption_fn: Callable frame -> caption.
+        interval: Seconds between two captions while active.
+        niceness: Added to the thread's nice value (Linux only).
+    """
+    def __init__(self, frame_source, caption_fn, interval=3.0, niceness=10):
+        self.frame_source = frame_source
+        self.caption_fn = caption_fn
+        self.interval = interval
+        self.niceness = niceness
+
+        self.active = threading.Event()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+
+        self.result = None  # (timestamp, frame, caption)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.busy = False  # a caption is being computed
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="background_captioner", daemon=True)
+            self.thread.start()
+
+    def resume(self):
+        self.start()
+        self.active.set()
+        self.wakeup.set()
+
+    def pause(self):
+        """Stops starting new captions (the one in progress, if any, still finishes, see wait_idle)."""
+        with self.lock:
+            self.active.clear()
+
+    def wait_idle(self, timeout=None):
+        """Waits for the caption in progress, if any. Returns False on timeout."""
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.busy, timeout)
+
+    def stop(self):
+        self.running = False
+        self.active.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def latest(self, max_age=None):
+        """(frame, caption) of the latest caption, or None if there is none or it is older than max_age seconds."""
+        with self.lock:
+            result = self.result
+        if result is None:
+            return None
+        timestamp, frame, caption = result
+        if max_age is not None and time.monotonic() - timestamp > max_age:
+            return None
+        return frame, caption
+
+    def _lower_priority(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), os.getpriority(os.PRIO_PROCESS, 0) + self.niceness)
+        except (AttributeError, OSError) as e:
+            print(f"Could not lower the background captioner priority: {e}")
+
+    def _run(self):
+        self._lower_priority()
+        while self.running:
+            self.active.wait()
+            if not self.running:
+                break
+
+            with self.lock:
+                # Paused between the wait and here: do not start another caption
+                self.busy = self.active.is_set()
+            if not self.busy:
+                continue
+
+            try:
+                frame = self.frame_source()
+                if frame is not None:
+                    caption = self.caption_fn(frame)
+                    with self.lock:
+                        self.result = (time.monotonic(), frame, caption)
+            except Exception as e:
+                print(f"Error in background captioning: {e}")
+            finally:
+                with self.idle:
+                    self.busy = False
+                    self.idle.notify_all()
+
+            self.wakeup.clear()
+            self.wakeup.wait(self.interval)
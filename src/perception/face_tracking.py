@@ -0,0 +1,324 @@
+import mediapipe as mp
+import numpy as np
+import time
+import cv2
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pacing import RatePacer
+from tracing import tracer
+
+
+class KalmanPoint:
+    """
+    Constant-velocity Kalman filter on a face center, in normalized image
+    coordinates. Fills the gaps between detections: the face position is
+    predicted from its last measured position and velocity.
+
+    Args:
+        process_noise: Acceleration variance of the face (normalized units / s^2).
+        measurement_noise: Variance of a detection (normalized units^2).
+    """
+    def __init__(self, process_noise=1.0, measurement_noise=1e-4):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.state = None  # [x, y, vx, vy]
+        self.covariance = None
+        self.last_time = None
+        self.last_measurement_time = None
+
+    def _predict(self, t):
+        dt = max(0.0, t - self.last_time)
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        q = self.process_noise
+        Q = np.zeros((4, 4))
+        Q[0, 0] = Q[1, 1] = q * dt ** 3 / 3
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = q * dt ** 2 / 2
+        Q[2, 2] = Q[3, 3] = q * dt
+        self.state = F @ self.state
+        self.covariance = F @ self.covariance @ F.T + Q
+        self.last_time = t
+
+    def update(self, t, point):
+        """Adds a detection (x, y) made at time t."""
+        z = np.asarray(point, dtype=float)
+        if self.state is None:
+            self.state = np.array([z[0], z[1], 0.0, 0.0])
+            self.covariance = np.diag([self.measurement_noise, self.measurement_noise, 1.0, 1.0])
+        else:
+            self._predict(t)
+            H = np.eye(2, 4)
+            S = H @ self.covariance @ H.T + self.measurement_noise * np.eye(2)
+            K = self.covariance @ H.T @ np.linalg.inv(S)
+            self.state = self.state + K @ (z - H @ self.state)
+            self.covariance = (np.eye(4) - K @ H) @ self.covariance
+        self.last_time = t
+        self.last_measurement_time = t
+
+    def position(self, t, max_horizon=0.3):
+        """Predicted (x, y) at time t, extrapolated at most `max_horizon` seconds past the last update."""
+        if self.state is None:
+            return None
+        dt = min(max(0.0, t - self.last_time), max_horizon)
+        x, y = self.state[:2] + self.state[2:] * dt
+        return float(np.clip(x, 0.0, 1.0)), float(np.clip(y, 0.0, 1.0))
+
+    def alive(self, t, max_coast):
+        return self.last_measurement_time is not None and t - self.last_measurement_time <= max_coast
+
+    def reset(self):
+        self.state = None
+        self.covariance = None
+        self.last_time = None
+        self.last_measurement_time = None
+
+
+class FaceEstimate:
+    """
+    Face center seen by each camera, in full-resolution pixels of the mirrored
+    frame (the same coordinates the flipped frames used to give).
+    """
+    def __init__(self, centers, frame_size, timestamp, detected):
+        self.centers = centers  # {"left": (x, y), "right": (x, y)}
+        self.frame_size = frame_size  # (width, height)
+        self.timestamp = timestamp
+        self.detected = detected  # True if a detection (not only a prediction) was made this tick
+
+    def error(self):
+        """Error (x, y) between the frame center and the face, averaged over the cameras."""
+        w, h = self.frame_size
+        errors = [(w // 2 - x, h // 2 - y) for x, y in self.centers.values()]
+        return (sum(e[0] for e in errors) / len(errors), sum(e[1] for e in errors) / len(errors))
+
+
+class StereoFaceTracker:
+    """
+    Single-pass face tracking on Akira's two eye cameras.
+
+    Both cameras are read from the shared camera service (captured concurrently
+    by their own threads), and only the frames used for detection are
+    downsampled to `detection_width` and converted, instead of flipping and
+    converting both full-resolution frames every iteration. MediaPipe then runs
+    once per detection tick, either:
+
+    - "alternate": on the left and right camera in turn, or
+    - "tiled": on both frames side by side in one composite image.
+
+    Between detections (and for the camera not detected this tick) the face
+    position comes from a Kalman predictor, so the control loop can run at a
+    higher rate than the detector.
+
+    Args:
+        camera_service: Shared CameraService.
+        left_cam, right_cam: Camera indices. With right_cam=None, or if the right
+            camera cannot be opened, the left one is tracked alone.
+        mode: "alternate" or "tiled".
+        detection_width: Width frames are downsampled to before detection.
+        detection_rate: Detector calls per second.
+        max_coast: Seconds a face is still tracked without being detected.
+    """
+    def __init__(
+        self,
+        camera_service,
+        left_cam=0,
+        right_cam=2,
+        mode="alternate",
+        detection_width=320,
+        detection_rate=15.0,
+        max_coast=0.5,
+        model_selection=0,
+        min_detection_confidence=0.5
+        ):
+        if mode not in ("alternate", "tiled"):
+            raise ValueError(f"Unknown tracking mode: {mode}")
+
+        self.camera_service = camera_service
+        self.cameras = {"left": left_cam}
+        if right_cam is not None:
+            self.cameras["right"] = right_cam
+        self.mode = mode
+        self.detection_width = detection_width
+        self.detection_period = 1.0 / detection_rate
+        self.max_coast = max_coast
+        self.model_selection = model_selection
+        self.min_detection_confidence = min_detection_confidence
+
+        self.readers = {}
+        self.tracks = {"left": KalmanPoint(), "right": KalmanPoint()}
+        self.frame_size = None
+        self.detector = None
+
+        self.last_detection = 0.0
+        self.next_side = "left"
+        self.last_sequences = {"left": 0, "right": 0}
+        self.small_frames = {}
+
+        self.pacer = None
+        self.detections = 0
+        self.detection_time = 0.0
+
+    def open(self):
+        """Attaches to the cameras and loads the detector. Returns False if no camera can be read."""
+        for side, index in self.cameras.items():
+            reader = self.camera_service.reader(index)
+            if reader.isOpened():
+                self.readers[side] = reader
+        if "left" not in self.readers:
+            return False
+
+        ret, frame = self.readers["left"].read()
+        if not ret:
+            return False
+        h, w = frame.shape[:2]
+        self.frame_size = (w, h)
+
+        self.detector = mp.solutions.face_detection.FaceDetection(
+            model_selection=self.model_selection,
+            min_detection_confidence=self.min_detection_confidence
+            )
+        return True
+
+    def close(self):
+        for reader in self.readers.values():
+            reader.release()
+        self.readers = {}
+        if self.detector is not None:
+            self.detector.close()
+            self.detector = None
+
+    def __enter__(self):
+        if not self.open():
+            self.close()
+            raise RuntimeError("Cannot open the cameras for face tracking.")
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sides(self):
+        return list(self.readers.keys())
+
+    def _latest_small(self, side):
+        """Newest frame of `side` downsampled for detection, or None if there is no new frame."""
+        stream = self.readers[side].stream
+        item = stream.latest() if stream is not None else None
+        if item is None or item[0] == self.last_sequences[side]:
+            return None
+        self.last_sequences[side] = item[0]
+
+        frame = item[2]
+        h, w = frame.shape[:2]
+        height = int(round(h * self.detection_width / w))
+        small = cv2.resize(frame, (self.detection_width, height), interpolation=cv2.INTER_AREA)
+        self.small_frames[side] = small
+        return small
+
+    @staticmethod
+    def _centers(detections):
+        """(x, y, score) of every detection, in relative coordinates of the unflipped image."""
+        centers = []
+        for detection in detections or []:
+            bbox = detection.location_data.relative_bounding_box
+            centers.append((bbox.xmin + bbox.width / 2, bbox.ymin + bbox.height / 2, detection.score[0]))
+        return centers
+
+    def _detect(self, now):
+        """Runs the detector once, on one camera or on the tiled composite. Returns True if a face was found."""
+        if self.mode == "tiled" and len(self.readers) == 2:
+            left = self._latest_small("left")
+            right = self._latest_small("right")
+            if left is None or right is None or left.shape != right.shape:
+                return False
+            composite = cv2.cvtColor(np.hstack([left, right]), cv2.COLOR_BGR2RGB)
+            found = {}
+            for x, y, score in self._centers(self._process(composite)):
+                side, x = ("left", 2 * x) if x < 0.5 else ("right", 2 * x - 1)
+                if side not in found or score > found[side][2]:
+                    found[side] = (x, y, score)
+        else:
+            side = self.next_side if self.next_side in self.readers else "left"
+            self.next_side = "right" if side == "left" else "left"
+            small = self._latest_small(side)
+            if small is None:
+                return False
+            centers = self._centers(self._process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB)))
+            found = {side: max(centers, key=lambda c: c[2])} if centers else {}
+
+        for side, (x, y, _) in found.items():
+            # Mirror x like the flipped frames the controllers were tuned on
+            self.tracks[side].update(now, (1.0 - x, y))
+        return bool(found)
+
+    def _process(self, rgb):
+        start = time.perf_counter()
+        with tracer.span("face_detection", mode=self.mode):
+            results = self.detector.process(rgb)
+        self.detection_time += time.perf_counter() - start
+        self.detections += 1
+        return results.detections
+
+    def step(self, now=None):
+        """
+        Runs a detection if one is due and returns the current FaceEstimate,
+        or None if the face is not tracked on every camera.
+        """
+        now = time.monotonic() if now is None else now
+        detected = False
+        if now - self.last_detection >= self.detection_period:
+            self.last_detection = now
+            detected = self._detect(now)
+
+        w, h = self.frame_size
+        centers = {}
+        for side in self.sides():
+            track = self.tracks[side]
+            if not track.alive(now, self.max_coast):
+                return None
+            x, y = track.position(now)
+            centers[side] = (int(x * w), int(y * h))
+        return FaceEstimate(centers, self.frame_size, now, detected)
+
+    def track(self, rate=30.0, should_continue=lambda: True):
+        """Yields (dt, FaceEstimate or None) at `rate` Hz while should_continue() is true."""
+        self.pacer = RatePacer(rate)
+        while should_continue():
+            dt = self.pacer.wait()
+            yield dt, self.step()
+
+    def debug_frames(self, estimate=None):
+        """Mirrored detection-size frames with the tracked face centers drawn on them."""
+        frames = {}
+        for side, small in self.small_frames.items():
+            frame = cv2.flip(small, 1)
+            if estimate is not None and side in estimate.centers:
+                scale = small.shape[1] / self.frame_size[0]
+                x, y = estimate.centers[side]
+                cv2.circle(frame, (int(x * scale), int(y * scale)), 4, (0, 0, 255), -1)
+            frames[side] = frame
+        return frames
+
+    def stats(self):
+        stats = {
+            "detections": self.detections,
+            "mean_detection_time": self.detection_time / self.detections if self.detections else 0.0
+            }
+        if self.pacer is not None:
+            stats.update(self.pacer.stats())
+        return stats
+
+
+if __name__ == "__main__":
+    from perception.camera_service import camera_service
+
+    tracker = StereoFaceTracker(camera_service, mode="alternate")
+    try:
+        with tracker:
+            start = time.monotonic()
+            for dt, estimate in tracker.track(rate=30.0, should_continue=lambda: time.monotonic() - start < 10):
+                if estimate is not None and estimate.detected:
+                    print(f"Face at {estimate.centers}, error {estimate.error()}")
+        print(tracker.stats())
+    finally:
+        camera_service.stop_all()
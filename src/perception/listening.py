@@ -1,17 +1,189 @@
 import speech_recognition as sr
 from faster_whisper import WhisperModel
-import tempfile
-from playsound import playsound
+import numpy as np
+import collections
+import threading
+import queue
+import time
+import sys
+import os
+from math import gcd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tracing import tracer
+from action.audio_output import audio_output
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def pcm_to_float32(raw_data, sample_rate, sample_width=2, target_rate=WHISPER_SAMPLE_RATE):
+    """
+    Converts raw little-endian mono PCM bytes into the float32 [-1, 1] array
+    faster-whisper expects, resampled to `target_rate` if needed. Nothing touches the disk.
+    """
+    if sample_width == 1:
+        audio = (np.frombuffer(raw_data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        audio = np.frombuffer(raw_data, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        pcm = np.frombuffer(raw_data, dtype=np.uint8).reshape(-1, 3)
+        audio = (pcm[:, 0].astype(np.int32) | (pcm[:, 1].astype(np.int32) << 8) | (pcm[:, 2].astype(np.int8).astype(np.int32) << 16))
+        audio = audio.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        audio = np.frombuffer(raw_data, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    if sample_rate != target_rate and len(audio) > 0:
+        if resample_poly is not None:
+            divisor = gcd(sample_rate, target_rate)
+            audio = resample_poly(audio, target_rate // divisor, sample_rate // divisor).astype(np.float32)
+        else:
+            duration = len(audio) / sample_rate
+            target_times = np.arange(int(duration * target_rate)) / target_rate
+            audio = np.interp(target_times, np.arange(len(audio)) / sample_rate, audio).astype(np.float32)
+    return audio
+
+
+class ASRProfile:
+    """
+    faster-whisper settings, for loading the model (model_size, device,
+    compute_type, cpu_threads, num_workers) and for decoding (beam_size,
+    vad_filter, language). The defaults are faster-whisper's own, i.e. what
+    Akira_Listen always did; pinning the language skips language detection and
+    beam_size=1 is greedy decoding (see the jetson_* profiles).
+    """
+    def __init__(
+        self,
+        model_size="tiny",
+        device="auto",
+        compute_type="default",
+        cpu_threads=0,
+        num_workers=1,
+        beam_size=5,
+        vad_filter=False,
+        language=None,
+        name=None
+        ):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.beam_size = beam_size
+        self.vad_filter = vad_filter
+        self.language = language
+        self.name = name or f"{model_size}-{device}-{compute_type}-beam{beam_size}"
+
+    def load_model(self):
+        return WhisperModel(
+            self.model_size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers
+            )
+
+    def transcribe_kwargs(self):
+        return {"beam_size": self.beam_size, "vad_filter": self.vad_filter, "language": self.language}
+
+    def __repr__(self):
+        return f"ASRProfile({self.name})"
+
+
+# Profiles worth comparing on the Jetson, see benchmark_asr_profiles.py
+ASR_PROFILES = {
+    # The default: float model, beam search, language detection
+    "baseline": ASRProfile(name="baseline"),
+    # Quantized, greedy and English only
+    "jetson_gpu": ASRProfile(device="cuda", compute_type="int8_float16", beam_size=1, language="en", name="jetson_gpu"),
+    "jetson_cpu": ASRProfile(device="cpu", compute_type="int8", cpu_threads=4, beam_size=1, language="en", name="jetson_cpu"),
+    "jetson_gpu_base": ASRProfile(model_size="base", device="cuda", compute_type="int8_float16", beam_size=1, language="en", name="jetson_gpu_base"),
+}
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection on 16-bit mono PCM frames of 10, 20 or 30 ms.
+
+    Uses WebRTC VAD when `webrtcvad` is installed, otherwise an energy detector
+    whose threshold follows the background noise level.
+    """
+    def __init__(self, sample_rate=16000, aggressiveness=2, energy_ratio=4.0, min_energy=1e-5):
+        self.sample_rate = sample_rate
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.noise_energy = None
+        self.vad = webrtcvad.Vad(aggressiveness) if webrtcvad is not None else None
+
+    def is_speech(self, frame):
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+        energy = float(np.mean(samples ** 2))
+
+        if self.vad is not None:
+            speech = self.vad.is_speech(frame, self.sample_rate)
+        else:
+            noise = energy if self.noise_energy is None else self.noise_energy
+            speech = energy > max(self.min_energy, noise * self.energy_ratio)
+
+        if not speech:
+            # The noise floor drops quickly and rises slowly
+            if self.noise_energy is None or energy < self.noise_energy:
+                self.noise_energy = energy
+            else:
+                self.noise_energy = 0.98 * self.noise_energy + 0.02 * energy
+        return speech
+
 
 class Akira_Listen():
-    def __init__(self, recognizer_method="whisper", whisper_model_size="tiny"):
+    def __init__(self, recognizer_method="whisper", whisper_model_size="tiny", streaming=False, asr_profile=None):
         self.r = sr.Recognizer()
         self.r.pause_threshold = 5.0
         self.mic_index = 0
         self.recognizer_method = recognizer_method
 
+        # asr_profile can be an ASRProfile or the name of one in ASR_PROFILES
+        if asr_profile is None:
+            asr_profile = ASRProfile(model_size=whisper_model_size)
+        elif isinstance(asr_profile, str):
+            asr_profile = ASR_PROFILES[asr_profile]
+        self.asr_profile = asr_profile
+
         if self.recognizer_method == "whisper":
-            self.whisper_model = WhisperModel(whisper_model_size)
+            self.whisper_model = self.asr_profile.load_model()
+            self.warmup()
+
+        # Streaming mode: the microphone stays open and utterances are cut by a VAD
+        self.streaming = streaming and self.recognizer_method == "whisper"
+        self.sample_rate = WHISPER_SAMPLE_RATE
+        self.frame_duration = 0.03      # seconds per VAD frame
+        self.frame_samples = int(self.sample_rate * self.frame_duration)
+        self.pre_roll = 0.3             # audio kept from before the speech started
+        self.min_speech = 0.25          # shorter bursts are ignored as noise
+        self.min_silence = 0.35         # end of utterance when the partial looks finished...
+        self.max_silence = 0.9          # ...and otherwise
+        self.partial_interval = 0.6     # seconds of new audio between partial hypotheses
+        self.max_utterance = 30.0       # whisper window
+
+        self.vad = None
+        self.frames = None
+        self.capturing = False
+        self.capture_thread = None
+        self.capture_error = None       # why the last capture thread died, None if it did not fail
+        self.stream_failures = 0        # capture failures in a row
+        self.max_stream_failures = 3    # then recognize_speech_streaming falls back to non-streaming recognition
+        self.stream_retry_delay = 0.5   # doubled after every failure
+        self.partial_hypothesis = ""
     
     def list_microphones(self, verbose=False):
         """List all available microphones"""
@@ -38,16 +210,199 @@ class Akira_Listen():
                 audio = self.r.listen(source, timeout=5)
                 print("Audio captured successfully!")
 
-                with open("test_audio.wav", "wb") as f:
-                    f.write(audio.get_wav_data())
                 print("Playing audio...")
-                playsound("test_audio.wav")
+                audio_output.play(pcm_to_float32(audio.get_raw_data(), audio.sample_rate, audio.sample_width, target_rate=audio.sample_rate), audio.sample_rate)
 
         except Exception as e:
             print(f"Error testing microphone: {e}")
 
+    def start_stream(self):
+        """Opens the microphone once and keeps reading VAD-sized frames in the background."""
+        if self.capture_thread is not None:
+            return
+        self.vad = VoiceActivityDetector(self.sample_rate)
+        self.frames = queue.Queue()
+        self.capture_error = None
+        self.capturing = True
+        self.capture_thread = threading.Thread(target=self._capture, daemon=True)
+        self.capture_thread.start()
+
+    def stop_stream(self):
+        self.capturing = False
+        capture_thread, self.capture_thread = self.capture_thread, None
+        if capture_thread is not None:
+            capture_thread.join()
+
+    def _capture(self):
+        try:
+            with sr.Microphone(device_index=self.mic_index, sample_rate=self.sample_rate, chunk_size=self.frame_samples) as source:
+                while self.capturing:
+                    self.frames.put(source.stream.read(self.frame_samples))
+                    self.stream_failures = 0
+        except Exception as e:
+            if self.stream_failures == 0:
+                # Only the first failure of a series is logged
+                print(f"Error capturing audio: {e}")
+            self.stream_failures += 1
+            self.capture_error = e
+            # So that start_stream opens the microphone again
+            if self.capture_thread is threading.current_thread():
+                self.capture_thread = None
+            self.capturing = False
+
+    def warmup(self, seconds=1.0):
+        """Runs one transcription at load time so the first visitor does not pay for lazy initialization."""
+        start = time.perf_counter()
+        self.transcribe_array(np.zeros(int(WHISPER_SAMPLE_RATE * seconds), dtype=np.float32))
+        print(f"Whisper {self.asr_profile.name} warmed up in {time.perf_counter() - start:.2f}s")
+
+    def transcribe_array(self, audio, **kwargs):
+        """Transcribes a float32 16 kHz array with the ASR profile settings (overridable with kwargs)."""
+        segments, info = self.whisper_model.transcribe(audio, **{**self.asr_profile.transcribe_kwargs(), **kwargs})
+        # segments is a lazy generator: decoding happens here
+        return " ".join(segment.text for segment in segments)
+
+    def _transcribe(self, frames, **kwargs):
+        audio = pcm_to_float32(b"".join(frames), self.sample_rate)
+        return self.transcribe_array(audio, **kwargs).strip()
+
+    def _end_of_utterance_silence(self, hypothesis):
+        if hypothesis.endswith((".", "?", "!")):
+            return self.min_silence
+        return self.max_silence
+
+    def recognize_speech_streaming(self, on_partial=None):
+        """
+        Waits for the next utterance on the always-open stream and returns its transcript.
+
+        While the visitor speaks, the utterance so far is decoded every
+        `partial_interval` seconds; `on_partial` (if given) receives each
+        hypothesis. The end of the utterance is detected after a short silence,
+        shorter when the last hypothesis already ends a sentence, and the last
+        hypothesis is reused as the final transcript when it covers all the speech.
+
+        If the microphone stream fails (e.g. the device rejects 16 kHz or drops
+        out), it is reopened after a growing delay; after `max_stream_failures`
+        failures in a row, Akira switches to non-streaming recognition for good.
+        """
+        while True:
+            text = self._listen_stream(on_partial)
+            if text is not None or self.capture_error is None:
+                return text
+
+            if self.stream_failures >= self.max_stream_failures:
+                print(f"The microphone stream failed {self.stream_failures} times in a row, switching to non-streaming recognition.")
+                self.streaming = False
+                return self._recognize_speech_blocking()
+            time.sleep(self.stream_retry_delay * 2 ** (self.stream_failures - 1))
+
+    def _listen_stream(self, on_partial=None):
+        """
+        One utterance from the always-open stream, None if there was none
+        (stream stopped or failed, see capture_error).
+        """
+        self.start_stream()
+        print("Listening...")
+
+        # Drop what was captured while Akira was not listening (e.g. its own voice)
+        while not self.frames.empty():
+            self.frames.get_nowait()
+
+        pre_roll = collections.deque(maxlen=int(self.pre_roll / self.frame_duration))
+        utterance = []
+        speech_time = 0.0
+        silence = 0.0
+        last_voiced = 0
+
+        partial = {"frames": 0, "text": "", "utterance": 0}
+        partial_thread = None
+        partial_lock = threading.Lock()
+        self.partial_hypothesis = ""
+
+        def decode_partial(frames, utterance_id):
+            with tracer.span("asr.partial", audio_seconds=len(frames) * self.frame_duration):
+                text = self._transcribe(frames, beam_size=1, without_timestamps=True, condition_on_previous_text=False)
+            with partial_lock:
+                if utterance_id != partial["utterance"]:
+                    # Decoded from a discarded burst
+                    return
+                partial["frames"], partial["text"] = len(frames), text
+                self.partial_hypothesis = text
+            if on_partial is not None:
+                on_partial(text)
+
+        while self.capturing:
+            try:
+                frame = self.frames.get(timeout=1)
+            except queue.Empty:
+                continue
+            speech = self.vad.is_speech(frame)
+
+            if not utterance:
+                if speech:
+                    utterance = list(pre_roll) + [frame]
+                    speech_time, silence = self.frame_duration, 0.0
+                    last_voiced = len(utterance)
+                else:
+                    pre_roll.append(frame)
+                continue
+
+            utterance.append(frame)
+            if speech:
+                speech_time += self.frame_duration
+                silence = 0.0
+                last_voiced = len(utterance)
+            else:
+                silence += self.frame_duration
+
+            new_audio = (len(utterance) - partial["frames"]) * self.frame_duration
+            if new_audio >= self.partial_interval and (partial_thread is None or not partial_thread.is_alive()):
+                partial_thread = threading.Thread(target=decode_partial, args=(list(utterance), partial["utterance"]), daemon=True)
+                partial_thread.start()
+
+            # Only trust the hypothesis if it already covers the last voiced frame
+            hypothesis = partial["text"] if partial["frames"] >= last_voiced else ""
+            if silence >= self._end_of_utterance_silence(hypothesis) or len(utterance) * self.frame_duration >= self.max_utterance:
+                if speech_time < self.min_speech:
+                    # A click or a cough, not an utterance: forget its hypothesis too
+                    utterance = []
+                    pre_roll.clear()
+                    with partial_lock:
+                        partial["utterance"] += 1
+                        partial["frames"], partial["text"] = 0, ""
+                        self.partial_hypothesis = ""
+                    continue
+                break
+
+        if not utterance:
+            return None
+
+        if partial_thread is not None:
+            partial_thread.join()
+        if partial["frames"] >= last_voiced and partial["text"]:
+            tracer.instant("asr.final_from_partial")
+            return partial["text"]
+        with tracer.span("asr.final", audio_seconds=len(utterance) * self.frame_duration):
+            return self._transcribe(utterance) or None
+
+    def transcribe_audio_data(self, audio_data):
+        """Transcribes a speech_recognition AudioData with faster-whisper, entirely in memory."""
+        audio = pcm_to_float32(audio_data.get_raw_data(), audio_data.sample_rate, audio_data.sample_width)
+        return self.transcribe_array(audio)
+
+    @tracer.trace("recognize_speech")
     def recognize_speech(self):
         """Recognize speech from the microphone"""
+        if self.streaming:
+            try:
+                return self.recognize_speech_streaming()
+            except Exception as e:
+                print(f"Error: {e}")
+                return None
+        return self._recognize_speech_blocking()
+
+    def _recognize_speech_blocking(self):
+        """Opens the microphone for one phrase (speech_recognition's listen)."""
         try:
             with sr.Microphone(device_index=self.mic_index) as source:
                 print("Listening...")
@@ -61,15 +416,7 @@ class Akira_Listen():
             if self.recognizer_method == "google":
                 return self.r.recognize_google(audio_text)
             elif self.recognizer_method == "whisper":
-                wav_bytes = audio_text.get_wav_data()
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_wav:
-                    tmp_wav.write(wav_bytes)
-                    tmp_wav.flush()
-
-                    segments, info = self.whisper_model.transcribe(tmp_wav.name)
-
-                transcription = " ".join(segment.text for segment in segments)
-                return transcription
+                return self.transcribe_audio_data(audio_text)
         except sr.UnknownValueError:
             print("Could not understand the audio.")
             return None
@@ -0,0 +1,82 @@
+import threading
+import queue
+import os
+import cv2
+
+from datetime import datetime
+from PIL import Image, ImageDraw, ImageFont
+
+
+def bgr_to_pil(frame):
+    """OpenCV BGR frame -> RGB PIL image, in memory."""
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def annotate_image(image, text, padding=10, font_size=24):
+    """Draws `text` in the top-left corner of a PIL image (in place) and returns it."""
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype("arial.ttf", font_size)
+    except IOError:
+        font = ImageFont.load_default()
+
+    draw.text((padding, padding), text, fill="white", font=font)
+    return image
+
+
+class PhotoArchiver:
+    """
+    Saves Akira's photos (optionally annotated with their caption) from a
+    background thread, so JPEG encoding and disk writes never sit between
+    the visitor speaking and the LLM call.
+
+    If the writer falls behind by more than `max_pending` photos, new ones
+    are dropped instead of blocking the caller.
+    """
+    def __init__(self, photos_dir, max_pending=16):
+        self.photos_dir = photos_dir
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="photo_archiver", daemon=True)
+        self.thread.start()
+
+    def archive(self, image, caption=None):
+        """
+        Queues a BGR frame or PIL image to be written as photo_<timestamp>.jpg.
+
+        Returns:
+            The path the photo will be written to, or None if it was dropped.
+        """
+        filename = "photo_" + datetime.now().strftime("%Y%m%d_%H%M%S_%f") + ".jpg"
+        path = os.path.join(self.photos_dir, filename)
+        try:
+            self.jobs.put_nowait((image, caption, path))
+        except queue.Full:
+            self.dropped += 1
+            print("Photo archiver is busy, photo not saved.")
+            return None
+        return path
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            image, caption, path = job
+            try:
+                if not isinstance(image, Image.Image):
+                    image = bgr_to_pil(image)
+                else:
+                    image = image.convert("RGB")
+                if caption:
+                    annotate_image(image, caption)
+                os.makedirs(self.photos_dir, exist_ok=True)
+                image.save(path)
+                print(f"Picture saved in: {path}")
+            except Exception as e:
+                print(f"Error saving picture {path}: {e}")
+
+    def stop(self):
+        """Writes the pending photos and stops the writer thread."""
+        self.jobs.put(None)
+        self.thread.join()
@@ -10,16 +10,20 @@ import cv2
 import sys
 import os
 
-from transformers import BlipProcessor, BlipForConditionalGeneration
-from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from action.motion_controller import MotionController
+from perception.camera_service import camera_service as shared_camera_service
+from perception.photo_archiver import PhotoArchiver, annotate_image, bgr_to_pil
+from perception.captioning import CaptionEngine, CaptionCache, BackgroundCaptioner
+from perception.face_tracking import StereoFaceTracker
+from action.gaze_controller import GazeController
+from tracing import tracer
 
 
 class Akira_See:
-    def __init__(self, motion_controller=None):
+    def __init__(self, motion_controller=None, camera_service=None, caption_engine=None, use_caption_cache=True):
         if motion_controller is None:
             print("Initializing Motion Controller...")
             try:
@@ -33,22 +37,31 @@ class Akira_See:
         else:
             self.motion_controller = motion_controller
 
+        # Cameras are opened once and shared (see camera_service.py)
+        self.camera_service = camera_service if camera_service is not None else shared_camera_service
+
+        # Photos are written to disk in the background
+        self.photo_archiver = PhotoArchiver(os.path.join(os.path.dirname(os.path.abspath(__file__)), "photos"))
+
         self.face_detected = False
         self.mp_face_detection = mp.solutions.face_detection
         self.mp_drawing = mp.solutions.drawing_utils
 
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         
-        #blip
-        model_name = "Salesforce/blip-image-captioning-base"
-        self.processor = BlipProcessor.from_pretrained(model_name)
-        self.model = BlipForConditionalGeneration.from_pretrained(model_name)
+        #blip, on self.device in fp16 when possible and already warmed up
+        self.captioner = caption_engine if caption_engine is not None else CaptionEngine(device=self.device)
+        # BLIP is skipped while the scene has not changed since the last caption
+        self.caption_cache = CaptionCache() if use_caption_cache else None
+        # Keeps a scene description ready while the visitor is speaking
+        self.background_captioner = None
 
         # Configure logging
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)
 
         self.looking_at_person = True
+        self.gaze_controller = None
         
     @staticmethod
     def list_cameras(max_tested=5):
@@ -130,35 +143,42 @@ class Akira_See:
         cap1.release()
         cv2.destroyAllWindows()
 
+    @tracer.trace("describe_what_akira_sees")
     def describe_what_akira_sees(self, image_input, eliminate_photo=True, annotate_photo=False) -> str:
         """
         Generate a caption for the given image.
         
         Args:
-            image_input: Can be a file path (str) or a PIL.Image.Image instance.
+            image_input: Can be a BGR frame (np.ndarray, as returned by take_photo),
+                a PIL.Image.Image instance or a file path (str).
+            eliminate_photo: For a file path, delete the file. For a frame or
+                PIL image, do not archive it.
+            annotate_photo: Write the caption on the archived photo.
         
         Returns:
             A string describing the image.
         """
         if image_input is None:
             return None
-        if isinstance(image_input, str):
-            image = Image.open(image_input)
-        else:
-            image = image_input
-        
+
         # Load image from file path if needed
         if isinstance(image_input, str):
             image = Image.open(image_input)
+        elif isinstance(image_input, np.ndarray):
+            image = bgr_to_pil(image_input)
         else:
             image = image_input
 
-        # Preprocess the image and generate the caption
-        inputs = self.processor(images=image, return_tensors="pt")
-        outputs = self.model.generate(**inputs)
-        caption = self.processor.decode(outputs[0], skip_special_tokens=True)
+        if self.caption_cache is not None:
+            caption = self.caption_cache.caption(image, self.captioner.caption)
+        else:
+            caption = self.captioner.caption(image)
 
-        if eliminate_photo:
+        if not isinstance(image_input, str):
+            # In-memory image: archiving (and annotating) happens in the background
+            if not eliminate_photo:
+                self.photo_archiver.archive(image, caption if annotate_photo else None)
+        elif eliminate_photo:
             try:
                 os.remove(image_input)
                 print("Deleted!")
@@ -176,453 +196,176 @@ class Akira_See:
 
     def add_text_top_left(self, image_path, text, output_path, padding=10, font_size=24):
         image = Image.open(image_path).convert("RGB")
-        draw = ImageDraw.Draw(image)
-
-        try:
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except IOError:
-            font = ImageFont.load_default()
-
-        position = (padding, padding)
-        draw.text(position, text, fill="white", font=font)
+        annotate_image(image, text, padding=padding, font_size=font_size)
 
         image.save(output_path)
         print(f"Text added to top-left corner and saved to {output_path}")      
 
 
+    @tracer.trace("take_photo")
     def take_photo(self):
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        photos_folder = "photos"
-        script_dir = os.path.join(script_dir, photos_folder)
-        
-        filename = "photo_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".jpg"
-        file_path = os.path.join(script_dir, filename)
-
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            print("Camera index 0 cannot be accessed, trying camera index 2.")
-            cap = cv2.VideoCapture(2)
-            if not cap.isOpened():
-                print("Camera index 2 cannot be accessed either.")
-                return None
+        """
+        Returns the latest frame (BGR np.ndarray, read-only) of the first
+        available camera, or None. Nothing is written to disk here: pass the
+        frame to describe_what_akira_sees, which archives it in the background.
+        """
+        stream = self.camera_service.first_available([0, 2])
+        if stream is None:
+            print("Camera indices 0 and 2 cannot be accessed.")
+            return None
 
         print("Taking a picture!")
 
-        ret, frame = cap.read()
-        cap.release()
-
-        if not ret:
+        # The latest frame of the running stream, no need to open the device
+        item = stream.wait_for_frame()
+        if item is None:
             print("Picture was not able to be taken...")
             return None
+        _, _, frame = item
+        return frame
+
+    def latest_frame(self):
+        """Non-blocking: the newest frame the cameras (and face tracking) already captured, or None."""
+        stream = self.camera_service.first_available([0, 2])
+        item = stream.latest() if stream is not None else None
+        return item[2] if item is not None else None
+
+    def start_background_captioning(self, interval=3.0):
+        """Captions the latest frame every `interval` seconds, at low priority, until paused."""
+        if self.background_captioner is None:
+            self.background_captioner = BackgroundCaptioner(
+                frame_source=self.latest_frame,
+                caption_fn=lambda frame: self.describe_what_akira_sees(frame, eliminate_photo=True),
+                interval=interval
+                )
+        self.background_captioner.resume()
+
+    def pause_background_captioning(self):
+        if self.background_captioner is not None:
+            self.background_captioner.pause()
+
+    def wait_background_caption(self, timeout=2.0):
+        """Waits for the background caption in progress (if any) to finish. Returns False on timeout."""
+        if self.background_captioner is None:
+            return True
+        return self.background_captioner.wait_idle(timeout)
+
+    def stop_background_captioning(self):
+        if self.background_captioner is not None:
+            self.background_captioner.stop()
+            self.background_captioner = None
+
+    def shutdown(self):
+        """Stops background captioning and writes the photos still waiting to be archived."""
+        self.stop_background_captioning()
+        self.photo_archiver.stop()
+
+    def current_description(self, max_age=10.0, archive_photo=True, annotate_photo=True):
+        """
+        The precomputed description of the scene, or None if there is none
+        younger than `max_age` seconds (then caption a photo synchronously).
+        The captioned frame is archived in the background, like describe_what_akira_sees does.
+        """
+        if self.background_captioner is None:
+            return None
+        result = self.background_captioner.latest(max_age)
+        if result is None:
+            return None
 
-        cv2.imwrite(file_path, frame)
-        print(f"Picture saved in: {file_path}")
-        return file_path
+        frame, caption = result
+        if archive_photo:
+            self.photo_archiver.archive(frame, caption if annotate_photo else None)
+        return caption
 
     def look_at_face_main(self, camera_index: int = 0, show_video: bool = False, exit_when_centered: bool = True) -> None:
+        """Centers the face seen by one camera, rests 1-3 s and starts again, while looking_at_person."""
         while self.looking_at_person:
-            # Configuration parameters
-            SLEEP_INTERVAL = 0.1
-            STEP_SIZE_YAW = 5
-            STEP_SIZE_PITCH = -5
-            TOLERANCE_RATIO = 0.10
-
-            arduino = "left"
-            neck_name, _, rot_name = self.motion_controller.neck_servos
-            neck_index, neck_rest, neck_min, neck_max, neck_current = self.motion_controller.get_servo_positions(
-                servo_name=neck_name, arduino=arduino)
-            rot_index, rot_rest, rot_min, rot_max, rot_current = self.motion_controller.get_servo_positions(
-                servo_name=rot_name, arduino=arduino)
-
-            self.logger.info(f"Starting face tracking on camera index {camera_index}...")
-
-            # Initialize the camera
-            cap = cv2.VideoCapture(camera_index)
-            if not cap.isOpened():
-                self.logger.error(f"Could not open camera {camera_index}. Trying alternative camera index 2.")
-                alternative_index = 2
-                cap = cv2.VideoCapture(alternative_index)
-                if not cap.isOpened():
-                    self.logger.error(f"Could not open camera {alternative_index}.")
-                    return
-                else:
-                    camera_index = alternative_index
-
-            ret, frame = cap.read()
-            if not ret:
-                self.logger.error("Could not read initial frame from camera.")
-                cap.release()
+            cameras = [camera_index, 2] if camera_index != 2 else [camera_index]
+            for index in cameras:
+                if self.camera_service.get(index) is not None:
+                    break
+                self.logger.error(f"Could not open camera {index}.")
+            else:
                 return
 
-            frame_height, frame_width, _ = frame.shape
-            frame_center_x = frame_width // 2
-            frame_center_y = frame_height // 2
-            center_tolerance_x = int(frame_width * TOLERANCE_RATIO)
-            center_tolerance_y = int(frame_height * TOLERANCE_RATIO)
-
-            # Use a context manager for the face detection module
-            with self.mp_face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.5) as face_detection:
-                try:
-                    while True:
-                        time.sleep(SLEEP_INTERVAL)
-                        ret, frame = cap.read()
-                        if not ret:
-                            self.logger.error("Failed to capture frame.")
-                            break
-
-                        # Flip and convert color space for face detection
-                        frame = cv2.flip(frame, 1)
-                        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        results = face_detection.process(rgb_frame)
-
-                        face_detected = False
-                        face_center_x = None
-                        face_center_y = None
-
-                        # Process detections if a face is found
-                        if results.detections:
-                            face_detected = True
-                            detection = results.detections[0]
-                            bboxC = detection.location_data.relative_bounding_box
-                            ih, iw, _ = frame.shape
-                            xmin = int(bboxC.xmin * iw)
-                            ymin = int(bboxC.ymin * ih)
-                            width = int(bboxC.width * iw)
-                            height = int(bboxC.height * ih)
-                            face_center_x = xmin + width // 2
-                            face_center_y = ymin + height // 2
-
-                            if show_video:
-                                cv2.rectangle(frame, (xmin, ymin), (xmin + width, ymin + height), (0, 255, 0), 2)
-                                cv2.circle(frame, (face_center_x, face_center_y), 5, (0, 0, 255), -1)
-
-                        self.face_detected = face_detected
-
-                        # Calculate error and determine adjustment
-                        if face_detected and self.motion_controller is not None:
-                            error_x = frame_center_x - face_center_x
-                            error_y = frame_center_y - face_center_y
-
-                            adjust_rothead = int(STEP_SIZE_YAW * np.sign(error_x)) if abs(error_x) > center_tolerance_x else 0
-                            adjust_neck = int(STEP_SIZE_PITCH * np.sign(error_y)) if abs(error_y) > center_tolerance_y else 0
-
-                            if adjust_neck != 0 or adjust_rothead != 0:
-                                self.logger.info(f"Error X: {error_x}, Error Y: {error_y} -> Adjust Neck: {adjust_neck}, Adjust Rothead: {adjust_rothead}")
-                                try:
-                                    neck_current += adjust_neck
-                                    rot_current += adjust_rothead
-
-                                    # Ensure servo angles remain within defined limits
-                                    neck_current = max(neck_min, min(neck_current, neck_max))
-                                    rot_current = max(rot_min, min(rot_current, rot_max))
-
-                                    self.motion_controller.set_current_pos_servo(neck_name, arduino, neck_current)
-                                    self.motion_controller.set_current_pos_servo(rot_name, arduino, rot_current)
-                                    self.motion_controller.send_command(neck_index, neck_current, arduino, neck_name)
-                                    self.motion_controller.send_command(rot_index, rot_current, arduino, rot_name)
-
-                                    time.sleep(SLEEP_INTERVAL)
-                                except Exception as e:
-                                    self.logger.error(f"Error sending command to motion controller: {e}")
-
-                            # Exit if the face is centered within tolerance
-                            if exit_when_centered and abs(error_x) <= center_tolerance_x and abs(error_y) <= center_tolerance_y:
-                                self.logger.info("Face is centered. Exiting face tracking.")
-                                break
-
-                        # Draw center tolerance region and display the video
-                        if show_video:
-                            cv2.rectangle(frame,
-                                          (frame_center_x - center_tolerance_x, frame_center_y - center_tolerance_y),
-                                          (frame_center_x + center_tolerance_x, frame_center_y + center_tolerance_y),
-                                          (255, 255, 0), 1)
-                            cv2.circle(frame, (frame_center_x, frame_center_y), 5, (255, 255, 255), -1)
-                            cv2.imshow('Face Tracking', frame)
-
-                        if cv2.waitKey(5) & 0xFF == ord('q'):
-                            self.logger.info("'q' pressed, exiting.")
-                            break
-                finally:
-                    self.logger.info("Releasing camera and destroying windows...")
-                    cap.release()
-                    if show_video:
-                        cv2.destroyAllWindows()
-            
+            # The single-camera trackers move the neck with the error, unlike the stereo one
+            self._track_face(index, None, show_video=show_video, exit_when_centered=exit_when_centered, invert_pitch=False)
             self.logger.info("Face tracking finished.")
             time.sleep(random.uniform(1, 3))
 
     def look_at_face(self, camera_index: int = 0, show_video: bool = False, exit_when_centered: bool = True) -> None:
-        # Configuration parameters
-        SLEEP_INTERVAL = 0.05   # faster loop for smoother control
-        TOLERANCE_RATIO = 0.05  # tighter deadzone
-
-        # PID gains — you’ll need to tune these for your hardware!
-        Kp_yaw, Ki_yaw, Kd_yaw = 0.03, 0.0001, 0.005
-        Kp_pitch, Ki_pitch, Kd_pitch = 0.03, 0.0001, 0.005
-
-        # State for PID
-        integral_x = 0.0
-        integral_y = 0.0
-        prev_error_x = 0.0
-        prev_error_y = 0.0
-        last_time = time.time()
-
-        arduino = "left"
-        neck_name, _, rot_name = self.motion_controller.neck_servos
-        neck_index, neck_rest, neck_min, neck_max, neck_current = self.motion_controller.get_servo_positions(
-            servo_name=neck_name, arduino=arduino)
-        rot_index, rot_rest, rot_min, rot_max, rot_current = self.motion_controller.get_servo_positions(
-            servo_name=rot_name, arduino=arduino)
-
-        self.logger.info(f"Starting face tracking on camera index {camera_index}...")
-
-        cap = cv2.VideoCapture(camera_index)
-        if not cap.isOpened():
-            self.logger.error(f"Could not open camera {camera_index}.")
-            return
-
-        ret, frame = cap.read()
-        if not ret:
-            self.logger.error("Could not read initial frame from camera.")
-            cap.release()
-            return
-
-        h, w, _ = frame.shape
-        cx, cy = w // 2, h // 2
-        tol_x = int(w * TOLERANCE_RATIO)
-        tol_y = int(h * TOLERANCE_RATIO)
-
-        with self.mp_face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.5) as face_detection:
-            try:
-                while True:
-                    now = time.time()
-                    dt = now - last_time
-                    last_time = now
-
-                    time.sleep(SLEEP_INTERVAL)
-                    ret, frame = cap.read()
-                    if not ret:
-                        self.logger.error("Failed to capture frame.")
-                        break
-
-                    frame = cv2.flip(frame, 1)
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = face_detection.process(rgb)
-
-                    if results.detections:
-                        # get the first face
-                        bbox = results.detections[0].location_data.relative_bounding_box
-                        x = int((bbox.xmin + bbox.width / 2) * w)
-                        y = int((bbox.ymin + bbox.height / 2) * h)
-
-                        if show_video:
-                            cv2.rectangle(frame, (int(bbox.xmin*w), int(bbox.ymin*h)),
-                                          (int((bbox.xmin+bbox.width)*w), int((bbox.ymin+bbox.height)*h)),
-                                          (0,255,0), 2)
-                            cv2.circle(frame, (x,y), 5, (0,0,255), -1)
-
-                        # compute error
-                        error_x = cx - x
-                        error_y = cy - y
-
-                        # deadzone
-                        if abs(error_x) > tol_x or abs(error_y) > tol_y:
-                            # PID for yaw (rothead)
-                            integral_x += error_x * dt
-                            derivative_x = (error_x - prev_error_x) / dt if dt > 0 else 0.0
-                            command_x = (Kp_yaw * error_x +
-                                         Ki_yaw * integral_x +
-                                         Kd_yaw * derivative_x)
-
-                            # PID for pitch (neck)
-                            integral_y += error_y * dt
-                            derivative_y = (error_y - prev_error_y) / dt if dt > 0 else 0.0
-                            command_y = (Kp_pitch * error_y +
-                                         Ki_pitch * integral_y +
-                                         Kd_pitch * derivative_y)
-
-                            prev_error_x, prev_error_y = error_x, error_y
-
-                            # round and clamp to servo limits
-                            d_rot = int(np.clip(command_x, rot_min - rot_current, rot_max - rot_current))
-                            d_neck = int(np.clip(command_y, neck_min - neck_current, neck_max - neck_current))
-
-                            rot_current  += d_rot
-                            neck_current += d_neck
-
-                            self.logger.debug(f"PID dx={command_x:.2f}, dy={command_y:.2f} → Δrot={d_rot}, Δneck={d_neck}")
-
-                            # send commands
-                            try:
-                                self.motion_controller.set_current_pos_servo(rot_name, arduino, rot_current)
-                                self.motion_controller.set_current_pos_servo(neck_name, arduino, neck_current)
-                                self.motion_controller.send_command(rot_index, rot_current, arduino, rot_name)
-                                self.motion_controller.send_command(neck_index, neck_current, arduino, neck_name)
-                            except Exception as e:
-                                self.logger.error(f"Motion controller error: {e}")
-                        else:
-                            # centered within tolerance?
-                            if exit_when_centered:
-                                self.logger.info("Centered; exiting.")
-                                break
-
-                    # draw the deadzone
-                    if show_video:
-                        cv2.rectangle(frame,
-                                      (cx - tol_x, cy - tol_y),
-                                      (cx + tol_x, cy + tol_y),
-                                      (255,255,0), 1)
-                        cv2.circle(frame, (cx, cy), 5, (255,255,255), -1)
-                        cv2.imshow('Face Tracking', frame)
-                        if cv2.waitKey(5) & 0xFF == ord('q'):
-                            self.logger.info("'q' pressed, exiting.")
-                            break
-
-            finally:
-                self.logger.info("Cleaning up...")
-                cap.release()
-                if show_video:
-                    cv2.destroyAllWindows()
-
-        self.logger.info("Face tracking finished.")
+        """Follows the face seen by one camera (until it is centered if exit_when_centered)."""
+        self._track_face(camera_index, None, show_video=show_video, exit_when_centered=exit_when_centered, invert_pitch=False)
 
     def look_at_face_stereo(self,
                         left_cam: int = 0,
                         right_cam: int = 2,
                         show_video: bool = False,
-                        exit_when_centered: bool = False) -> None:
+                        exit_when_centered: bool = False,
+                        control_rate: float = 30.0,
+                        detection_rate: float = 15.0,
+                        mode: str = "alternate") -> None:
+        """Follows the face seen by both eye cameras while looking_at_person."""
         print("Looking at face stereo!")
-        # PID gains (tune these!)
-        Kp, Ki, Kd = 0.03, 0.0001, 0.005
-        SLEEP = 0.05
-        TOLERANCE = 0.05  # as fraction of frame dims
-
-        # PID state
-        int_x = int_y = 0.0
-        prev_err_x = prev_err_y = 0.0
-        last = time.time()
-
-        # open both cameras
-        capL = cv2.VideoCapture(left_cam)
-        capR = cv2.VideoCapture(right_cam)
-        if not capL.isOpened() or not capR.isOpened():
-            self.logger.error("Cannot open both cameras.")
-            return
+        self._track_face(left_cam, right_cam, show_video=show_video, exit_when_centered=exit_when_centered,
+                         control_rate=control_rate, detection_rate=detection_rate, mode=mode)
 
-        # grab one frame to get size
-        retL, frameL = capL.read()
-        retR, frameR = capR.read()
-        if not (retL and retR):
-            self.logger.error("Failed to read initial frames.")
+    def _track_face(self, left_cam, right_cam, show_video=False, exit_when_centered=False,
+                    control_rate=30.0, detection_rate=15.0, mode="alternate", invert_pitch=True):
+        """
+        Face tracking loop shared by every look_at_face* mode: StereoFaceTracker
+        finds the face (see face_tracking.py) and posts its latest position to the
+        GazeController, which moves the head at its own fixed rate (see
+        GazeController for invert_pitch).
+        """
+        tracker = StereoFaceTracker(self.camera_service, left_cam, right_cam,
+                                    mode=mode, detection_rate=detection_rate)
+        if not tracker.open():
+            tracker.close()
+            self.logger.error(f"Cannot open camera {left_cam} for face tracking.")
             return
-        h, w, _ = frameL.shape
-        cx, cy = w//2, h//2
-        tol_x = int(w * TOLERANCE)
-        tol_y = int(h * TOLERANCE)
-
-        # servo setup (same as before)…
-        arduino = "left"
-        neck_name, _, rot_name = self.motion_controller.neck_servos
-        neck_idx, neck_rest, neck_min, neck_max, neck_cur = \
-            self.motion_controller.get_servo_positions(neck_name, arduino)
-        rot_idx, rot_rest, rot_min, rot_max, rot_cur = \
-            self.motion_controller.get_servo_positions(rot_name, arduino)
-
-        with self.mp_face_detection.FaceDetection(model_selection=0,
-                                                  min_detection_confidence=0.5) as fd:
-            try:
-                while self.looking_at_person:
-                    now = time.time()
-                    dt = now - last
-                    last = now
-
-                    time.sleep(SLEEP)
-                    retL, fL = capL.read()
-                    retR, fR = capR.read()
-                    if not (retL and retR):
-                        break
+        if right_cam is not None and len(tracker.sides()) < 2:
+            self.logger.warning(f"Camera {right_cam} cannot be opened, tracking with camera {left_cam} only.")
 
-                    fL = cv2.flip(fL, 1)
-                    fR = cv2.flip(fR, 1)
-                    rgbL = cv2.cvtColor(fL, cv2.COLOR_BGR2RGB)
-                    rgbR = cv2.cvtColor(fR, cv2.COLOR_BGR2RGB)
-
-                    resL = fd.process(rgbL)
-                    resR = fd.process(rgbR)
-
-                    # only proceed if both see a face
-                    if not (resL.detections and resR.detections):
-                        continue
-
-                    def get_center(detection, frame):
-                        bbox = detection.location_data.relative_bounding_box
-                        x = int((bbox.xmin + bbox.width/2) * w)
-                        y = int((bbox.ymin + bbox.height/2) * h)
-                        return x, y
-
-                    xL, yL = get_center(resL.detections[0], fL)
-                    xR, yR = get_center(resR.detections[0], fR)
-
-                    # optionally draw
-                    if show_video:
-                        for (f, x,y, res) in [(fL,xL,yL,resL),(fR,xR,yR,resR)]:
-                            bb = res.detections[0].location_data.relative_bounding_box
-                            x0, y0 = int(bb.xmin*w), int(bb.ymin*h)
-                            x1, y1 = int((bb.xmin+bb.width)*w), int((bb.ymin+bb.height)*h)
-                            cv2.rectangle(f, (x0,y0), (x1,y1), (0,255,0),2)
-                            cv2.circle(f, (x,y), 4, (0,0,255), -1)
-                            cv2.imshow('L', fL)
-                            cv2.imshow('R', fR)
-
-                    # compute and average errors
-                    err_x = ((cx - xL) + (cx - xR)) / 2.0
-                    err_y = ((cy - yL) + (cy - yR)) / 2.0
-
-                    # only act if outside deadzone in *either* camera
-                    if abs(cx - xL) > tol_x or abs(cx - xR) > tol_x \
-                       or abs(cy - yL) > tol_y or abs(cy - yR) > tol_y:
-
-                        # PID
-                        int_x  += err_x * dt
-                        deriv_x = (err_x - prev_err_x) / dt if dt>0 else 0
-                        cmd_x   = Kp*err_x + Ki*int_x + Kd*deriv_x
-
-                        int_y  += err_y * dt
-                        deriv_y = (err_y - prev_err_y) / dt if dt>0 else 0
-                        cmd_y   = - (Kp*err_y + Ki*int_y + Kd*deriv_y)
-
-                        prev_err_x, prev_err_y = err_x, err_y
-
-                        # clamp and apply
-                        delta_rothead = int(np.clip(cmd_x, rot_min-rot_cur, rot_max-rot_cur))
-                        delta_neck   = int(np.clip(cmd_y, neck_min-neck_cur, neck_max-neck_cur))
-
-                        prev_rot_cur = rot_cur
-                        prev_neck_cur = neck_cur
-                        
-                        rot_cur  += delta_rothead
-                        neck_cur += delta_neck
-
-                        if rot_cur != prev_rot_cur:
-                            self.motion_controller.set_current_pos_servo(rot_name, arduino, rot_cur)
-                            self.motion_controller.send_command(rot_idx, rot_cur, arduino, rot_name)
-                        if neck_cur != prev_neck_cur:
-                            self.motion_controller.set_current_pos_servo(neck_name, arduino, neck_cur)
-                            self.motion_controller.send_command(neck_idx, neck_cur, arduino, neck_name)
-                    else:
-                        # both are centered
-                        if exit_when_centered:
-                            break
-
-                    if show_video and cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
+        gaze = self.get_gaze_controller(control_rate, invert_pitch)
+        if gaze is not None:
+            gaze.start()
+
+        self.logger.info(f"Starting face tracking on cameras {tracker.sides()}...")
+        try:
+            for dt, face in tracker.track(rate=control_rate, should_continue=lambda: self.looking_at_person):
+                self.face_detected = face is not None
+
+                if gaze is not None:
+                    gaze.update(face.error() if face is not None else None, tracker.frame_size)
 
-            finally:
-                capL.release()
-                capR.release()
                 if show_video:
-                    cv2.destroyAllWindows()
+                    for side, frame in tracker.debug_frames(face).items():
+                        cv2.imshow(side[0].upper(), frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        self.logger.info("'q' pressed, exiting.")
+                        break
 
+                if exit_when_centered and gaze is not None and gaze.is_centered():
+                    self.logger.info("Face is centered. Exiting face tracking.")
+                    break
+        finally:
+            if gaze is not None:
+                gaze.stop()
+                self.logger.info(f"Gaze control stats: {gaze.stats()}")
+            tracker.close()
+            self.logger.info(f"Face tracking stats: {tracker.stats()}")
+            if show_video:
+                cv2.destroyAllWindows()
+
+    def get_gaze_controller(self, rate=30.0, invert_pitch=True):
+        """The head GazeController (None without a motion controller)."""
+        if self.motion_controller is None:
+            return None
+        if (self.gaze_controller is None or self.gaze_controller.rate != rate
+                or self.gaze_controller.invert_pitch != invert_pitch):
+            self.gaze_controller = GazeController(self.motion_controller, rate=rate, invert_pitch=invert_pitch)
+        return self.gaze_controller
 
     def start_looking_at(self):
         self.looking_at_person = True
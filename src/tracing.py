@@ -0,0 +1,145 @@
+import collections
+import contextlib
+import functools
+import threading
+import json
+import time
+import os
+
+from datetime import datetime
+
+
+class Tracer:
+    """
+    Lightweight span tracer for the whole Akira pipeline.
+
+    Spans are timed with the monotonic clock and kept as Chrome trace events,
+    so a session can be opened in chrome://tracing or https://ui.perfetto.dev
+    as a flame timeline (one row per thread). The last `window` durations of
+    every span name are also kept for a rolling p50/p95 summary.
+
+    Args:
+        trace_dir: Where `save` writes the session trace.
+        window: Number of samples per stage used for the percentiles.
+        max_events: Events beyond this are not kept in the trace (stats still are).
+    """
+    def __init__(self, trace_dir=None, window=200, max_events=200000, enabled=True):
+        if trace_dir is None:
+            trace_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+        self.trace_dir = trace_dir
+        self.window = window
+        self.max_events = max_events
+        self.enabled = enabled
+
+        self.lock = threading.Lock()
+        self.new_session()
+
+    def new_session(self):
+        with self.lock:
+            self.session_start = datetime.now()
+            self.origin = time.perf_counter()
+            self.events = []
+            self.thread_names = {}
+            self.samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+
+    def _timestamp_us(self, t):
+        return (t - self.origin) * 1e6
+
+    def _add_event(self, event):
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        with self.lock:
+            self.thread_names.setdefault(thread.ident, thread.name)
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+
+    def record(self, name, start, end, category="akira", **args):
+        """Adds a span measured elsewhere, with perf_counter start/end times."""
+        if not self.enabled:
+            return
+        self._add_event({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._timestamp_us(start),
+            "dur": (end - start) * 1e6,
+            "args": args
+            })
+        self.observe(name, end - start)
+
+    def observe(self, name, seconds):
+        """Adds a sample to the rolling statistics of `name` without a trace event."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.samples[name].append(seconds)
+
+    def instant(self, name, category="akira", **args):
+        if not self.enabled:
+            return
+        self._add_event({
+            "name": name,
+            "cat": category,
+            "ph": "i",
+            "s": "t",
+            "ts": self._timestamp_us(time.perf_counter()),
+            "args": args
+            })
+
+    @contextlib.contextmanager
+    def span(self, name, category="akira", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), category, **args)
+
+    def trace(self, name=None, category="akira"):
+        """Decorator timing every call of a function as a span."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """{name: (count, p50, p95)} in seconds over the last `window` samples of every stage."""
+        with self.lock:
+            samples = {name: sorted(values) for name, values in self.samples.items() if values}
+
+        def percentile(values, q):
+            return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+        return {name: (len(values), percentile(values, 0.5), percentile(values, 0.95)) for name, values in samples.items()}
+
+    def summary(self):
+        lines = [f"{'stage':40s} {'n':>5s} {'p50 (s)':>9s} {'p95 (s)':>9s}"]
+        for name, (count, p50, p95) in sorted(self.stats().items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:40s} {count:5d} {p50:9.3f} {p95:9.3f}")
+        return "\n".join(lines)
+
+    def save(self, path=None):
+        """Writes the session as a Chrome trace / Perfetto JSON file and returns its path."""
+        if path is None:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            path = os.path.join(self.trace_dir, "akira_" + self.session_start.strftime("%Y%m%d_%H%M%S") + ".json")
+
+        with self.lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread_name}}
+                for tid, thread_name in self.thread_names.items()
+                ]
+            trace = {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+
+# Shared by every module of the pipeline
+tracer = Tracer()